@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
-import joblib
-import plotly.express as px
 from pathlib import Path
 import os 
 import glob
 import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 
 # Paths
 PROJECT_ROOT = Path(__file__).resolve().parent
@@ -13,130 +13,127 @@ MODEL_PATH = PROJECT_ROOT.parent / 'models' / 'line_clf.joblib'
 RAW_DATA_DIR = PROJECT_ROOT / 'data_raw'
 PROCESSED_DIR = PROJECT_ROOT / 'data_processed'
 TO_REVIEW_PATH = PROJECT_ROOT / "data_labels" / "to_review.csv"
-DB_PATH = PROCESSED_DIR / 'workouts.db'
+DB_PATH = PROJECT_ROOT.parent / 'data_processed' / 'workouts.db'
 sys.path.append(str(Path(__file__).parent.parent.resolve()))
 # Imports Parsers
-from src.parsers.v1_parser import parse_log_content
-from src.parsers.normalize import normalize_exercise
-from src.parsers.hybrid_parse_all import ml_label_fn, save_review_fn
-from src.parsers.feature_engineering import calculate_epley_1rm, run_feature_engineering
-
-# Cache model loading
+from src.parsers.batch_parse import parse_file_cached, iter_parse_files, merge_in_order
+from src.parsers.hybrid_parse_all import get_classifier
+from src.parsers.dedupe import DedupeIndex
+from src.parsers.parse_cache import parse_cache_key
+from src.parsers import db, search
+from src.analytics.downsample import downsample_series, DEFAULT_MAX_POINTS
+from src.analytics.trends import build_trend_frames
+from src.analytics.weekly import weekly_volume, exercise_frequency, PERIODS
+from src.parsers.exports import build_export, EXPORT_FORMATS
+from src.analytics.daily import aggregate_data, update_aggregate
+from src.analytics.load import LoadIndex, daily_load_rows, ALL_EXERCISES, ACWR_SWEET_SPOT
+
+# Model loading: deferred to the first parse, so a cold start does not pay for it.
+# This is the classifier the parser uses (compiled model when it is up to date).
 @st.cache_resource
 def load_ml_model():
     if not MODEL_PATH.exists():
         st.error(f"ML model not found at {MODEL_PATH}.")
         return None
-    return joblib.load(MODEL_PATH)
+    return get_classifier()
 
-# Cache parsing 
-@st.cache_data
+# Parsing, cached on disk by content hash + parser/model version
 def parse_file_content(text, source_file='Streamlit_upload', conf_threshold=0.60):
-    rows = parse_log_content(
-        text, 
-        source_file=source_file,
-        ml_label_fn=ml_label_fn,
-        save_review_fn=save_review_fn,
-        conf_threshold=conf_threshold
-    )
-    # Normalize exersises
-    for r in rows:
-        if 'exercise' in r and r['exercise']:
-            r['exercise'] = normalize_exercise(r['exercise'])
-    return pd.DataFrame(rows)
-
-# In-memory aggregation
-@st.cache_data
-def aggregate_data(df_raw, rm_formula="Epley"):
-    if df_raw is None or df_raw.empty:
-        return pd.DataFrame()
-
-    df = df_raw.copy()
-
-    # Make sure the columns we expect actually exist
-    for col in ["date", "program", "exercise", "weight_kg", "reps", "time_sec", "volume", "set_no"]:
-        if col not in df.columns:
-            df[col] = pd.NA
-
-    # Type coercion
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df["reps"] = pd.to_numeric(df["reps"], errors="coerce")
-    df["weight_kg"] = pd.to_numeric(df["weight_kg"], errors="coerce")
-    df["time_sec"] = pd.to_numeric(df["time_sec"], errors="coerce")
-    df["volume"] = pd.to_numeric(df["volume"], errors="coerce")
-
-    # ---- 1RM calculation ----
-    def brzycki(row):
-        w = row.get("weight_kg")
-        r = row.get("reps")
-        if pd.isna(w) or pd.isna(r) or r <= 0:
-            return None
-        return w / (1.0278 - 0.0278 * r)
-
-    if rm_formula == "Epley":
-        df["estimated_1rm"] = df.apply(
-            lambda row: calculate_epley_1rm(row["weight_kg"], row["reps"])
-            if not (pd.isna(row["weight_kg"]) or pd.isna(row["reps"]))
-            else None,
-            axis=1,
-        )
-    elif rm_formula == "Brzycki":
-        df["estimated_1rm"] = df.apply(brzycki, axis=1)
-    else:
-        df["estimated_1rm"] = pd.NA
-
-    # ---- Group + aggregate ----
-    grouped = df.groupby(["date", "program", "exercise"], dropna=False)
-
-    daily_summary = grouped.agg(
-        max_1rm=("estimated_1rm", "max"),
-        best_weight_kg=("weight_kg", "max"),
-        total_volume=("volume", "sum"),
-        num_sets=("set_no", "count"),
-        max_time_sec=("time_sec", "max"),
-    ).reset_index()
-
-    # ---- Best reps (for the heaviest set) ----
-    def get_best_reps(g: pd.DataFrame):
-        # If column missing somehow, just bail
-        if "weight_kg" not in g.columns or "reps" not in g.columns:
-            return None
-        g_nonan = g.dropna(subset=["weight_kg"])
-        if g_nonan.empty:
-            return None
-        # row with max weight_kg
-        idx = g_nonan["weight_kg"].idxmax()
-        # idx might not exist in extreme edge-cases; be paranoid
-        if idx not in g_nonan.index:
-            return None
-        return g_nonan.loc[idx, "reps"]
+    return parse_file_cached(text, source_file, conf_threshold)
 
-    try:
-        best_reps_df = grouped.apply(get_best_reps).reset_index(name="best_reps")
-        daily_summary = pd.merge(
-            daily_summary,
-            best_reps_df,
-            on=["date", "program", "exercise"],
-            how="left",
-        )
-    except Exception as e:
-        # If anything goes sideways here, don't kill the app – just skip best_reps
-        daily_summary["best_reps"] = None
-        # You can log e somewhere if you want
-
-    return daily_summary[
-        [
-            "date",
-            "program",
-            "exercise",
-            "num_sets",
-            "max_1rm",
-            "best_weight_kg",
-            "best_reps",
-            "total_volume",
-            "max_time_sec",
-        ]
-    ]
+def cancel_processing():
+    st.session_state.processing_cancelled = True
+
+# Database mode: one shared read-only connection, queries cached per (db file version, filters)
+@st.cache_resource
+def get_db_connection(db_path):
+    return db.connect_read_only(db_path)
+
+@st.cache_data(max_entries=64)
+def db_athletes(db_path, db_version):
+    return db.fetch_athletes(get_db_connection(db_path))
+
+@st.cache_data(max_entries=64)
+def db_exercises(db_path, db_version, athlete):
+    return db.fetch_exercises(get_db_connection(db_path), athlete)
+
+@st.cache_data(max_entries=256)
+def db_date_bounds(db_path, db_version, exercise, athlete):
+    return db.fetch_date_bounds(get_db_connection(db_path), exercise, athlete)
+
+@st.cache_data(max_entries=256)
+def db_exercise_data(db_path, db_version, exercise, start, end, athlete):
+    conn = get_db_connection(db_path)
+    df_agg = db.fetch_daily_summary(conn, exercise, start, end, athlete)
+    df_raw = db.fetch_sets(conn, exercise, start, end, athlete)
+    df_agg["date"] = pd.to_datetime(df_agg["date"], errors="coerce")
+    return df_agg, df_raw
+
+# Full-text search of set notes and low-confidence lines, newest first, per DB version
+@st.cache_data(max_entries=64)
+def db_search(db_path, db_version, query, athlete, limit=200):
+    return search.search(get_db_connection(db_path), query, limit, athlete=athlete)
+
+# Training load index of the whole DB (all exercises) per DB version; read-only, so shared
+@st.cache_resource(max_entries=4)
+def db_training_load(db_path, db_version):
+    return db.fetch_training_load(get_db_connection(db_path))
+
+# One athlete selector in the sidebar for every tab, only shown when there is more than one
+# athlete; None when the data has no athlete column
+def choose_athlete(athletes):
+    athletes = list(athletes)
+    if len(athletes) > 1:
+        with st.sidebar:
+            return st.selectbox("Athlete", athletes, key="athlete")
+    return athletes[0] if athletes else None
+
+# Polls the DB version once a second and reruns the page when the watch daemon has written
+@st.fragment(run_every=1.0)
+def watch_db_changes(shown_version):
+    if db.db_version(DB_PATH) != shown_version:
+        st.rerun(scope="app")
+
+# Smoothed trend series for all exercises per (data version, formula, smoothing window);
+# the frame itself is not hashed, data_version changes whenever df_agg is rebuilt
+@st.cache_data(max_entries=32)
+def trend_frames(data_version, rm_formula, smoothing_window, _df_agg):
+    return build_trend_frames(_df_agg, smoothing_window)
+
+# Volume / frequency tables per (data version, period)
+@st.cache_data(max_entries=32)
+def volume_by_period(data_version, freq, _df_agg):
+    return weekly_volume(_df_agg, freq)
+
+@st.cache_data(max_entries=32)
+def frequency_by_period(data_version, freq, _df_agg):
+    return exercise_frequency(_df_agg, freq)
+
+# Encoded downloads per (data version, format, table)
+@st.cache_data(max_entries=8)
+def prepared_export(data_version, fmt, table, _df_agg, _df_raw):
+    if table == "Daily Summary":
+        return build_export(fmt, "workout_history_daily", _df_agg)
+    if table == "Raw Sets":
+        return build_export(fmt, "workout_raw_sets", _df_raw)
+    bundle = {"workout_raw_sets.csv": _df_raw, "workout_history_daily.csv": _df_agg}
+    return build_export(fmt, "workout_export", None, bundle)
+
+# Daily load metrics of one series; the index only changes together with data_version
+@st.cache_data(max_entries=64)
+def load_metrics_frame(data_version, athlete, exercise, _load_index):
+    return _load_index.metrics_frame(exercise, athlete)
+
+# Downsampled chart data for the visible date range
+@st.cache_data(max_entries=256)
+def trend_chart_data(data_version, exercise, rm_formula, smoothing_window, start, end, max_points, _plot_df):
+    visible = _plot_df[(_plot_df["date"] >= pd.Timestamp(start)) & (_plot_df["date"] <= pd.Timestamp(end))]
+    return {
+        "1rm": downsample_series(visible, "date", ["max_1rm", "1rm_smooth"], max_points),
+        "weight": downsample_series(visible, "date", ["best_weight_kg", "weight_smooth"], max_points),
+        "volume": downsample_series(visible, "date", ["total_volume"], max_points, method="minmax"),
+        "n_points": len(visible),
+    }
 
     
 # Main app  UI
@@ -150,16 +147,19 @@ with st.sidebar:
     conf_threshold = st.slider("ML Confidence Threshold", 0.0, 1.0, 0.60, 0.05)
     rm_formula = st.selectbox("1RM Formula", ["Epley", "Brzycki"])
     smoothing_window = st.slider("Plot Smoothing Window (days)", 1, 30, 7)
+    cpu_count = os.cpu_count() or 1
+    max_workers = st.slider("Parallel parse workers", 1, max(2, cpu_count), min(4, cpu_count))
 
 # Choose input mode
 mode = st.radio(
     "Input Mode",
-    ["Upload single file", "Select from data_raw", "Upload multiple files"],
+    ["Upload single file", "Select from data_raw", "Upload multiple files", "Load from database"],
     horizontal=True,
 )
 
 text_files = None
 source_names = []
+athlete = None
 
 # Input Handling
 
@@ -191,37 +191,174 @@ elif mode == "Upload multiple files":
     if text_files:
         source_names = [f.name for f in text_files]
 
+elif mode == "Load from database":
+    if not DB_PATH.exists():
+        st.error(f"Database not found: {DB_PATH}")
+    else:
+        # file mtime as the cache version, so a reload of the DB invalidates cached queries
+        db_version = db.db_version(DB_PATH)
+        if st.toggle("Live updates", help="Re-query every second while the watch daemon (src/parsers/watch.py) ingests new logs"):
+            watch_db_changes(db_version)
+        athlete = choose_athlete(db_athletes(str(DB_PATH), db_version))
+        exercises = db_exercises(str(DB_PATH), db_version, athlete)
+        if not exercises:
+            st.warning("No exercises found in the database.")
+        else:
+            chosen_ex = st.selectbox("Exercise", exercises)
+            lo, hi = db_date_bounds(str(DB_PATH), db_version, chosen_ex, athlete)
+            lo, hi = pd.Timestamp(lo).date(), pd.Timestamp(hi).date()
+            date_range = st.date_input("Date range", (lo, hi), min_value=lo, max_value=hi)
+            if len(date_range) == 2:
+                start, end = date_range
+                df_agg, df_raw = db_exercise_data(str(DB_PATH), db_version, chosen_ex, start, end, athlete)
+                st.session_state.df_agg = df_agg
+                st.session_state.df_raw = df_raw
+                st.session_state.load_index = db_training_load(str(DB_PATH), db_version)
+                st.session_state.data_version = f"db-{db_version}-{chosen_ex}-{start}-{end}"
+                st.session_state.file_keys = []
+                st.caption("Database mode uses the stored daily summary (Epley 1RM).")
+
+        query = st.text_input("Search notes", placeholder='belt, "felt pain", pause*',
+                              help="Set notes and low-confidence lines of every exercise. "
+                                   "All words must match; * matches a prefix.")
+        if query:
+            if not search.has_index(get_db_connection(str(DB_PATH))):
+                st.warning("This database has no search index yet; rebuild it with the pipeline's db stage "
+                           "or start the watch daemon.")
+            else:
+                hits = db_search(str(DB_PATH), db_version, query, athlete)
+                if hits.empty:
+                    st.info("No matching notes.")
+                else:
+                    st.caption(f"{len(hits)} most recent match(es).")
+                    st.dataframe(hits[["date", "athlete", "exercise", "set_no", "weight_kg", "reps", "highlight",
+                                       "kind", "source_file", "line_no"]].rename(columns={"highlight": "match"}),
+                                 hide_index=True, use_container_width=True)
+
 # Processing
+if st.session_state.pop("processing_cancelled", False):
+    st.warning("Processing cancelled.")
+
 if text_files and st.button("Process Files", type="primary"):
-    with st.spinner(f"Parsing {len(text_files)} file(s)..."):
-        load_ml_model() # early trigger if file missing
+    load_ml_model() # early trigger if file missing
+
+    contents = [file.read().decode("utf-8") if hasattr(file, "read") else file for file in text_files]
+    file_keys = [parse_cache_key(c) for c in contents]
+
+    # files already in this session are skipped as long as none were removed and the
+    # 1RM formula is unchanged; otherwise everything is rebuilt
+    prev_keys = st.session_state.get("file_keys") or []
+    incremental = (
+        bool(prev_keys)
+        and "df_raw" in st.session_state
+        and set(prev_keys) <= set(file_keys)
+        and st.session_state.get("agg_formula") == rm_formula
+    )
+    todo = [i for i, k in enumerate(file_keys) if not (incremental and k in prev_keys)]
 
-        all_rows = []
-        for i, file in enumerate(text_files):
-            content = file.read().decode("utf-8") if hasattr(file, "read") else file
-            df = parse_file_content(content, source_names[i], conf_threshold)
-            all_rows.extend(df.to_dict("records"))
+    # clicking Cancel reruns the script, which stops this run; the finally below drops queued files
+    st.button("Cancel", on_click=cancel_processing)
+    progress = st.progress(0.0, text=f"Parsing {len(todo)} file(s)...")
 
-        if not all_rows:
+    results = []
+    use_pool = max_workers > 1 and len(todo) > 1
+    executor = ProcessPoolExecutor(max_workers=max_workers) if use_pool else None
+    try:
+        for result in iter_parse_files([contents[i] for i in todo], [source_names[i] for i in todo],
+                                       conf_threshold, executor):
+            results.append(result)
+            progress.progress(len(results) / len(todo),
+                              text=f"Parsed {len(results)}/{len(todo)}: {result['file']}")
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    progress.empty()
+
+    # per-file failures are reported but don't abort the batch
+    for result in results:
+        if result["error"]:
+            st.warning(f"Failed to parse {result['file']}: {result['error']}")
+
+    st.session_state.parse_timings = pd.DataFrame([
+        {
+            "file": r["file"],
+            "sets": 0 if r["df"] is None else len(r["df"]),
+            "seconds": r["seconds"],
+            "cached": r["cached"],
+            "error": r["error"],
+        }
+        for r in sorted(results, key=lambda r: r["index"])
+    ])
+
+    # overlapping exports: sets already parsed from another file are dropped
+    dedupe_index = st.session_state.get("dedupe_index", DedupeIndex()) if incremental else DedupeIndex()
+    new_raw = merge_in_order(results, dedupe_index)
+    st.session_state.dedupe_index = dedupe_index
+    done_keys = [file_keys[todo[r["index"]]] for r in results if not r["error"]]
+
+    if incremental:
+        if not new_raw.empty:
+            df_raw = pd.concat([st.session_state.df_raw, new_raw], ignore_index=True)
+            df_agg = update_aggregate(st.session_state.df_agg, df_raw, new_raw, rm_formula)
+            # volume and set counts are additive, so the new sets are point updates on the index
+            if "load_index" in st.session_state:
+                st.session_state.load_index.add_daily(daily_load_rows(new_raw))
+            else:
+                st.session_state.load_index = LoadIndex.from_daily(df_agg)
+        else:
+            df_raw, df_agg = st.session_state.df_raw, st.session_state.df_agg
+        file_keys_done = prev_keys + done_keys
+    else:
+        df_raw = new_raw
+        if df_raw.empty:
             st.error("No sets were parsed. Check your log format.")
             st.stop()
-
-        df_raw = pd.DataFrame(all_rows)
         df_agg = aggregate_data(df_raw, rm_formula)
-
-        # Store in session state for plots
-        st.session_state.df_agg = df_agg
-        st.session_state.df_raw = df_raw
-
+        st.session_state.load_index = LoadIndex.from_daily(df_agg)
+        file_keys_done = done_keys
+
+    # Store in session state for plots
+    st.session_state.df_agg = df_agg
+    st.session_state.df_raw = df_raw
+    st.session_state.file_keys = file_keys_done
+    st.session_state.agg_formula = rm_formula
+    st.session_state.data_version = uuid.uuid4().hex
+
+    if incremental:
+        st.success(f"Added {len(new_raw)} sets from {len(todo)} new file(s); {len(df_raw)} sets in total.")
+    else:
         st.success(f"Sucessfully parsed {len(df_raw)} sets from {len(text_files)} file(s).")
+    overlaps = dedupe_index.overlap_report()
+    if not overlaps.empty:
+        st.info(f"Skipped {dedupe_index.duplicate_count()} set(s) that appear in more than one file.")
+        with st.expander("Overlapping files"):
+            st.dataframe(overlaps, hide_index=True)
+
+if "parse_timings" in st.session_state:
+    with st.expander("Per-file parse timings", expanded=False):
+        st.dataframe(st.session_state.parse_timings, use_container_width=True)
 
 # Display Results 
 
 if "df_agg" in st.session_state:
+    # plotly is only needed once there are charts to draw
+    import plotly.express as px
+
     df_agg = st.session_state.df_agg
     df_raw = st.session_state.df_raw
 
-    tab1, tab2, tab3, tab4 = st.tabs(["Daily Summary", "Raw Sets", "Trends", "Downloads"])
+    # every tab shows the athlete picked in the sidebar (database mode picks it before querying)
+    if mode != "Load from database" and "athlete" in df_agg.columns:
+        athlete = choose_athlete(sorted(df_agg["athlete"].dropna().unique()))
+    if athlete is not None:
+        if "athlete" in df_agg.columns:
+            df_agg = df_agg[df_agg["athlete"] == athlete].reset_index(drop=True)
+        if "athlete" in df_raw.columns:
+            df_raw = df_raw[df_raw["athlete"] == athlete].reset_index(drop=True)
+    data_version = f"{st.session_state.get('data_version', '')}-{athlete}"
+
+    tab1, tab2, tab3, tab_volume, tab_load, tab4 = st.tabs(
+        ["Daily Summary", "Raw Sets", "Trends", "Volume & Heatmap", "Training Load", "Downloads"])
 
     with tab1:
         st.dataframe(df_agg, use_container_width=True)
@@ -233,52 +370,153 @@ if "df_agg" in st.session_state:
         exercises = sorted(df_agg["exercise"].dropna().unique())
         selected_ex = st.selectbox("Select Exercise", exercises, index=0)
 
-        plot_df = df_agg[df_agg["exercise"] == selected_ex].copy()
-        plot_df = plot_df.sort_values("date")
-        plot_df["1rm_smooth"] = plot_df["max_1rm"].rolling(smoothing_window, min_periods=1).mean()
-        plot_df["weight_smooth"] = plot_df["best_weight_kg"].rolling(smoothing_window, min_periods=1).mean()
+        plot_df = trend_frames(data_version, rm_formula, smoothing_window, df_agg).get(selected_ex)
+
+        if plot_df is None or plot_df.empty:
+            st.info("No dated sessions for this exercise.")
+        else:
+            # the visible range picks the resolution: fewer days -> more detail per day
+            d_min, d_max = plot_df["date"].iloc[0].date(), plot_df["date"].iloc[-1].date()
+            if d_min < d_max:
+                start, end = st.slider("Visible date range", min_value=d_min, max_value=d_max, value=(d_min, d_max))
+            else:
+                start, end = d_min, d_max
+            show_raw = st.toggle("Show raw points", value=False,
+                                 help=f"Charts are downsampled to about {DEFAULT_MAX_POINTS} points per series.")
+            max_points = len(plot_df) if show_raw else DEFAULT_MAX_POINTS
+
+            chart = trend_chart_data(data_version, selected_ex, rm_formula, smoothing_window,
+                                     start, end, max_points, plot_df)
+            if chart["n_points"] > max_points:
+                st.caption(f"Showing a downsampled view of {chart['n_points']} sessions.")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                fig = px.line(
+                    chart["1rm"],
+                    x="date",
+                    y="value",
+                    color="variable",
+                    title=f"Estimated 1RM - {selected_ex}",
+                    markers=True,
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                fig = px.line(
+                    chart["weight"],
+                    x="date",
+                    y="value",
+                    color="variable",
+                    title = f"Best Weight - {selected_ex}",
+                    markers = True,
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            
+            fig_vol = px.bar(
+                chart["volume"],
+                x="date",
+                y="value",
+                title = f"Volume - {selected_ex}",
+            )
+            st.plotly_chart(fig_vol, use_container_width=True)
+
+    with tab_volume:
+        period_label = st.radio("Period", list(PERIODS.values()), horizontal=True)
+        freq = {label: code for code, label in PERIODS.items()}[period_label]
+
+        volume = volume_by_period(data_version, freq, df_agg)
+        fig = px.bar(
+            x=volume.index,
+            y=volume.values,
+            labels={"x": period_label, "y": "Total Volume (kg)"},
+            title=f"{period_label}ly Training Volume",
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        freq_table = frequency_by_period(data_version, freq, df_agg)
+        if not freq_table.empty:
+            n_exercises = len(freq_table)
+            top_n = st.slider("Exercises shown", 1, n_exercises, min(25, n_exercises)) if n_exercises > 1 else 1
+            # only the rows on screen are densified
+            shown = freq_table.iloc[:top_n].sparse.to_dense()
+            shown.columns = shown.columns.strftime("%d %b %Y")
+            fig = px.imshow(
+                shown,
+                color_continuous_scale="Blues",
+                aspect="auto",
+                labels={"x": period_label, "y": "Exercise", "color": "Sessions"},
+                title="Exercise Frequency Heatmap",
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+    with tab_load:
+        load_index = st.session_state.get("load_index")
+        if load_index is None or not load_index.exercises(athlete):
+            st.info("No dated sessions to compute training load from.")
+        else:
+            load_ex = st.selectbox("Exercise", load_index.exercises(athlete), key="load_exercise")
+            load_df = load_metrics_frame(data_version, athlete, load_ex, load_index)
+
+            # latest values and the picked date range come straight from the index (O(log n) each)
+            latest = load_index.metrics_at(load_ex, load_df["date"].iloc[-1], athlete)
+            cols = st.columns(5)
+            cols[0].metric("7-day volume", f"{latest['volume_7d']:,.0f} kg")
+            cols[1].metric("28-day volume", f"{latest['volume_28d']:,.0f} kg")
+            cols[2].metric("ACWR", f"{latest['acwr']:.2f}")
+            cols[3].metric("Monotony", f"{latest['monotony']:.2f}")
+            cols[4].metric("Strain", f"{latest['strain']:,.0f}")
+
+            l_min, l_max = load_df["date"].iloc[0].date(), load_df["date"].iloc[-1].date()
+            load_range = st.date_input("Totals for", (l_min, l_max), min_value=l_min, max_value=l_max,
+                                       key="load_range")
+            if len(load_range) == 2:
+                totals = load_index.range_sum(load_ex, load_range[0], load_range[1], athlete)
+                st.caption(f"{totals['volume']:,.0f} kg over {totals['sets']:,.0f} sets")
 
-        col1, col2 = st.columns(2)
-        with col1:
             fig = px.line(
-                plot_df,
+                downsample_series(load_df, "date", ["volume_7d", "volume_28d"]),
                 x="date",
-                y=["max_1rm", "1rm_smooth"],
-                title=f"Estimated 1RM - {selected_ex}",
-                markers=True,
+                y="value",
+                color="variable",
+                title=f"Rolling Volume - {load_ex}",
             )
             st.plotly_chart(fig, use_container_width=True)
-        with col2:
+
             fig = px.line(
-                plot_df,
+                downsample_series(load_df, "date", ["acwr"]),
                 x="date",
-                y=["best_weight_kg", "weight_smooth"],
-                title = f"Best Weight - {selected_ex}",
-                markers = True,
+                y="value",
+                labels={"value": "ACWR"},
+                title="Acute:Chronic Workload Ratio (7 / 28 days)",
+            )
+            fig.add_hrect(y0=ACWR_SWEET_SPOT[0], y1=ACWR_SWEET_SPOT[1], fillcolor="green", opacity=0.1, line_width=0)
+            st.plotly_chart(fig, use_container_width=True)
+
+            # monotony and strain are weekly measures: one point per week, ending on Sunday
+            weekly = load_df[load_df["date"].dt.dayofweek == 6]
+            fig = px.bar(
+                weekly,
+                x="date",
+                y="strain",
+                hover_data=["monotony", "volume_7d"],
+                title="Weekly Strain (volume x monotony)",
             )
             st.plotly_chart(fig, use_container_width=True)
-        
-        fig_vol = px.bar(
-            plot_df,
-            x="date",
-            y="total_volume",
-            title = f"Volume - {selected_ex}",
-        )
-        st.plotly_chart(fig_vol, use_container_width=True)
 
     with tab4:
-        st.download_button(
-            "Download Daily Summary CSV",
-            df_agg.to_csv(index=False).encode(),
-            "workout_history_daily.csv",
-            "text/csv",
-        )
-        st.download_button(
-            "Download Raw Sets CSV",
-            df_raw.to_csv(index=False).encode(),
-            "workout_raw_sets.csv",
-            "text/csv",
-        )
+        # exports are only encoded when asked for, then cached per data version
+        export_fmt = st.selectbox("Format", list(EXPORT_FORMATS))
+        bundle_export = EXPORT_FORMATS[export_fmt][0] == "zip"
+        export_table = None if bundle_export else st.selectbox("Table", ["Daily Summary", "Raw Sets"])
+        export_request = (data_version, export_fmt, export_table)
+
+        if st.button("Prepare export"):
+            st.session_state.export_request = export_request
+        if st.session_state.get("export_request") == export_request:
+            with st.spinner("Preparing export..."):
+                data, file_name, mime = prepared_export(*export_request, df_agg, df_raw)
+            st.download_button(f"Download {file_name}", data, file_name, mime)
+            st.caption(f"{len(data) / 1024:,.1f} KB")
 
 # LOW CONFIDENCE LINES
 if TO_REVIEW_PATH.exists():
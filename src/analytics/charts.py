@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.analytics.weekly import weekly_volume, exercise_frequency
+
+# Static charts for visualizations/ (the notebook's 1RM, weekly volume and frequency
+# heatmap PNGs, plus a 1RM and a weekly volume chart per exercise), rebuilt incrementally.
+# Each chart's fingerprint is a hash of the data slice it plots (plus its kind, title and
+# dpi); charts whose fingerprint matches the manifest and whose file exists are skipped,
+# so a new session only re-renders its exercise's charts and the two summary charts.
+# The rest are rendered in worker processes. Charts of exercises that are gone are removed.
+#
+#   python -m src.analytics.charts                  # update visualizations/
+#   python -m src.analytics.charts --force --workers 4
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DAILY_PATH = PROJECT_ROOT / "data_processed" / "workouts_daily_exercise.csv"
+CHART_DIR = PROJECT_ROOT / "visualizations"
+MANIFEST_NAME = ".charts_manifest.json"
+RENDER_VERSION = "1"  # bump when chart styling changes, to re-render everything
+
+SUMMARY_DPI = 300     # the notebook's charts (linked from the README)
+EXERCISE_DPI = 150    # per-exercise charts, hundreds of them
+FEATURED_1RM = {"Barbell Bench Press": "bench_1rm.png"}
+HEATMAP_ALIASES = {"Weighted Pull-ups": "Pull-ups", "Pullups": "Pull-ups"}
+HEATMAP_MAX_EXERCISES = 60
+JOBS_PER_TASK = 8     # charts per worker task (one pickling round trip)
+MAX_TICK_LABELS = 26
+
+
+# Slices: the data each chart plots, computed once for all charts
+
+def _one_rm_series(df: pd.DataFrame) -> pd.DataFrame:
+    # best estimated 1RM per date (several programs can hit an exercise on one day)
+    daily = df.groupby("date", sort=True)["max_1rm"].max().dropna()
+    return daily.reset_index()
+
+
+def _weekly_frame(df: pd.DataFrame) -> pd.DataFrame:
+    weekly = weekly_volume(df, "W")
+    return pd.DataFrame({"week": weekly.index, "total_volume": weekly.to_numpy()})
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_") or "exercise"
+
+
+def _fingerprint(kind: str, title: str, dpi: int, size, data: pd.DataFrame) -> str:
+    h = hashlib.blake2b(f"{RENDER_VERSION}|{kind}|{title}|{dpi}|{size}".encode("utf-8"), digest_size=16)
+    h.update(",".join(map(str, data.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def plan_charts(df: pd.DataFrame, summary_dpi: int = SUMMARY_DPI,
+                exercise_dpi: int = EXERCISE_DPI) -> List[Dict]:
+    # every chart for this daily summary: {"path", "kind", "title", "dpi", "size", "data", "fingerprint"}
+    df = df.assign(date=pd.to_datetime(df["date"], errors="coerce"),
+                   max_1rm=pd.to_numeric(df["max_1rm"], errors="coerce"),
+                   total_volume=pd.to_numeric(df["total_volume"], errors="coerce"))
+    df = df.dropna(subset=["date"])
+    charts = []
+
+    def add(path, kind, title, dpi, size, data):
+        charts.append({"path": path, "kind": kind, "title": title, "dpi": dpi, "size": size, "data": data,
+                       "fingerprint": _fingerprint(kind, title, dpi, size, data)})
+
+    add("weekly_volume.png", "weekly_volume", "Weekly Training Volume", summary_dpi, (12, 6), _weekly_frame(df))
+    freq = exercise_frequency(df, "W", aliases=HEATMAP_ALIASES).sparse.to_dense().head(HEATMAP_MAX_EXERCISES)
+    add("exercise_freq_heatmap.png", "heatmap", "Exercise Frequency Heatmap", summary_dpi,
+        (14, max(10, round(0.3 * len(freq)))), freq)
+
+    slugs: Dict[str, str] = {}
+    for exercise, sub in df.dropna(subset=["exercise"]).groupby("exercise", sort=True):
+        slug = _slug(exercise)
+        if slug in slugs.values():  # e.g. "Pull-ups" and "Pull ups"
+            slug += "_" + hashlib.blake2b(exercise.encode("utf-8"), digest_size=3).hexdigest()
+        slugs[exercise] = slug
+        one_rm = _one_rm_series(sub)
+        title = f"{exercise} - Estimated 1RM Over Time"
+        add(f"exercises/{slug}_1rm.png", "one_rm", title, exercise_dpi, (10, 4), one_rm)
+        if exercise in FEATURED_1RM:
+            add(FEATURED_1RM[exercise], "one_rm", title, summary_dpi, (10, 4), one_rm)
+        add(f"exercises/{slug}_weekly_volume.png", "weekly_volume", f"{exercise} - Weekly Volume",
+            exercise_dpi, (10, 4), _weekly_frame(sub))
+    return charts
+
+
+# Rendering (runs in worker processes; matplotlib is only imported there)
+
+def _render_one_rm(plt, chart):
+    data = chart["data"]
+    fig, ax = plt.subplots(figsize=chart["size"])
+    ax.plot(data["date"], data["max_1rm"], marker="o")
+    ax.set_title(chart["title"])
+    ax.set_xlabel("Date")
+    ax.set_ylabel("1RM (kg)")
+    return fig
+
+
+def _week_ticks(ax, weeks: pd.Series, fmt: str, max_labels: int = MAX_TICK_LABELS, offset: float = 0.0):
+    # a label every few weeks; fixed positions, so matplotlib doesn't lay out one per bar
+    step = max(1, -(-len(weeks) // max_labels))
+    ax.set_xticks([i + offset for i in range(0, len(weeks), step)])
+    ax.set_xticklabels([w.strftime(fmt) for w in weeks[::step]], rotation=45, ha="right")
+
+
+def _render_weekly_volume(plt, chart):
+    data = chart["data"]
+    fig, ax = plt.subplots(figsize=chart["size"])
+    ax.bar(range(len(data)), data["total_volume"], color="#1f77b4", width=0.8)
+    _week_ticks(ax, data["week"], "%Y-%m-%d")
+    ax.set_title(chart["title"], fontsize=16, fontweight="bold")
+    ax.set_ylabel("Total Volume (kg)")
+    ax.set_xlabel("Week")
+    ax.grid(axis="y", alpha=0.3)
+    fig.subplots_adjust(left=0.08, right=0.98, top=0.9, bottom=0.25)  # fixed margins instead of tight_layout
+    return fig
+
+
+def _render_heatmap(plt, chart):
+    import seaborn as sns
+    freq = chart["data"]
+    fig, ax = plt.subplots(figsize=chart["size"])
+    sns.heatmap(freq, cmap="Blues", linewidths=0.5, linecolor="lightgray", ax=ax, xticklabels=False,
+                cbar_kws={"label": "Number of Sessions", "shrink": 0.8})
+    ax.collections[0].set_clim(0, 2)  # anything 2+ sessions a week is the deepest blue
+    for label in ax.get_yticklabels()[:10]:
+        label.set_fontweight("bold")
+        label.set_fontsize(11)
+    weeks = pd.Series(pd.to_datetime(freq.columns))
+    _week_ticks(ax, weeks, "%d %b", offset=0.5)
+    ax.tick_params(axis="x", labelsize=10)
+    for pos in [i for i, w in enumerate(weeks) if w.day <= 7][1:]:  # rough month starts
+        ax.axvline(x=pos, color="white", linewidth=1.2, alpha=0.7)
+    for y in (0, freq.shape[0]):
+        ax.axhline(y=y, color="k", linewidth=1.5)
+    for x in (0, freq.shape[1]):
+        ax.axvline(x=x, color="k", linewidth=1.5)
+    ax.set_title(chart["title"], fontsize=18, fontweight="bold", pad=30)
+    ax.set_xlabel("Week", fontsize=13, fontweight="bold", labelpad=10)
+    ax.set_ylabel("Exercise", fontsize=13, fontweight="bold", labelpad=10)
+    fig.tight_layout()
+    return fig
+
+
+RENDERERS = {
+    "one_rm": _render_one_rm,
+    "weekly_volume": _render_weekly_volume,
+    "heatmap": _render_heatmap,
+}
+
+
+def render_charts(charts: List[Dict], out_dir) -> List[Tuple[str, Optional[str]]]:
+    # renders charts into out_dir; returns (path, error or None) per chart
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    results = []
+    for chart in charts:
+        path = Path(out_dir) / chart["path"]
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fig = RENDERERS[chart["kind"]](plt, chart)
+            # written next to the target and renamed, so a reader never sees half a PNG
+            tmp = path.with_name(path.name + ".tmp")
+            fig.savefig(tmp, dpi=chart["dpi"], format="png", pil_kwargs={"compress_level": 1})
+            os.replace(tmp, path)
+            plt.close(fig)
+            results.append((chart["path"], None))
+        except Exception as e:
+            plt.close("all")
+            results.append((chart["path"], f"{type(e).__name__}: {e}"))
+    return results
+
+
+# Incremental build
+
+def load_manifest(out_dir) -> Dict[str, str]:
+    path = Path(out_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+
+
+def save_manifest(out_dir, manifest: Dict[str, str]) -> None:
+    path = Path(out_dir) / MANIFEST_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def build_charts(df: pd.DataFrame, out_dir=CHART_DIR, workers: Optional[int] = None, force: bool = False,
+                 summary_dpi: int = SUMMARY_DPI, exercise_dpi: int = EXERCISE_DPI) -> Dict:
+    # brings out_dir up to date with df; returns counts and timings
+    start = time.perf_counter()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    charts = plan_charts(df, summary_dpi, exercise_dpi)
+    todo = [c for c in charts if force or manifest.get(c["path"]) != c["fingerprint"]
+            or not (out_dir / c["path"]).exists()]
+    planned = time.perf_counter()
+
+    batches = [todo[i:i + JOBS_PER_TASK] for i in range(0, len(todo), JOBS_PER_TASK)]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            results = [r for batch in pool.map(render_charts, batches, [out_dir] * len(batches)) for r in batch]
+    else:
+        results = [r for batch in batches for r in render_charts(batch, out_dir)]
+
+    fingerprints = {c["path"]: c["fingerprint"] for c in charts}
+    errors = {path: error for path, error in results if error}
+    for path, error in results:
+        if error is None:
+            manifest[path] = fingerprints[path]
+        else:
+            manifest.pop(path, None)
+    # only files this module wrote (listed in the manifest) are ever removed
+    removed = [p for p in manifest if p not in fingerprints]
+    for p in removed:
+        (out_dir / p).unlink(missing_ok=True)
+        del manifest[p]
+    save_manifest(out_dir, manifest)
+    return {
+        "charts": len(charts),
+        "rendered": len(results) - len(errors),
+        "unchanged": len(charts) - len(todo),
+        "removed": len(removed),
+        "errors": errors,
+        "plan_seconds": planned - start,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Render the charts in visualizations/, re-rendering only changed ones.")
+    ap.add_argument("--daily", default=str(DAILY_PATH), help="daily summary CSV")
+    ap.add_argument("--out", default=str(CHART_DIR))
+    ap.add_argument("--athlete", help="only this athlete's sessions (when the summary has several)")
+    ap.add_argument("--workers", type=int, help="render processes (default: CPU count)")
+    ap.add_argument("--force", action="store_true", help="re-render every chart")
+    ap.add_argument("--summary-dpi", type=int, default=SUMMARY_DPI)
+    ap.add_argument("--exercise-dpi", type=int, default=EXERCISE_DPI)
+    args = ap.parse_args()
+
+    daily = pd.read_csv(args.daily)
+    if args.athlete is not None:
+        if "athlete" not in daily.columns:
+            ap.error("the daily summary has no athlete column")
+        daily = daily[daily["athlete"] == args.athlete]
+    stats = build_charts(daily, args.out, args.workers, args.force, args.summary_dpi, args.exercise_dpi)
+    print(f"{stats['charts']} charts: {stats['rendered']} rendered, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed in {stats['seconds']:.2f}s (planning {stats['plan_seconds']:.2f}s)")
+    for path, error in stats["errors"].items():
+        print(f"  failed: {path}: {error}")
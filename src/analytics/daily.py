@@ -0,0 +1,132 @@
+from typing import Optional
+
+import pandas as pd
+
+from src.parsers.feature_engineering import calculate_epley_1rm
+
+# Daily summary used by the dashboard: one row per (date, program, exercise) with the
+# best estimated 1RM, heaviest set, volume and set count, per athlete when the sets carry one.
+
+def aggregate_data(df_raw: Optional[pd.DataFrame], rm_formula: str = "Epley") -> pd.DataFrame:
+    if df_raw is None or df_raw.empty:
+        return pd.DataFrame()
+
+    df = df_raw.copy()
+
+    # Make sure the columns we expect actually exist
+    for col in ["date", "program", "exercise", "weight_kg", "reps", "time_sec", "volume", "set_no"]:
+        if col not in df.columns:
+            df[col] = pd.NA
+
+    # Type coercion
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["reps"] = pd.to_numeric(df["reps"], errors="coerce")
+    df["weight_kg"] = pd.to_numeric(df["weight_kg"], errors="coerce")
+    df["time_sec"] = pd.to_numeric(df["time_sec"], errors="coerce")
+    df["volume"] = pd.to_numeric(df["volume"], errors="coerce")
+
+    # ---- 1RM calculation ----
+    def brzycki(row):
+        w = row.get("weight_kg")
+        r = row.get("reps")
+        if pd.isna(w) or pd.isna(r) or r <= 0:
+            return None
+        return w / (1.0278 - 0.0278 * r)
+
+    if rm_formula == "Epley":
+        df["estimated_1rm"] = df.apply(
+            lambda row: calculate_epley_1rm(row["weight_kg"], row["reps"])
+            if not (pd.isna(row["weight_kg"]) or pd.isna(row["reps"]))
+            else None,
+            axis=1,
+        )
+    elif rm_formula == "Brzycki":
+        df["estimated_1rm"] = df.apply(brzycki, axis=1)
+    else:
+        df["estimated_1rm"] = pd.NA
+
+    # ---- Group + aggregate ----
+    keys = summary_keys(df)
+    grouped = df.groupby(keys, dropna=False)
+
+    daily_summary = grouped.agg(
+        max_1rm=("estimated_1rm", "max"),
+        best_weight_kg=("weight_kg", "max"),
+        total_volume=("volume", "sum"),
+        num_sets=("set_no", "count"),
+        max_time_sec=("time_sec", "max"),
+    ).reset_index()
+
+    # ---- Best reps (for the heaviest set) ----
+    def get_best_reps(g: pd.DataFrame):
+        # If column missing somehow, just bail
+        if "weight_kg" not in g.columns or "reps" not in g.columns:
+            return None
+        g_nonan = g.dropna(subset=["weight_kg"])
+        if g_nonan.empty:
+            return None
+        # row with max weight_kg
+        idx = g_nonan["weight_kg"].idxmax()
+        # idx might not exist in extreme edge-cases; be paranoid
+        if idx not in g_nonan.index:
+            return None
+        return g_nonan.loc[idx, "reps"]
+
+    try:
+        best_reps_df = grouped.apply(get_best_reps).reset_index(name="best_reps")
+        daily_summary = pd.merge(
+            daily_summary,
+            best_reps_df,
+            on=keys,
+            how="left",
+        )
+    except Exception as e:
+        # If anything goes sideways here, don't kill the app – just skip best_reps
+        daily_summary["best_reps"] = None
+        # You can log e somewhere if you want
+
+    return daily_summary[
+        keys[:-len(GROUP_KEYS)] + [
+            "date",
+            "program",
+            "exercise",
+            "num_sets",
+            "max_1rm",
+            "best_weight_kg",
+            "best_reps",
+            "total_volume",
+            "max_time_sec",
+        ]
+    ]
+
+
+# Incremental aggregation: df_agg holds one row per ([athlete,] date, program, exercise)
+# group, so new rows only require recomputing the groups they touch
+GROUP_KEYS = ["date", "program", "exercise"]
+
+def summary_keys(df):
+    return (["athlete"] if "athlete" in df.columns else []) + GROUP_KEYS
+
+def group_keys(df, keys=GROUP_KEYS):
+    keys = df.reindex(columns=keys).copy()
+    keys["date"] = pd.to_datetime(keys["date"], errors="coerce")
+    return keys
+
+def update_aggregate(df_agg: pd.DataFrame, df_raw: pd.DataFrame, new_rows: pd.DataFrame,
+                     rm_formula: str = "Epley") -> pd.DataFrame:
+    if df_agg is None or df_agg.empty:
+        return aggregate_data(df_raw, rm_formula)
+
+    keys = summary_keys(df_raw)
+    touched = group_keys(new_rows, keys).drop_duplicates()
+    touched["_touched"] = True
+
+    # merge (unlike isin) matches NaN keys, e.g. sets without a program
+    def is_touched(df):
+        flags = group_keys(df, keys).merge(touched, on=keys, how="left")["_touched"]
+        return flags.fillna(False).astype(bool).to_numpy()
+
+    recomputed = aggregate_data(df_raw[is_touched(df_raw)], rm_formula)
+    kept = df_agg[~is_touched(df_agg)]
+    patched = pd.concat([kept, recomputed], ignore_index=True)
+    return patched.sort_values(keys, kind="stable").reset_index(drop=True)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Downsampling for long trend series before they are sent to Plotly.
+# LTTB (Largest-Triangle-Three-Buckets) keeps the visual shape of a line;
+# min/max bucketing keeps the extremes of each bucket (used for bars).
+
+DEFAULT_MAX_POINTS = 400
+
+
+def _as_float_x(x) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    # indices of the points kept by LTTB; x must be sorted, y free of NaN
+    x = _as_float_x(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if end >= next_end:  # last bucket: the next "bucket" is the final point
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        else:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        kept[i + 1] = a
+    kept[-1] = n - 1
+    return kept
+
+
+def minmax_indices(y, n_out: int) -> np.ndarray:
+    # indices of the min and max point of each of n_out // 2 buckets, in order
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    kept = []
+    for bucket in np.array_split(np.arange(n), n_out // 2):
+        values = y[bucket]
+        kept.append(bucket[int(np.argmin(values))])
+        kept.append(bucket[int(np.argmax(values))])
+    return np.unique(kept)
+
+
+def downsample_series(df: pd.DataFrame, x: str, columns, max_points: int = DEFAULT_MAX_POINTS,
+                      method: str = "lttb") -> pd.DataFrame:
+    # long-format frame (x, variable, value) with each column reduced to at most max_points;
+    # NaNs are dropped per column so gaps in one series don't distort the others
+    parts = []
+    for col in columns:
+        sub = df[[x, col]].dropna().sort_values(x)
+        if method == "minmax":
+            idx = minmax_indices(sub[col].to_numpy(), max_points)
+        else:
+            idx = lttb_indices(sub[x].to_numpy(), sub[col].to_numpy(), max_points)
+        sub = sub.iloc[idx]
+        parts.append(pd.DataFrame({x: sub[x].to_numpy(), "variable": col, "value": sub[col].to_numpy()}))
+    if not parts:
+        return pd.DataFrame(columns=[x, "variable", "value"])
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,247 @@
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Training load metrics over the daily summary: rolling 7/28-day volume, acute:chronic
+# workload ratio (ACWR), and Foster's monotony and strain, per exercise and over all
+# exercises.
+#
+# Every (athlete, exercise) series is a day-indexed array (rest days are zeros) held in
+# a Fenwick tree, so any date-range sum of volume / sets is O(log n) and a newly ingested
+# session is an O(log n) point update instead of re-running pandas rolling windows. The
+# tree also keeps the sum of squared daily volume, which is all monotony needs (the SD
+# of daily load over a week). Whole charts use one cumulative sum over the same arrays.
+
+ALL_EXERCISES = "All exercises"
+CHANNELS = ("volume", "sets", "volume_sq")  # columns of each tree
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+ACWR_SWEET_SPOT = (0.8, 1.3)
+
+
+def _days(dates) -> np.ndarray:
+    # days since 1970-01-01 as int64 (drop NaT first)
+    return pd.to_datetime(pd.Series(dates), errors="coerce").to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _day(date) -> int:
+    # scalar version of _days, for the per-query paths
+    return int(np.datetime64(pd.Timestamp(date), "D").astype(np.int64))
+
+
+class FenwickTree:
+    # binary indexed tree over rows of `values` (n x k), summing all k columns at once
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        prefix = np.zeros((n + 1,) + values.shape[1:])
+        np.cumsum(values, axis=0, out=prefix[1:])
+        i = np.arange(1, n + 1)
+        self.tree = np.zeros_like(prefix)
+        self.tree[1:] = prefix[i] - prefix[i - (i & -i)]  # O(n) build: node i covers (i - lowbit(i), i]
+
+    def add(self, index: int, delta) -> None:
+        i = index + 1
+        n = len(self.tree) - 1
+        while i <= n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, end: int) -> np.ndarray:
+        # sum of rows [0, end)
+        total = np.zeros(self.tree.shape[1:])
+        i = min(end, len(self.tree) - 1)
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, lo: int, hi: int) -> np.ndarray:
+        # sum of rows [lo, hi]
+        return self.prefix(hi + 1) - self.prefix(max(lo, 0))
+
+
+class DailySeries:
+    # one (athlete, exercise) series: daily totals from `origin` (days since epoch) on
+
+    def __init__(self, origin: int, values: np.ndarray):
+        self.origin = origin
+        self.length = len(values)  # days in use; the arrays may have spare capacity
+        self.values = values
+        self.tree = FenwickTree(values)
+
+    @classmethod
+    def from_days(cls, days: np.ndarray, volume: np.ndarray, sets: np.ndarray) -> "DailySeries":
+        origin = int(days.min())
+        offsets = days - origin
+        n = int(offsets.max()) + 1
+        values = np.zeros((n, len(CHANNELS)))
+        values[:, 0] = np.bincount(offsets, weights=volume, minlength=n)
+        values[:, 1] = np.bincount(offsets, weights=sets, minlength=n)
+        values[:, 2] = values[:, 0] ** 2
+        return cls(origin, values)
+
+    def _reserve(self, day: int) -> int:
+        # offset of `day`, growing the arrays (capacity doubling) or moving the origin back
+        if day < self.origin:
+            shift = self.origin - day
+            self.values = np.concatenate([np.zeros((shift, len(CHANNELS))), self.values])
+            self.origin, self.length = day, self.length + shift
+            self.tree = FenwickTree(self.values)
+        offset = day - self.origin
+        if offset >= len(self.values):
+            grown = np.zeros((max(offset + 1, 2 * len(self.values)), len(CHANNELS)))
+            grown[:len(self.values)] = self.values
+            self.values = grown
+            self.tree = FenwickTree(self.values)
+        self.length = max(self.length, offset + 1)
+        return offset
+
+    def add(self, day: int, volume: float, sets: float) -> None:
+        offset = self._reserve(day)
+        old = self.values[offset, 0]
+        delta = np.array([volume, sets, (old + volume) ** 2 - old ** 2])
+        self.values[offset] += delta
+        self.tree.add(offset, delta)
+
+    def range_sum(self, first_day: int, last_day: int) -> np.ndarray:
+        lo, hi = first_day - self.origin, min(last_day - self.origin, self.length - 1)
+        if hi < 0 or lo > hi:
+            return np.zeros(len(CHANNELS))
+        return self.tree.range_sum(max(lo, 0), hi)
+
+    def daily(self) -> np.ndarray:
+        return self.values[:self.length]
+
+
+def window_metrics(acute: np.ndarray, chronic: np.ndarray, week_sq: np.ndarray) -> Dict[str, np.ndarray]:
+    # acute / chronic are rolling 7 / 28-day volume sums, week_sq the 7-day sum of squared daily volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = acute / ACUTE_DAYS
+        var = week_sq / ACUTE_DAYS - mean ** 2
+        # differences of large prefix sums leave rounding noise where the true variance is 0
+        sd = np.sqrt(np.where(var > 1e-6 * mean ** 2, var, 0.0))
+        acwr = np.where(chronic > 0, mean / (chronic / CHRONIC_DAYS), np.nan)
+        monotony = np.where(sd > 0, mean / sd, np.nan)
+    return {
+        "volume_7d": acute,
+        "volume_28d": chronic,
+        "acwr": acwr,
+        "monotony": monotony,
+        "strain": acute * monotony,
+    }
+
+
+class LoadIndex:
+    # {(athlete, exercise): DailySeries}; exercise ALL_EXERCISES is the athlete's total.
+    # athlete is None when the daily summary has no athlete column.
+
+    def __init__(self):
+        self.series: Dict[Tuple[Optional[Hashable], str], DailySeries] = {}
+
+    @staticmethod
+    def _rows(df: pd.DataFrame) -> pd.DataFrame:
+        rows = pd.DataFrame({
+            "athlete": df["athlete"] if "athlete" in df.columns else None,
+            "exercise": df["exercise"],
+            "day": pd.to_datetime(df["date"], errors="coerce"),
+            "volume": pd.to_numeric(df["total_volume"], errors="coerce").fillna(0.0),
+            "sets": pd.to_numeric(df["num_sets"], errors="coerce").fillna(0.0),
+        }).dropna(subset=["day"])
+        rows["day"] = _days(rows["day"])
+        rows["athlete"] = rows["athlete"].astype(object).where(rows["athlete"].notna(), None)
+        return rows
+
+    @classmethod
+    def from_daily(cls, df: Optional[pd.DataFrame]) -> "LoadIndex":
+        # bulk build from daily summary rows (date, exercise, total_volume, num_sets[, athlete])
+        index = cls()
+        if df is None or df.empty:
+            return index
+        rows = cls._rows(df)
+        totals = rows.assign(exercise=ALL_EXERCISES)
+        for frame in (rows.dropna(subset=["exercise"]), totals):
+            for (athlete, exercise), g in frame.groupby(["athlete", "exercise"], dropna=False, sort=False):
+                athlete = None if pd.isna(athlete) else athlete
+                index.series[(athlete, exercise)] = DailySeries.from_days(
+                    g["day"].to_numpy(), g["volume"].to_numpy(), g["sets"].to_numpy())
+        return index
+
+    def add_daily(self, df: pd.DataFrame, sign: float = 1.0) -> None:
+        # incremental update: O(log n) per row and series. Volume and set counts are sums
+        # over sets, so new sets can be added (sign=1) or removed (sign=-1) without
+        # touching the rest of the series.
+        if df is None or df.empty:
+            return
+        for r in self._rows(df).itertuples(index=False):
+            keys = [(r.athlete, ALL_EXERCISES)] + ([(r.athlete, r.exercise)] if pd.notna(r.exercise) else [])
+            for key in keys:
+                series = self.series.get(key)
+                if series is None:
+                    self.series[key] = DailySeries.from_days(np.array([r.day]), np.array([sign * r.volume]),
+                                                             np.array([sign * r.sets]))
+                else:
+                    series.add(int(r.day), sign * r.volume, sign * r.sets)
+
+    def athletes(self):
+        return sorted({a for a, _ in self.series}, key=lambda a: (a is None, str(a)))
+
+    def exercises(self, athlete=None):
+        names = sorted(ex for a, ex in self.series if a == athlete and ex != ALL_EXERCISES)
+        return [ALL_EXERCISES] + names if names else []
+
+    def range_sum(self, exercise: str, start, end, athlete=None) -> Dict[str, float]:
+        # total volume and sets between two dates (inclusive) in O(log n)
+        series = self.series.get((athlete, exercise))
+        totals = series.range_sum(_day(start), _day(end)) if series is not None else np.zeros(len(CHANNELS))
+        return {"volume": float(totals[0]), "sets": float(totals[1])}
+
+    def metrics_at(self, exercise: str, date, athlete=None) -> Dict[str, float]:
+        # load metrics for the 7 / 28 days ending on `date`, from three tree queries
+        series = self.series.get((athlete, exercise))
+        if series is None:
+            return {}
+        day = _day(date)
+        week = series.range_sum(day - ACUTE_DAYS + 1, day)
+        month = series.range_sum(day - CHRONIC_DAYS + 1, day)
+        metrics = window_metrics(week[0], month[0], week[2])
+        return {name: float(value) for name, value in metrics.items()}
+
+    def metrics_frame(self, exercise: str, athlete=None, start=None, end=None) -> pd.DataFrame:
+        # one row per calendar day (rest days included) with the daily and rolling metrics
+        series = self.series.get((athlete, exercise))
+        if series is None:
+            return pd.DataFrame()
+        daily = series.daily()
+        prefix = np.zeros((len(daily) + 1, len(CHANNELS)))
+        np.cumsum(daily, axis=0, out=prefix[1:])
+        end_idx = np.arange(1, len(daily) + 1)
+
+        def rolling(days, col):
+            return prefix[end_idx, col] - prefix[np.maximum(end_idx - days, 0), col]
+
+        frame = pd.DataFrame({
+            "date": pd.to_datetime(series.origin + np.arange(len(daily)), unit="D"),
+            "volume": daily[:, 0],
+            "sets": daily[:, 1],
+        })
+        metrics = window_metrics(rolling(ACUTE_DAYS, 0), rolling(CHRONIC_DAYS, 0), rolling(ACUTE_DAYS, 2))
+        for name, values in metrics.items():
+            frame[name] = values
+        if start is not None:
+            frame = frame[frame["date"] >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame["date"] <= pd.Timestamp(end)]
+        return frame.reset_index(drop=True)
+
+
+def daily_load_rows(df_raw: pd.DataFrame) -> pd.DataFrame:
+    # raw sets -> the (athlete, date, exercise, total_volume, num_sets) rows LoadIndex needs,
+    # without the rest of the daily summary
+    keys = [c for c in ("athlete", "date", "exercise") if c in df_raw.columns]
+    df = df_raw.assign(date=pd.to_datetime(df_raw["date"], errors="coerce"),
+                       volume=pd.to_numeric(df_raw["volume"], errors="coerce"))
+    return df.groupby(keys, dropna=False).agg(total_volume=("volume", "sum"),
+                                              num_sets=("set_no", "count")).reset_index()
@@ -0,0 +1,38 @@
+from typing import Dict
+
+import pandas as pd
+
+# Smoothed trend series for every exercise in one pass. The smoothing window is in
+# calendar days ("7D" = this session and everything in the 6 days before it),
+# not in number of sessions.
+
+TREND_COLUMNS = {
+    "max_1rm": "1rm_smooth",
+    "best_weight_kg": "weight_smooth",
+}
+
+
+def build_trend_frames(df_agg: pd.DataFrame, window_days: int) -> Dict[str, pd.DataFrame]:
+    # {exercise: daily rows sorted by date with the smoothed columns added}
+    if df_agg is None or df_agg.empty:
+        return {}
+
+    df = df_agg.copy()
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df.dropna(subset=["date", "exercise"]).sort_values(["exercise", "date"], kind="stable")
+
+    value_cols = list(TREND_COLUMNS)
+    for col in value_cols:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    rolled = (
+        df[["exercise", "date"] + value_cols]
+        .groupby("exercise", sort=False)
+        .rolling(f"{window_days}D", on="date", min_periods=1)[value_cols]
+        .mean()
+    )
+    # df is sorted by exercise then date, so the groups come back in df's row order
+    for col, smooth_col in TREND_COLUMNS.items():
+        df[smooth_col] = rolled[col].to_numpy()
+
+    return {exercise: frame.reset_index(drop=True) for exercise, frame in df.groupby("exercise", sort=False)}
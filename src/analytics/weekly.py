@@ -0,0 +1,57 @@
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Weekly / monthly volume and exercise-frequency tables over the daily summary
+# (the logic behind the notebook's weekly volume chart and frequency heatmap).
+# Period bucketing is vectorised and the exercise x period table is built as a
+# sparse matrix, so thousands of exercises over years of weeks stay cheap. scipy is
+# imported by exercise_frequency only (keeps it off the dashboard's startup path).
+
+PERIODS = {"W": "Week", "M": "Month"}
+
+
+def period_start(dates: pd.Series, freq: str = "W") -> pd.Series:
+    # start of the Monday-based week (same as to_period('W').start_time) or of the month
+    dates = pd.to_datetime(dates, errors="coerce")
+    if freq == "W":
+        return dates.dt.normalize() - pd.to_timedelta(dates.dt.dayofweek, unit="D")
+    if freq == "M":
+        return dates.dt.to_period("M").dt.start_time
+    raise ValueError(f"Unsupported period: {freq}")
+
+
+def weekly_volume(df: pd.DataFrame, freq: str = "W") -> pd.Series:
+    # total volume per period, indexed by period start
+    periods = period_start(df["date"], freq)
+    volume = pd.to_numeric(df["total_volume"], errors="coerce")
+    return volume.groupby(periods).sum().rename("total_volume")
+
+
+def exercise_frequency(df: pd.DataFrame, freq: str = "W",
+                       aliases: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    # sessions per exercise per period as a sparse DataFrame (exercises x period starts),
+    # exercises ordered by total sessions, most frequent first. aliases maps name
+    # variants to one name and is applied before the table is built.
+    exercises = df["exercise"]
+    if aliases:
+        exercises = exercises.replace(aliases)
+    periods = period_start(df["date"], freq)
+
+    valid = exercises.notna().to_numpy() & periods.notna().to_numpy()
+    ex_codes, ex_names = pd.factorize(exercises[valid], sort=True)
+    period_codes, period_values = pd.factorize(periods[valid], sort=True)
+
+    from scipy import sparse
+    counts = sparse.coo_matrix(
+        (np.ones(len(ex_codes), dtype=np.int64), (ex_codes, period_codes)),
+        shape=(len(ex_names), len(period_values)),
+    ).tocsr()  # duplicate (exercise, period) entries are summed here
+
+    order = np.argsort(-np.asarray(counts.sum(axis=1)).ravel(), kind="stable")
+    counts = counts[order]
+    return pd.DataFrame.sparse.from_spmatrix(
+        counts, index=pd.Index(ex_names[order], name="exercise"),
+        columns=pd.DatetimeIndex(period_values, name=PERIODS[freq].lower()),
+    )
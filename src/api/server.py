@@ -0,0 +1,475 @@
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.parsers import db, search
+from src.analytics.trends import build_trend_frames
+
+# Lightweight JSON API over the workouts DB, standard library only:
+#
+#   GET  /health
+#   GET  /daily?exercise=&athlete=&start=&end=&limit=&cursor=   daily summary rows
+#   GET  /trend/1rm?exercise=&athlete=&smooth=7                 per-day best 1RM + smoothed
+#   GET  /exercises/top?metric=volume|sets|sessions|max_1rm&limit=
+#   GET  /review?limit=&cursor=                                 low-confidence lines to label
+#   GET  /search?q=&kind=note|line&athlete=&exercise=&limit=&cursor=
+#                                                               full-text search of set notes and
+#                                                               low-confidence lines, best match first
+#   POST /upload?name=&athlete=&store=1                         body: a log as UTF-8 text
+#                                                               (sets already stored from another file are dropped)
+#
+# Lists are paged with an opaque cursor (next_cursor in the response), keyset on
+# (date, rowid) for /daily so deep pages cost the same as the first one. Every GET
+# response is keyed by the data version (DB / WAL mtime, or the review file's mtime): it
+# is cached in process, served with ETag / Last-Modified, and answered with 304 when the
+# client already has it. Bodies over GZIP_MIN_BYTES are gzipped for clients that accept it.
+# Requests run on a fixed thread pool; each worker borrows a read-only connection.
+#
+#   python -m src.api.server --port 8000
+
+DEFAULT_PORT = 8000
+WORKERS = 8
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+TREND_SMOOTH_DAYS = 7
+CACHE_ENTRIES = 256
+GZIP_MIN_BYTES = 1024
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+REQUEST_TIMEOUT = 10  # seconds an idle keep-alive connection may hold a worker
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ConnectionPool:
+    # read-only connections reused across requests (at most one per worker thread is in use)
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.idle = queue.LifoQueue()
+
+    @contextmanager
+    def connection(self):
+        if not self.db_path.exists():
+            raise ApiError(503, f"database not found: {self.db_path}")
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = db.connect_read_only(self.db_path)
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+
+class CachedResponse:
+    def __init__(self, body: bytes, etag: str, version: Optional[int]):
+        self.body = body
+        self.etag = etag
+        self.last_modified = formatdate(version / 1e9, usegmt=True) if version else None
+        self.version = version
+        self._gzipped = None
+
+    def gzipped(self) -> bytes:
+        # compressed once, on the first request that accepts gzip
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+class ResponseCache:
+    # LRU of encoded responses; keys include the data version, so stale entries just age out
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key) -> Optional[CachedResponse]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry: CachedResponse) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+# Encoding
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+def _records(df: pd.DataFrame):
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def encode_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ApiError(400, "invalid cursor")
+
+
+def _int_param(params: Dict[str, str], name: str, default: int, lo: int = 1, hi: Optional[int] = None) -> int:
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if value < lo or (hi is not None and value > hi):
+        raise ApiError(400, f"{name} must be between {lo} and {hi}" if hi else f"{name} must be >= {lo}")
+    return value
+
+
+def _filters(params: Dict[str, str]) -> Dict[str, Optional[str]]:
+    return {k: params.get(k) for k in ("athlete", "start", "end")}
+
+
+# Routes: (server, query params) -> JSON-able payload
+
+def get_health(server, params):
+    return {"status": "ok", "db": str(server.db_path), "db_version": db.db_version(server.db_path)}
+
+
+def get_daily(server, params):
+    limit = _int_param(params, "limit", PAGE_SIZE, hi=MAX_PAGE_SIZE)
+    after = decode_cursor(params["cursor"]) if "cursor" in params else None
+    if after is not None and not (isinstance(after, list) and len(after) == 2):
+        raise ApiError(400, "invalid cursor")
+    with server.pool.connection() as conn:
+        page = db.fetch_daily_page(conn, limit, after, exercise=params.get("exercise"), **_filters(params))
+    next_cursor = None
+    if len(page) == limit:
+        last = page.iloc[-1]
+        next_cursor = encode_cursor([last["date"], int(last["row_id"])])
+    return {"items": _records(page.drop(columns="row_id")), "next_cursor": next_cursor}
+
+
+def get_1rm_trend(server, params):
+    exercise = params.get("exercise")
+    if not exercise:
+        raise ApiError(400, "exercise is required")
+    smooth = _int_param(params, "smooth", TREND_SMOOTH_DAYS, hi=365)
+    with server.pool.connection() as conn:
+        trend = db.fetch_1rm_trend(conn, exercise, **_filters(params))
+    frames = build_trend_frames(trend.assign(exercise=exercise), smooth)
+    frame = frames.get(exercise, pd.DataFrame(columns=["date", "exercise"]))
+    frame = frame.assign(date=pd.to_datetime(frame["date"]).dt.strftime("%Y-%m-%d")).drop(columns="exercise")
+    return {"exercise": exercise, "smooth_days": smooth, "items": _records(frame)}
+
+
+def get_top_exercises(server, params):
+    metric = params.get("metric", "volume")
+    if metric not in db.TOP_EXERCISE_METRICS:
+        raise ApiError(400, f"metric must be one of {', '.join(db.TOP_EXERCISE_METRICS)}")
+    limit = _int_param(params, "limit", 10, hi=MAX_PAGE_SIZE)
+    with server.pool.connection() as conn:
+        top = db.fetch_top_exercises(conn, metric, limit, **_filters(params))
+    return {"metric": metric, "items": _records(top)}
+
+
+def get_review(server, params):
+    limit = _int_param(params, "limit", PAGE_SIZE, hi=MAX_PAGE_SIZE)
+    offset = decode_cursor(params["cursor"]) if "cursor" in params else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise ApiError(400, "invalid cursor")
+    if not server.review_path.exists():
+        return {"items": [], "next_cursor": None}
+    page = pd.read_csv(server.review_path, skiprows=range(1, offset + 1), nrows=limit)
+    next_cursor = encode_cursor(offset + limit) if len(page) == limit else None
+    return {"items": _records(page), "next_cursor": next_cursor}
+
+
+def get_search(server, params):
+    query = params.get("q", "").strip()
+    if not query:
+        raise ApiError(400, "q is required")
+    kind = params.get("kind")
+    if kind is not None and kind not in search.KINDS:
+        raise ApiError(400, f"kind must be one of {', '.join(search.KINDS)}")
+    limit = _int_param(params, "limit", PAGE_SIZE, hi=MAX_PAGE_SIZE)
+    offset = decode_cursor(params["cursor"]) if "cursor" in params else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise ApiError(400, "invalid cursor")
+    with server.pool.connection() as conn:
+        hits = search.search(conn, query, limit, offset, kind=kind, athlete=params.get("athlete"),
+                             exercise=params.get("exercise"))
+    next_cursor = encode_cursor(offset + limit) if len(hits) == limit else None
+    return {"query": query, "items": _records(hits), "next_cursor": next_cursor}
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    return path.stat().st_mtime_ns if path.exists() else None
+
+
+# path -> (handler, data version the response depends on)
+GET_ROUTES = {
+    "/health": (get_health, lambda server: db.db_version(server.db_path)),
+    "/daily": (get_daily, lambda server: db.db_version(server.db_path)),
+    "/trend/1rm": (get_1rm_trend, lambda server: db.db_version(server.db_path)),
+    "/exercises/top": (get_top_exercises, lambda server: db.db_version(server.db_path)),
+    "/review": (get_review, lambda server: _mtime_ns(server.review_path)),
+    "/search": (get_search, lambda server: db.db_version(server.db_path)),
+}
+
+
+def post_upload(server, params, body: bytes):
+    # parse one log; with store=1 (default) its sets replace any earlier upload of the same
+    # name, and the daily summary groups it touches are recomputed, in one transaction.
+    # Imported here: the hybrid parser loads the line classifier.
+    from src.parsers.hybrid_parse_all import parse_text, CONF_THRESHOLD
+    from src.pipeline import RAW_COLUMNS, DEFAULT_ATHLETE
+
+    name = params.get("name")
+    if not name or "/" in name or "\\" in name:
+        raise ApiError(400, "name is required (a file name, without folders)")
+    athlete = params.get("athlete") or DEFAULT_ATHLETE
+    try:
+        text = body.decode("utf-8")
+        conf_threshold = float(params.get("conf_threshold", CONF_THRESHOLD))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ApiError(400, str(e))
+
+    source = f"upload/{athlete}/{name}"
+    reviews = []
+    rows = parse_text(text, source, conf_threshold, reviews=reviews)
+    for r in rows:
+        r["_source_file"] = source
+        r["athlete"] = athlete
+    sets = pd.DataFrame(rows, columns=RAW_COLUMNS)
+
+    stored = params.get("store", "1") not in ("0", "false", "no")
+    parsed = len(sets)
+    if stored:
+        from src.parsers.watch import open_db, refresh_daily
+        from src.parsers.dedupe import load_index
+        with server.write_lock:
+            conn = open_db(server.db_path)
+            try:
+                index = load_index(conn)  # read per upload: the watch daemon may have changed it
+                with conn:
+                    touched = [db.delete_source_sets(conn, source)]
+                    index.forget(source, conn)
+                    sets = index.claim_frame(sets, source, conn)  # sets other files already hold
+                    touched.append(sets[db.GROUP_COLUMNS])
+                    db.insert_frame(conn, "sets_raw", sets)
+                    search.index_sets(conn, sets)
+                    search.index_lines(conn, reviews, athlete=athlete)
+                    refresh_daily(conn, pd.concat(touched, ignore_index=True).drop_duplicates())
+            finally:
+                conn.close()
+    return {"source_file": source, "athlete": athlete, "stored": stored, "num_sets": len(sets),
+            "duplicate_sets": parsed - len(sets),
+            "exercises": sorted(sets["exercise"].dropna().unique().tolist()),
+            "items": _records(sets.drop(columns="_source_file"))}
+
+
+POST_ROUTES = {
+    "/upload": post_upload,
+}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive; every response sets Content-Length
+    timeout = REQUEST_TIMEOUT
+    server_version = "WorkoutLogAPI/1.0"
+
+    def _params(self):
+        url = urlsplit(self.path)
+        return url.path.rstrip("/") or "/", dict(parse_qsl(url.query))
+
+    def _accepts_gzip(self) -> bool:
+        return "gzip" in self.headers.get("Accept-Encoding", "")
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload, gzip_ok: bool = False):
+        body = json.dumps(payload, default=_json_default).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if gzip_ok and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        self._send(status, body, headers)
+
+    def _send_error(self, status: int, message: str):
+        self._send_json(status, {"error": message})
+
+    def _send_failure(self, e: Exception):
+        # an exception a handler did not turn into an ApiError: 503 while the DB cannot be
+        # read (locked, busy), 500 otherwise. The client always gets a status; the
+        # traceback goes to the server log.
+        traceback.print_exc()
+        if isinstance(e, sqlite3.OperationalError):
+            return self._send_error(503, f"database unavailable: {e}")
+        return self._send_error(500, f"internal error: {type(e).__name__}")
+
+    def _not_modified(self, entry: CachedResponse, etag: str) -> bool:
+        match = self.headers.get("If-None-Match")
+        if match is not None:
+            return match.strip() == "*" or any(t.strip() in (entry.etag, etag) for t in match.split(","))
+        since = self.headers.get("If-Modified-Since")
+        if since and entry.version:
+            try:
+                return parsedate_to_datetime(since).timestamp() >= entry.version // 1_000_000_000
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def do_GET(self):
+        path, params = self._params()
+        route = GET_ROUTES.get(path)
+        if route is None:
+            status = 405 if path in POST_ROUTES else 404
+            return self._send_error(status, f"{self.command} {path} not found")
+        handler, version_fn = route
+        try:
+            version = version_fn(self.server)
+            key = (path, tuple(sorted(params.items())), version)
+            entry = self.server.cache.get(key)
+            if entry is None:
+                body = json.dumps(handler(self.server, params), default=_json_default).encode("utf-8")
+                etag = '"' + hashlib.blake2b(repr(key).encode("utf-8"), digest_size=12).hexdigest() + '"'
+                entry = CachedResponse(body, etag, version)
+                self.server.cache.put(key, entry)
+        except ApiError as e:
+            return self._send_error(e.status, str(e))
+        except Exception as e:
+            return self._send_failure(e)
+
+        # the gzip variant is a different representation, so it gets its own ETag
+        use_gzip = self._accepts_gzip() and len(entry.body) >= GZIP_MIN_BYTES
+        etag = entry.etag[:-1] + '-gz"' if use_gzip else entry.etag
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if entry.last_modified:
+            headers["Last-Modified"] = entry.last_modified
+        if self._not_modified(entry, etag):
+            return self._send(304, b"", headers)
+        headers["Content-Type"] = "application/json"
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+        self._send(200, entry.gzipped() if use_gzip else entry.body, headers)
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        path, params = self._params()
+        handler = POST_ROUTES.get(path)
+        if handler is None:
+            status = 405 if path in GET_ROUTES else 404
+            return self._send_error(status, f"{self.command} {path} not found")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            return self._send_error(400, "invalid Content-Length")
+        if length > MAX_UPLOAD_BYTES:
+            self.close_connection = True  # the body is not read
+            return self._send_error(413, f"upload larger than {MAX_UPLOAD_BYTES} bytes")
+        body = self.rfile.read(length)
+        try:
+            payload = handler(self.server, params, body)
+        except ApiError as e:
+            return self._send_error(e.status, str(e))
+        except Exception as e:
+            return self._send_failure(e)
+        self._send_json(200, payload, gzip_ok=self._accepts_gzip())
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class ApiServer(HTTPServer):
+    # HTTPServer whose requests run on a fixed pool of worker threads
+
+    def __init__(self, address, db_path=db.DB_PATH, review_path=None, workers: int = WORKERS,
+                 quiet: bool = False):
+        super().__init__(address, ApiHandler)
+        if review_path is None:
+            review_path = db.PROJECT_ROOT / "data_labels" / "to_review.csv"  # hybrid_parse_all.TO_REVIEW
+        self.db_path = Path(db_path)
+        self.review_path = Path(review_path)
+        self.pool = ConnectionPool(self.db_path)
+        self.cache = ResponseCache()
+        self.write_lock = threading.Lock()  # one upload writes at a time
+        self.quiet = quiet
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.pool.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="JSON API over the workouts database.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--db-path", default=str(db.DB_PATH))
+    ap.add_argument("--workers", type=int, default=WORKERS, help="request worker threads")
+    ap.add_argument("--quiet", action="store_true", help="don't log every request")
+    args = ap.parse_args()
+
+    server = ApiServer((args.host, args.port), args.db_path, workers=args.workers, quiet=args.quiet)
+    print(f"Serving {args.db_path} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
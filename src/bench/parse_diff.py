@@ -0,0 +1,150 @@
+import argparse
+import random
+import re
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from src.parsers.v1_parser import parse_log_content, clear_shape_cache
+
+# Differential check of the parser's line-shape cache: parse_log_content with
+# use_shape_cache=False (every line through the regexes) against the cached path, cold
+# and warm. Inputs are a built-in log covering the formats the parser handles, that log
+# repeated with seeded mutations (numbers, spacing), seeded random token soup, and any
+# log files given. Rows and review lines must be identical. The ML labels are a hash of
+# the line, so the check needs no model and every branch, the review threshold
+# included, is reached. Run it after changing any of the parser's regexes.
+#
+#   python -m src.bench.parse_diff                 # exit 1 on any mismatch
+#   python -m src.bench.parse_diff data_raw/*.txt --fuzz-lines 100000 --seed 3
+
+FUZZ_LINES = 20000
+ML_LABELS = ["SET", "EXERCISE", "NOTE", "OTHER"]
+
+SEED_LOG = """\
+# comment
+12/11/2025 Push Day A
+Warm-up:
+- Arm circles
+S1: 20 reps
+1. Barbell Bench Press (6-8 reps)
+S1: 60kg x 8 reps
+S2: 62.5 kg x 8+2 reps (felt heavy)
+S3: 65kg  x  6 reps
+S4: 40kg x 30 sec
+S5: 45 sec
+S6: 8-10 reps
+S7: failed at 5
+S8: easy
+---
+Incline DB Press 8-10
+S1: 22.5kg x 10 reps
+50kg x 8
+felt good today
+• Cable Lateral Raises [drop set]
+S1: 10kg × 15 reps
+Plank
+S1: 60 sec
+13-11-2025 Pull Day
+Main Lifts
+Deadlift
+S1: 140 kg x 5 reps
+S2: 150kg x 3 reps (belt)
+(15 reps)
+8 reps
+Lat pulldown
+S1: 55kg * 12 reps
+random stuff 123 ???
+2024-01-05 Legs
+Barbell squats
+S1: 100kgs X 5 reps
+2. Barbell Rows   (8-10)
+S1: 70kg x 9+1 reps
+- Face pulls 12-15 reps
+S1: 25 kg x 15 rep
+5/1/24 Upper Body
+Accessories:
+S12: 7.5kg x 12 reps (slow eccentric)
+"""
+FUZZ_TOKENS = ["S1:", "S12:", "kg", "kgs", "x", "X", "×", "*", "reps", "rep", "sec", "(", ")", "-",
+               "•", "1.", "12/3/24", "2024-1-5", "05/06/2025", "31-12-99", "+", ".5", "---", ":",
+               "Bench", "Press", "  ", "\t", "100", "7", "felt good", "[a]", "{b}", "99999", "Main Lifts", "8-10"]
+
+
+def hashed_label(line: str) -> Tuple[str, float]:
+    # stand-in for the classifier: fixed per line, confidences on both sides of the threshold
+    h = zlib.crc32(line.encode("utf-8"))
+    return ML_LABELS[h % len(ML_LABELS)], (h >> 8) % 100 / 100
+
+
+def mutated_lines(text: str, n: int, seed: int = 0) -> str:
+    # the text's lines in order, repeated, with numbers and spacing changed
+    rng = random.Random(seed)
+    lines = [ln for ln in text.splitlines() if ln.strip()]
+    out = []
+    for i in range(n):
+        line = re.sub(r"\d+", lambda m: str(rng.randint(0, 10 ** rng.randint(1, 6))), lines[i % len(lines)])
+        out.append(re.sub(r" ", lambda m: rng.choice([" ", "  ", "\t", " "]), line))
+    return "\n".join(out)
+
+
+def token_soup(n: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "\n".join(" ".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 7))) for _ in range(n))
+
+
+def parse(text: str, use_shape_cache: bool) -> Dict:
+    reviews = []
+    rows = parse_log_content(text, source_file="diff.txt", ml_label_fn=hashed_label,
+                             save_review_fn=lambda *args: reviews.append(args),
+                             use_shape_cache=use_shape_cache)
+    return {"rows": rows, "reviews": reviews}
+
+
+def first_difference(expected: Dict, actual: Dict) -> str:
+    for part in ("rows", "reviews"):
+        a, b = expected[part], actual[part]
+        if a == b:
+            continue
+        for i, (x, y) in enumerate(zip(a, b)):
+            if x != y:
+                return f"{part}[{i}]: {x!r} != {y!r}"
+        return f"{part}: {len(a)} != {len(b)} entries"
+    return ""
+
+
+def check(inputs: Dict[str, str]) -> List[str]:
+    problems = []
+    for name, text in inputs.items():
+        expected = parse(text, use_shape_cache=False)
+        clear_shape_cache()
+        for run in ("cold", "warm"):
+            diff = first_difference(expected, parse(text, use_shape_cache=True))
+            if diff:
+                problems.append(f"{name} ({run} cache): {diff}")
+        print(f"{name}: {len(text.splitlines())} lines, {len(expected['rows'])} rows, "
+              f"{len(expected['reviews'])} review lines")
+    return problems
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Compare the parser with and without the line-shape cache.")
+    ap.add_argument("paths", nargs="*", help="log files to compare as well")
+    ap.add_argument("--fuzz-lines", type=int, default=FUZZ_LINES)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    inputs = {
+        "built-in log": SEED_LOG,
+        "mutated lines": mutated_lines(SEED_LOG, args.fuzz_lines, args.seed),
+        "token soup": token_soup(args.fuzz_lines, args.seed),
+    }
+    for path in args.paths:
+        inputs[path] = Path(path).read_text(encoding="utf-8")
+    problems = check(inputs)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK: cached and uncached parses are identical.")
@@ -0,0 +1,189 @@
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from src.bench.synth_logs import generate_log, parse_size
+from src.parsers.v1_parser import parse_log_content, clear_shape_cache, _classify_line, date_pattern
+from src.parsers.dates import normalize_date, clear_date_cache
+from src.parsers.normalize import normalize_exercise, clear_exercise_cache
+from src.parsers.feature_engineering import build_daily_summary
+from src.parsers import db
+from src.analytics.daily import aggregate_data
+from src.ml.fast_model import load_line_classifier, MODEL_PATH
+
+# End-to-end throughput benchmark on synthetic logs. Each stage runs on the output
+# of the previous one, at several input sizes; results are appended to a JSON
+# history and compared with the last run at the same size.
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+HISTORY_PATH = PROJECT_ROOT / "benchmarks" / "history.json"
+
+DEFAULT_SIZES = ["256KB", "1MB", "4MB"]
+# a stage this much slower than the previous run at the same size is flagged
+REGRESSION_RATIO = 1.20
+
+
+def _timed(fn: Callable, repeat: int):
+    # best wall time of `repeat` calls, plus the last result
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_size(n_bytes: int, seed: int = 0, repeat: int = 1) -> Dict:
+    text = generate_log(n_bytes, seed=seed)
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip() and not ln.strip().startswith('#')]
+    clf = load_line_classifier(MODEL_PATH)
+
+    def ml_label_fn(line):
+        probs = clf.predict_proba([line])[0]
+        best = int(probs.argmax())
+        return (str(clf.classes_[best]), float(probs[best]))
+
+    stages = {}
+
+    def record(name, fn, items):
+        seconds, result = _timed(fn, repeat)
+        stages[name] = {"seconds": round(seconds, 6), "items": items,
+                        "items_per_sec": round(items / seconds, 1) if seconds else None}
+        return result
+
+    def parse_regex():
+        clear_shape_cache()
+        clear_date_cache()
+        return parse_log_content(text)
+
+    def parse_hybrid():
+        clear_shape_cache()
+        clear_date_cache()
+        return parse_log_content(text, ml_label_fn=ml_label_fn)
+
+    record("parse_regex", parse_regex, len(lines))
+    rows = record("parse_hybrid", parse_hybrid, len(lines))
+
+    headers = [m.group(1) for m in map(date_pattern.match, lines) if m]
+
+    def date_normalize():
+        clear_date_cache()
+        return [normalize_date(h) for h in headers]
+
+    record("date_normalize", date_normalize, len(headers))
+
+    ml_lines = [ln for ln in lines if _classify_line(ln)[0] == "OTHER"]
+    record("ml_classify_batch", lambda: clf.predict_proba(ml_lines), len(ml_lines))
+
+    df_raw = pd.DataFrame(rows)
+    exercises = df_raw["exercise"].tolist()
+
+    def normalize():
+        clear_exercise_cache()
+        return [normalize_exercise(e, review_fn=None) for e in exercises]
+
+    df_raw["exercise"] = record("normalize_exercise", normalize, len(exercises))
+
+    daily = record("feature_engineering", lambda: build_daily_summary(df_raw), len(df_raw))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def load_db():
+            conn = sqlite3.connect(Path(tmp) / "bench.db")
+            try:
+                db.load_frames_to_db(conn, df_raw, daily)
+            finally:
+                conn.close()
+        record("db_load", load_db, len(df_raw) + len(daily))
+
+    record("dashboard_aggregate", lambda: aggregate_data(df_raw), len(df_raw))
+
+    return {"size_bytes": len(text.encode("utf-8")), "lines": len(lines),
+            "sets": len(df_raw), "daily_rows": len(daily), "stages": stages}
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def load_history(path=HISTORY_PATH) -> List[Dict]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def append_history(run: Dict, path=HISTORY_PATH) -> None:
+    path = Path(path)
+    history = load_history(path)
+    history.append(run)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(history, indent=2), encoding="utf-8")
+
+
+def previous_result(history: List[Dict], size_label: str):
+    for run in reversed(history):
+        for res in run["results"]:
+            if res["size"] == size_label:
+                return res
+    return None
+
+
+def print_report(run: Dict, history: List[Dict]) -> None:
+    for res in run["results"]:
+        prev = previous_result(history, res["size"])
+        print(f"\n== {res['size']}: {res['lines']} lines, {res['sets']} sets, {res['daily_rows']} daily rows")
+        for name, st in res["stages"].items():
+            line = f"  {name:<22} {st['seconds']:>9.4f}s  {st['items_per_sec'] or 0:>14,.0f} items/s"
+            if prev and name in prev["stages"] and prev["stages"][name]["seconds"]:
+                ratio = st["seconds"] / prev["stages"][name]["seconds"]
+                line += f"  x{ratio:.2f} vs previous"
+                if ratio > REGRESSION_RATIO:
+                    line += "  <-- slower"
+            print(line)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark the parsing pipeline on synthetic logs.")
+    ap.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help="comma separated, e.g. 256KB,1MB,16MB")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=1, help="runs per stage, best time is kept")
+    ap.add_argument("--history", default=str(HISTORY_PATH))
+    ap.add_argument("--no-save", action="store_true", help="print the report without updating the history")
+    args = ap.parse_args()
+
+    results = []
+    for label in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        print(f"Running {label}...")
+        results.append({"size": label, **run_size(parse_size(label), args.seed, args.repeat)})
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    history = load_history(args.history)
+    print_report(run, history)
+    if not args.no_save:
+        append_history(run, args.history)
+        print(f"\nAppended to {args.history}")
@@ -0,0 +1,113 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Set
+
+# Cold-start import benchmark for the Streamlit dashboard. The app's top-level imports
+# are run in a fresh interpreter with -X importtime, several times; the best cumulative
+# time of each imported module is reported. Heavy dependencies (plotting, the classifier
+# and its libraries) are loaded by the feature that needs them, so the run also fails
+# when one of them is imported at startup again, or when the total goes over budget.
+#
+#   python -m src.bench.startup                    # report + guard, exit 1 on failure
+#   python -m src.bench.startup --budget 1.5 --repeat 5
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+APP_PATH = PROJECT_ROOT / "apps" / "streamlit_app.py"
+
+# must not be imported before the feature that needs them runs (streamlit itself
+# imports the lazy top-level plotly package; plotly.express is the expensive part)
+DEFERRED_MODULES = ["plotly.express", "joblib", "sklearn", "scipy"]
+# seconds for all of the app's imports, streamlit and pandas included
+STARTUP_BUDGET = 2.0
+
+
+def app_imports(app_path=APP_PATH) -> List[str]:
+    # the app's module-level import statements, in order, as source lines
+    tree = ast.parse(Path(app_path).read_text(encoding="utf-8"))
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    # -X importtime lines -> cumulative seconds of each module imported at top level
+    # (nested imports are indented and already counted by their parent)
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def _run_importtime(code: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT,
+                         env=env, capture_output=True, text=True, timeout=300)
+    if out.returncode != 0:
+        raise RuntimeError(f"app imports failed:\n{out.stderr[-2000:]}")
+    return out
+
+
+def measure_once(statements: List[str], interpreter: Set[str]) -> Dict:
+    # modules the interpreter loads on its own (site, encodings, ...) are left out
+    code = "\n".join(statements + [
+        "import json, sys",
+        f"print(json.dumps(sorted(m for m in {DEFERRED_MODULES!r} if m in sys.modules)))",
+    ])
+    out = _run_importtime(code)
+    modules = {k: v for k, v in parse_importtime(out.stderr).items() if k not in interpreter}
+    return {"modules": modules, "deferred": json.loads(out.stdout.strip().splitlines()[-1])}
+
+
+def measure(repeat: int = 3, app_path=APP_PATH) -> Dict:
+    # best of `repeat` cold starts per module; the first run also warms the OS file cache
+    statements = app_imports(app_path)
+    interpreter = set(parse_importtime(_run_importtime("pass").stderr))
+    best: Dict[str, float] = {}
+    deferred = set()
+    for _ in range(repeat):
+        run = measure_once(statements, interpreter)
+        for name, seconds in run["modules"].items():
+            best[name] = min(seconds, best.get(name, seconds))
+        deferred.update(run["deferred"])
+    return {"modules": best, "total": sum(best.values()), "deferred_loaded": sorted(deferred)}
+
+
+def print_report(result: Dict, top: int = 15) -> None:
+    print(f"App imports: {result['total']:.3f}s (best per module)")
+    for name, seconds in sorted(result["modules"].items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {name:<40} {seconds:>8.3f}s")
+
+
+def check(result: Dict, budget: float = STARTUP_BUDGET) -> List[str]:
+    problems = []
+    if result["deferred_loaded"]:
+        problems.append(f"loaded at startup: {', '.join(result['deferred_loaded'])}")
+    if result["total"] > budget:
+        problems.append(f"app imports took {result['total']:.3f}s, budget is {budget:.3f}s")
+    return problems
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Measure the dashboard's import time at startup.")
+    ap.add_argument("--repeat", type=int, default=3, help="cold starts, best time per module is kept")
+    ap.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="seconds allowed for all imports")
+    ap.add_argument("--top", type=int, default=15, help="modules listed in the report")
+    args = ap.parse_args()
+
+    result = measure(args.repeat)
+    print_report(result, args.top)
+    problems = check(result, args.budget)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK: no deferred module imported at startup, within budget.")
@@ -0,0 +1,210 @@
+import argparse
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, List
+
+# Seeded generator of synthetic workout logs in the formats v1_parser handles:
+# date/program headers, sections, numbered/bulleted exercise names, S<n>: sets
+# (kg x reps, kg x sec, sec only, reps only, free text), notes in brackets and
+# lines that only the ML classifier can label. Output is streamed line by line,
+# so file size is only bounded by disk.
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+
+START_DATE = date(2000, 1, 3)
+# dates wrap around after this many days, so multi-GB outputs stay within valid years
+# (later passes repeat the calendar and add more sets to the same days)
+DATE_SPAN_DAYS = 25 * 365
+
+# (name variants as written in logs, starting weight in kg; 0 = bodyweight / timed)
+EXERCISES = [
+    (["Barbell Bench Press", "bench press", "Barbell bench press"], 60.0),
+    (["Barbell Back Squats", "Barbell squats", "barbell back squats"], 80.0),
+    (["Deadlift", "deadlifts", "Conventional Deadlift"], 100.0),
+    (["Overhead Press", "Standing overhead press", "Barbell Overhead Press"], 40.0),
+    (["Barbell Rows", "Barbell Bent-Over Rows"], 50.0),
+    (["Lat pulldown", "Lat Pulldowns", "Wide grip lat pulldown"], 50.0),
+    (["Incline DB Press", "Incline db press"], 22.5),
+    (["Seated Cable Rows", "seated cable row", "Seated row"], 45.0),
+    (["Cable Lateral Raises", "DB lateral raises"], 7.5),
+    (["Triceps pushdown", "Cable Pushdowns"], 20.0),
+    (["Hammer curls", "DB Hammer Curls"], 12.5),
+    (["EZ bar curls", "Barbell Curls"], 25.0),
+    (["Barbell RDL", "DB RDL"], 60.0),
+    (["Bulgarian Split Squats"], 16.0),
+    (["Leg Press", "Leg press machine"], 120.0),
+    (["Face pulls"], 15.0),
+    (["Shrugs", "DB Shrugs"], 30.0),
+    (["Plank", "Side plank"], 0.0),
+    (["Hanging leg raises"], 0.0),
+    (["Pull ups", "Weighted pull ups"], 0.0),
+]
+
+PROGRAMS = ["Push Day A", "Push Day B", "Pull Day", "Legs", "Upper Body", "Lower Body", "Full Body"]
+DATE_FORMATS = ["%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y"]
+SECTIONS = ["Main Lifts", "Accessories:", "Finisher", "---"]
+WARMUPS = ["- Arm circles", "- Leg swings", "- Band pull-aparts", "- Cat-cow stretch"]
+SET_NOTES = ["felt heavy", "belt", "easy", "paused", "slow eccentric", "form breakdown on last rep"]
+REP_RANGES = ["6-8", "8-10", "10-12", "12-15"]
+
+# lines that fall through the regex cascade to the classifier
+ML_LINES = [
+    "{w}kg x {r}",
+    "{w} x {r}",
+    "random stuff 123 ???",
+    "felt good today!",
+    "slept 5h, low energy...",
+    "gym was packed, had to swap machines.",
+    "total: {v} kg",
+]
+
+
+def _round_weight(weight: float) -> str:
+    weight = round(weight / 2.5) * 2.5
+    return str(int(weight)) if weight == int(weight) else f"{weight:g}"
+
+
+def _exercise_line(rng: random.Random, name: str) -> str:
+    # numbered and bulleted names are what the regexes pick up as exercises; a bare
+    # name is read as a section header and a "[drop set]" suffix goes to the classifier
+    style = rng.random()
+    if style < 0.45:
+        return f"{rng.randint(1, 6)}. {name} ({rng.choice(REP_RANGES)} reps)"
+    if style < 0.75:
+        return f"- {name}"
+    if style < 0.85:
+        return name
+    if style < 0.90:
+        return f"• {name} [drop set]"
+    return f"{name} {rng.choice(REP_RANGES)}"
+
+
+def _set_line(rng: random.Random, set_no: int, weight: float) -> str:
+    kind = rng.random()
+    if weight <= 0:
+        if kind < 0.5:
+            return f"S{set_no}: {rng.choice([30, 45, 60, 90])} sec"
+        return f"S{set_no}: {rng.randint(5, 20)} reps"
+
+    w = _round_weight(weight * rng.uniform(0.9, 1.05))
+    reps = rng.randint(3, 15)
+    if kind < 0.60:
+        unit = rng.choice(["kg", "kg", " kg", "kgs", ""])
+        times = rng.choice(["x", "x", "X", "×", "*"])
+        line = f"S{set_no}: {w}{unit} {times} {reps} reps"
+    elif kind < 0.70:
+        line = f"S{set_no}: {w}kg x {reps}+{rng.randint(1, 3)} reps"
+    elif kind < 0.78:
+        line = f"S{set_no}: {w}kg x {rng.choice([20, 30, 40])} sec"
+    elif kind < 0.88:
+        line = f"S{set_no}: {reps}-{reps + 2} reps"
+    elif kind < 0.94:
+        line = f"S{set_no}: failed at {reps}"
+    else:
+        line = f"S{set_no}: {rng.choice(SET_NOTES)}"
+    if rng.random() < 0.15:
+        line += f" ({rng.choice(SET_NOTES)})"
+    return line
+
+
+def iter_log_lines(rng: random.Random, first_day: int = 0) -> Iterator[str]:
+    # endless stream of workout days starting first_day days after START_DATE
+    day = first_day
+    while True:
+        day_in_span = day % DATE_SPAN_DAYS
+        dt = START_DATE + timedelta(days=day_in_span)
+        progress = 1.0 + 0.0002 * day_in_span  # slow linear progression
+        yield f"{dt.strftime(rng.choice(DATE_FORMATS))} {rng.choice(PROGRAMS)}"
+
+        if rng.random() < 0.5:
+            yield "Warm-up:"
+            yield from rng.sample(WARMUPS, 2)
+            yield f"S1: {rng.randint(10, 20)} reps"
+        if rng.random() < 0.05:
+            yield "# copied from phone notes"
+
+        for section in rng.sample(SECTIONS, rng.randint(1, 2)):
+            yield section
+            for names, base in rng.sample(EXERCISES, rng.randint(2, 4)):
+                yield _exercise_line(rng, rng.choice(names))
+                weight = base * progress
+                for set_no in range(1, rng.randint(2, 6)):
+                    yield _set_line(rng, set_no, weight)
+                    if rng.random() < 0.08:
+                        template = rng.choice(ML_LINES)
+                        yield template.format(w=_round_weight(weight), r=rng.randint(5, 12),
+                                              v=int(weight * 30))
+                if rng.random() < 0.05:
+                    yield f"({rng.randint(8, 15)} reps)"
+        yield ""
+        day += rng.randint(1, 3)
+
+
+def generate_log(n_bytes: int, seed: int = 0, first_day: int = 0) -> str:
+    # one log of roughly n_bytes (UTF-8), ending on a line boundary
+    rng = random.Random(seed)
+    out = []
+    size = 0
+    for line in iter_log_lines(rng, first_day):
+        out.append(line)
+        size += len(line.encode("utf-8")) + 1
+        if size >= n_bytes:
+            break
+    return "\n".join(out) + "\n"
+
+
+def write_logs(out_dir, total_bytes: int, n_files: int = 1, seed: int = 0) -> List[Path]:
+    # writes n_files logs of total_bytes / n_files each; files continue each other's
+    # dates, so the set is a single history split into files
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    lines = iter_log_lines(rng)
+    per_file = max(total_bytes // n_files, 1)
+
+    paths = []
+    for i in range(n_files):
+        path = out_dir / f"synthetic_{seed}_{i:04d}.txt"
+        size = 0
+        buf = []
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            while size < per_file:
+                line = next(lines)
+                buf.append(line)
+                size += len(line.encode("utf-8")) + 1
+                if len(buf) >= 10_000:
+                    f.write("\n".join(buf) + "\n")
+                    buf = []
+            # finish the current day so no workout is split across files
+            for line in lines:
+                if not line:
+                    break
+                buf.append(line)
+            if buf:
+                f.write("\n".join(buf) + "\n")
+        paths.append(path)
+    return paths
+
+
+def parse_size(text: str) -> int:
+    # "512KB", "10MB", "2GB" or plain bytes
+    text = text.strip().upper()
+    for suffix, factor in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024), ("B", 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate synthetic workout logs.")
+    ap.add_argument("--out", default=str(PROJECT_ROOT / "data_synthetic"), help="output directory")
+    ap.add_argument("--size", default="10MB", help="total size, e.g. 512KB, 10MB, 2GB")
+    ap.add_argument("--files", type=int, default=1, help="number of files to split the output into")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    paths = write_logs(args.out, parse_size(args.size), args.files, args.seed)
+    total = sum(p.stat().st_size for p in paths)
+    print(f"Wrote {len(paths)} file(s), {total / 1024 ** 2:.1f} MB to {args.out}")
@@ -0,0 +1,133 @@
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from src.ml.fast_model import FastLineClassifier, FAST_MODEL_PATH
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+MODEL_PATH = PROJECT_ROOT / "models" / "line_clf.joblib"
+LABEL_DATA_PATH = PROJECT_ROOT / "data_labels" / "lines_for_trainning.csv"
+
+# Lines always checked against the sklearn pipeline on export, on top of the labeled data
+CHECK_LINES = [
+    "12/11/2025 Push Day",
+    "Barbell Bench Press",
+    "S1: 60kg x 8 reps",
+    "50kg x 8",
+    "felt good today, slight elbow pain",
+    "Warm-up:",
+    "---",
+    "",
+]
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+# Compile
+
+def compile_pipeline(pipe) -> dict:
+
+    feats = pipe.named_steps["feats"]
+    calibrated = pipe.named_steps["clf"]
+
+    if feats.transformer_weights:
+        raise ValueError("FeatureUnion transformer_weights are not supported.")
+
+    # merged vocabulary: each block keeps its own term -> column map, offset into one feature space
+    blocks = []
+    offset = 0
+    for name, vect in feats.transformer_list:
+        if vect.analyzer not in ("char_wb", "word"):
+            raise ValueError(f"Unsupported analyzer for {name}: {vect.analyzer}")
+        if vect.norm != "l2" or not vect.use_idf or vect.sublinear_tf or vect.binary or vect.strip_accents:
+            raise ValueError(f"Unsupported TF-IDF settings for {name}.")
+        blocks.append({
+            "name": name,
+            "analyzer": vect.analyzer,
+            "lowercase": vect.lowercase,
+            "ngram_range": tuple(vect.ngram_range),
+            "token_pattern": vect.token_pattern,
+            "offset": offset,
+            "vocabulary": {term: int(j) + offset for term, j in vect.vocabulary_.items()},
+            "idf": np.asarray(vect.idf_, dtype=np.float64),
+        })
+        offset += len(vect.vocabulary_)
+
+    # one weight matrix / calibration table covering every calibrated fold
+    classes = np.asarray(calibrated.classes_)
+    coefs, intercepts = [], []
+    cal_x, cal_y, cal_offsets = [], [], [0]
+    for fold in calibrated.calibrated_classifiers_:
+        est = fold.estimator
+        if list(est.classes_) != list(classes) or len(fold.calibrators) != len(classes):
+            raise ValueError("Every fold must see every class to be compiled.")
+        if getattr(fold, "method", "isotonic") != "isotonic":
+            raise ValueError("Only isotonic calibration is supported.")
+        coefs.append(est.coef_)
+        intercepts.append(est.intercept_)
+        for calibrator in fold.calibrators:
+            cal_x.append(np.asarray(calibrator.X_thresholds_, dtype=np.float64))
+            cal_y.append(np.asarray(calibrator.y_thresholds_, dtype=np.float64))
+            cal_offsets.append(cal_offsets[-1] + len(cal_x[-1]))
+
+    return {
+        "classes": classes,
+        "n_folds": len(calibrated.calibrated_classifiers_),
+        "blocks": blocks,
+        "weights": np.ascontiguousarray(np.vstack(coefs).T, dtype=np.float64),
+        "intercepts": np.concatenate(intercepts).astype(np.float64),
+        "cal_x": np.concatenate(cal_x),
+        "cal_y": np.concatenate(cal_y),
+        "cal_offsets": np.asarray(cal_offsets, dtype=np.int64),
+    }
+
+
+# Verify
+
+def verify_compiled(pipe, fast, lines, atol=1e-9):
+
+    lines = list(lines)
+    expected = pipe.predict_proba(lines)
+    got = fast.predict_proba(lines)
+    max_diff = float(np.max(np.abs(expected - got))) if len(lines) else 0.0
+    same_labels = np.array_equal(pipe.predict(lines), fast.predict(lines))
+    if max_diff > atol or not same_labels:
+        raise AssertionError(
+            f"Compiled model does not match pipeline (max proba diff {max_diff:.3g}, "
+            f"labels match: {same_labels})."
+        )
+    return max_diff
+
+
+# Export
+
+def export_inference_model(pipe=None, model_path=MODEL_PATH, out_path=FAST_MODEL_PATH, check_lines=None):
+
+    if pipe is None:
+        pipe = joblib.load(model_path)
+
+    artifact = compile_pipeline(pipe)
+    artifact["source_sha256"] = file_sha256(model_path) if Path(model_path).exists() else None
+
+    lines = list(CHECK_LINES)
+    if check_lines is not None:
+        lines.extend(check_lines)
+    elif LABEL_DATA_PATH.exists():
+        lines.extend(pd.read_csv(LABEL_DATA_PATH).iloc[:, 0].dropna().astype(str).tolist())
+
+    max_diff = verify_compiled(pipe, FastLineClassifier(artifact), lines)
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(artifact, str(out_path))
+    print(f"Compiled model verified on {len(lines)} lines (max proba diff {max_diff:.2e}), saved to: {out_path}")
+    return out_path
+
+
+if __name__ == "__main__":
+    export_inference_model()
@@ -0,0 +1,146 @@
+import re
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+# Pure NumPy/SciPy scorer for the compiled line classifier (see compile_model.py).
+# It reproduces Pipeline(FeatureUnion(char/word TF-IDF), CalibratedClassifierCV(
+# LogisticRegression, isotonic)) without importing sklearn: one merged vocabulary,
+# one weight matrix holding every fold's logistic model and one flat table of
+# isotonic calibration points.
+#
+# joblib and scipy are imported where they are used: the parse cache imports this
+# module for the model paths, and that should not load them.
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+MODEL_PATH = PROJECT_ROOT / "models" / "line_clf.joblib"
+FAST_MODEL_PATH = PROJECT_ROOT / "models" / "line_clf_fast.joblib"
+
+
+def _char_wb_ngrams(text, min_n, max_n):
+    # same tokenisation as TfidfVectorizer(analyzer="char_wb")
+    ngrams = []
+    ngrams_append = ngrams.append
+    for w in text.split():
+        w = " " + w + " "
+        w_len = len(w)
+        for n in range(min_n, max_n + 1):
+            offset = 0
+            ngrams_append(w[offset:offset + n])
+            while offset + n < w_len:
+                offset += 1
+                ngrams_append(w[offset:offset + n])
+            if offset == 0:  # short word counted only once
+                break
+    return ngrams
+
+
+def _word_ngrams(tokens, min_n, max_n):
+    # same n-gram expansion as TfidfVectorizer(analyzer="word")
+    out = list(tokens) if min_n == 1 else []
+    start = max(min_n, 2)
+    n_tokens = len(tokens)
+    for n in range(start, min(max_n + 1, n_tokens + 1)):
+        for i in range(n_tokens - n + 1):
+            out.append(" ".join(tokens[i:i + n]))
+    return out
+
+
+class FastLineClassifier:
+
+    def __init__(self, artifact):
+        self.classes_ = np.asarray(artifact["classes"])
+        self.n_folds = artifact["n_folds"]
+        self.blocks = []
+        for block in artifact["blocks"]:
+            block = dict(block)
+            if block["analyzer"] == "word":
+                block["token_re"] = re.compile(block["token_pattern"])
+            self.blocks.append(block)
+        self.weights = artifact["weights"]
+        self.intercepts = artifact["intercepts"]
+        self.cal_x = artifact["cal_x"]
+        self.cal_y = artifact["cal_y"]
+        self.cal_offsets = artifact["cal_offsets"]
+        self.n_features = self.weights.shape[0]
+
+    def _analyze(self, block, text):
+        if block["lowercase"]:
+            text = text.lower()
+        lo, hi = block["ngram_range"]
+        if block["analyzer"] == "char_wb":
+            return _char_wb_ngrams(text, lo, hi)
+        return _word_ngrams(block["token_re"].findall(text), lo, hi)
+
+    def transform(self, lines):
+        # TF-IDF features for all blocks, l2-normalised per block, as one CSR matrix
+        indptr = [0]
+        indices = []
+        data = []
+        for line in lines:
+            for block in self.blocks:
+                vocab = block["vocabulary"]
+                counts = {}
+                for term in self._analyze(block, line):
+                    j = vocab.get(term)
+                    if j is not None:
+                        counts[j] = counts.get(j, 0) + 1
+                if not counts:
+                    continue
+                cols = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                vals = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+                vals *= block["idf"][cols - block["offset"]]
+                norm = np.sqrt(np.dot(vals, vals))
+                if norm > 0:
+                    vals /= norm
+                indices.extend(cols.tolist())
+                data.extend(vals.tolist())
+            indptr.append(len(indices))
+        from scipy import sparse
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(lines), self.n_features),
+        )
+
+    def predict_proba(self, lines):
+        X = self.transform(lines)
+        scores = np.asarray(X @ self.weights) + self.intercepts
+
+        n_classes = len(self.classes_)
+        proba = np.zeros((len(lines), n_classes))
+        for fold in range(self.n_folds):
+            fold_proba = np.empty((len(lines), n_classes))
+            for k in range(n_classes):
+                col = fold * n_classes + k
+                lo, hi = self.cal_offsets[col], self.cal_offsets[col + 1]
+                # np.interp clamps outside the fitted range like isotonic out_of_bounds="clip"
+                fold_proba[:, k] = np.interp(scores[:, col], self.cal_x[lo:hi], self.cal_y[lo:hi])
+            denominator = fold_proba.sum(axis=1)[:, np.newaxis]
+            uniform = np.full_like(fold_proba, 1.0 / n_classes)
+            fold_proba = np.divide(fold_proba, denominator, out=uniform, where=denominator != 0)
+            fold_proba[(1.0 < fold_proba) & (fold_proba <= 1.0 + 1e-5)] = 1.0
+            proba += fold_proba
+        return proba / self.n_folds
+
+    def predict(self, lines):
+        return self.classes_[np.argmax(self.predict_proba(lines), axis=1)]
+
+
+def load_fast_model(path=FAST_MODEL_PATH):
+    import joblib
+    return FastLineClassifier(joblib.load(path))
+
+
+def load_line_classifier(model_path=MODEL_PATH, fast_path=FAST_MODEL_PATH):
+    # compiled model when it was exported from the current pipeline, else the sklearn pipeline
+    import joblib
+    model_path, fast_path = Path(model_path), Path(fast_path)
+    if fast_path.exists():
+        artifact = joblib.load(fast_path)
+        source = artifact.get("source_sha256")
+        if not model_path.exists() or source == hashlib.sha256(model_path.read_bytes()).hexdigest():
+            return FastLineClassifier(artifact)
+        print(f"Compiled model {fast_path} is stale, using {model_path}")
+    return joblib.load(model_path)
@@ -1,7 +1,7 @@
 import pandas as pd
 from pathlib import Path
 
-PROJECT_ROOT = Path(r"C:\Users\aakas\Documents\workout_project")
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 old = pd.read_csv(PROJECT_ROOT / "data_labels" / "lines_for_trainning.csv")
 new = pd.read_csv(PROJECT_ROOT / "data_labels" / "to_review.csv")
 
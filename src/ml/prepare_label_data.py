@@ -5,7 +5,7 @@ import pandas as pd
 from typing import List
 
 # Define paths
-PROJECT_ROOT = r"C:\Users\aakas\Documents\workout_project"
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(PROJECT_ROOT)
 RAW_DATA_PATH = os.path.join(PROJECT_ROOT, 'data_raw', '*.txt')
 OUTPUT_PATH = os.path.join(PROJECT_ROOT, 'data_labels', 'lines_for_manual_labeling.csv')
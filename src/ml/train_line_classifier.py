@@ -16,12 +16,16 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import classification_report, confusion_matrix, f1_score, precision_recall_fscore_support
 
+from src.ml.compile_model import export_inference_model
+from src.ml.fast_model import load_line_classifier
+
 warnings.filterwarnings("ignore")
 CURRENT_DIR = Path(__file__).resolve().parent
-PROJECT_ROOT_PATH = CURRENT_DIR.parent.parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
 LABEL_DATA_PATH = PROJECT_ROOT/ "data_labels" / "lines_for_trainning.csv"
 MODELS_DIR = PROJECT_ROOT/ "models"
 MODEL_PATH = MODELS_DIR / "line_clf.joblib"
+FAST_MODEL_PATH = MODELS_DIR / "line_clf_fast.joblib"
 CM_PNG = MODELS_DIR/ "confusion_matrix.png"
 
 
@@ -127,6 +131,10 @@ def train_and_evaluate(label_csv=LABEL_DATA_PATH, model_out=MODEL_PATH, cm_out=C
     joblib.dump(best_pipe, str(model_out)) 
     print(f"Successfully saved model to: {model_out}")
 
+    # Compile the fast inference model (verified against best_pipe on the test lines)
+    export_inference_model(best_pipe, model_path=model_out, out_path=model_out.parent / FAST_MODEL_PATH.name,
+                           check_lines=list(x_test))
+
 
     # Save detailed per-class mertrics to CSV
     p, r, f1, support = precision_recall_fscore_support(y_test, y_pred, labels=labels, zero_division=0)
@@ -151,9 +159,9 @@ def predict_lines(lines, model_path=MODEL_PATH, threshold=0.6):
 
     if not model_path.exists():
         raise FileNotFoundError("Model not found.")
-    pipe = joblib.load(model_path)
-    preds = pipe.predict(lines)
+    pipe = load_line_classifier(model_path, model_path.parent / FAST_MODEL_PATH.name)
     probs = pipe.predict_proba(lines)
+    preds = pipe.classes_[probs.argmax(axis=1)]
     out = []
     for line, lab, prob_vec in zip(lines, preds, probs):
         maxp = prob_vec.max()
@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.parsers.v1_parser import parse_log_content, classify_line_shape, line_shape
+from src.parsers.normalize import normalize_exercise, queue_review
+from src.parsers.hybrid_parse_all import get_classifier, save_review_fn, CONF_THRESHOLD
+from src.parsers import db, search
+from src.parsers.dedupe import DedupeIndex, load_index, print_overlaps
+from src.parsers.watch import open_db, refresh_daily
+from src.pipeline import RAW_COLUMNS, pipeline_paths, list_logs, source_name, athlete_for, PROJECT_ROOT
+
+# Pipelined ingest: read -> scan -> classify -> parse -> sink, connected by bounded
+# asyncio queues, so file I/O, regex work and model inference overlap across files.
+#
+#   read      file text (threads)
+#   scan      finds the lines the regexes can't label (process pool)
+#   classify  one predict_proba call for the pending lines of several files (thread)
+#   parse     parse_log_content with the precomputed labels + normalization (process pool)
+#   sink      appends to the raw-sets CSV and/or sets_raw, writes review lines (one thread)
+#
+# A full queue blocks its producer (backpressure); the sampled queue fill shows which
+# stage is the bottleneck: the consumer of the fullest queue. The sink holds finished
+# files back until every earlier one is written, so files are written in input order
+# and rows and duplicate ownership match the sequential hybrid parse. A file that fails
+# in any stage is reported and skipped; the others are still ingested.
+
+QUEUE_SIZE = 8
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+CLASSIFY_BATCH_LINES = 4096
+SAMPLE_SECONDS = 0.02
+
+_DONE = object()
+
+
+def scan_ml_lines(text: str) -> List[str]:
+    # unique lines that parse_log_content would hand to the classifier (same line
+    # filtering and stripping as the parser)
+    pending = {}
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if classify_line_shape(line_shape(line))[0] == "OTHER":
+            pending[line] = None
+    return list(pending)
+
+
+def parse_with_labels(text: str, source_file: str, labels: Dict[str, tuple],
+                      conf_threshold: float = CONF_THRESHOLD):
+    # -> (raw sets frame, low-confidence review rows, exercise names to review); runs in a
+    # worker process, so the sink writes both review files
+    reviews, exercise_reviews = [], []
+    rows = parse_log_content(text, source_file=source_file, ml_label_fn=labels.__getitem__,
+                             save_review_fn=lambda *args: reviews.append(args),
+                             conf_threshold=conf_threshold)
+    athlete = athlete_for(source_file)
+    for r in rows:
+        if r.get("exercise"):
+            r["exercise"] = normalize_exercise(r["exercise"], review_fn=lambda *args: exercise_reviews.append(args))
+        r["_source_file"] = source_file
+        r["athlete"] = athlete
+    return pd.DataFrame(rows, columns=RAW_COLUMNS), reviews, exercise_reviews
+
+
+def classify_lines(lines: List[str]) -> Dict[str, tuple]:
+    if not lines:
+        return {}
+    clf = get_classifier()
+    probs = clf.predict_proba(lines)
+    best = probs.argmax(axis=1)
+    return {line: (str(clf.classes_[b]), float(p[b])) for line, b, p in zip(lines, best, probs)}
+
+
+class RawSetsSink:
+    # writes parsed files as they arrive; all calls come from one thread
+
+    def __init__(self, csv_path: Optional[Path] = None, db_path: Optional[Path] = None):
+        self.csv_path = csv_path
+        self.db_path = db_path
+        self.conn = None
+        self.wrote_header = False
+        self.touched = []
+        self.index = DedupeIndex()  # the DB's saved index when writing to the DB
+
+    def write(self, item: Dict) -> None:
+        if self.db_path is not None and self.conn is None:
+            self.conn = open_db(self.db_path)
+            self.index = load_index(self.conn)
+        df = item["df"]
+        if self.conn is None:
+            df = self.index.claim_frame(df, item["file"])
+        else:
+            try:
+                with self.conn:
+                    self.touched.append(db.delete_source_sets(self.conn, item["file"]))
+                    self.index.forget(item["file"], self.conn)
+                    df = self.index.claim_frame(df, item["file"], self.conn)
+                    db.insert_frame(self.conn, "sets_raw", df)
+                    search.index_sets(self.conn, df)
+                    search.index_lines(self.conn, item["reviews"])
+            except Exception:
+                self.index.reload(self.conn)  # its claims were rolled back with the transaction
+                raise
+            self.touched.append(df[db.GROUP_COLUMNS])
+        if self.csv_path is not None:
+            if not self.wrote_header:
+                self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_csv(self.csv_path, mode="a" if self.wrote_header else "w",
+                      header=not self.wrote_header, index=False)
+            self.wrote_header = True
+        for review in item["reviews"]:
+            save_review_fn(*review)
+        for review in item["exercise_reviews"]:
+            queue_review(*review)
+
+    def close(self) -> None:
+        # daily summary rows for every group written above, in one pass at the end
+        if self.index.dropped:
+            print_overlaps(self.index)
+        if self.conn is None:
+            return
+        orphaned = self.index.orphaned_sources()
+        if orphaned:
+            # an owner written after a file that dropped its duplicates can have shrunk since the last run
+            print(f"Sets dropped as duplicates of a changed file; run again to restore them: {sorted(orphaned)}")
+        if self.touched:
+            with self.conn:
+                refresh_daily(self.conn, pd.concat(self.touched, ignore_index=True).drop_duplicates())
+        self.conn.close()
+
+
+class StageMetrics:
+
+    def __init__(self, names: List[str]):
+        self.items = {n: 0 for n in names}
+        self.busy = {n: 0.0 for n in names}
+        self.fill = {n: [] for n in names}  # sampled fill ratio of each stage's input queue
+        self.files = 0
+        self.lines = 0
+        self.wall = 0.0
+        self.failed: List[tuple] = []  # (file, stage, error) of the files left out
+
+    def report(self) -> str:
+        rate = f" ({self.lines / self.wall:,.0f} lines/s)" if self.wall else ""
+        out = [f"{self.files} file(s), {self.lines} lines in {self.wall:.2f}s{rate}"]
+        out.append(f"  {'stage':<9} {'items':>6} {'busy s':>8} {'queue avg':>10} {'queue max':>10}")
+        for name in self.items:
+            samples = self.fill[name] or [0.0]
+            out.append(f"  {name:<9} {self.items[name]:>6} {self.busy[name]:>8.2f} "
+                       f"{sum(samples) / len(samples):>9.0%} {max(samples):>10.0%}")
+        fullest = max(self.fill, key=lambda n: sum(self.fill[n]) / max(len(self.fill[n]), 1))
+        out.append(f"Bottleneck (fullest input queue): {fullest}")
+        if self.failed:
+            out.append(f"{len(self.failed)} file(s) failed and were not ingested:")
+            out.extend(f"  {file} ({stage}): {error}" for file, stage, error in self.failed)
+        return "\n".join(out)
+
+
+async def ingest(raw_dir: Path, paths: List[Path], sink: RawSetsSink, read_workers: int = 2, scan_workers: int = 1,
+                 parse_workers: int = PARSE_WORKERS, queue_size: int = QUEUE_SIZE,
+                 batch_lines: int = CLASSIFY_BATCH_LINES,
+                 conf_threshold: float = CONF_THRESHOLD) -> StageMetrics:
+    loop = asyncio.get_running_loop()
+    names = ["read", "scan", "classify", "parse", "sink"]
+    queues = {n: asyncio.Queue(maxsize=queue_size) for n in names}  # input queue of each stage
+    metrics = StageMetrics(names)
+
+    io_pool = ThreadPoolExecutor(max_workers=read_workers)
+    model_pool = ThreadPoolExecutor(max_workers=1)
+    sink_pool = ThreadPoolExecutor(max_workers=1)
+    cpu_pool = ProcessPoolExecutor(max_workers=max(scan_workers, parse_workers))
+
+    def failed(item, stage, e):
+        # a file that failed travels on as just its error, so the sink can report it in order
+        return {"index": item["index"], "file": item["file"], "error": (stage, f"{type(e).__name__}: {e}")}
+
+    async def run_workers(name, n_workers, handle, next_name, n_next):
+        async def worker():
+            while True:
+                item = await queues[name].get()
+                if item is _DONE:
+                    return
+                if "error" not in item:
+                    start = time.perf_counter()
+                    try:
+                        item = await handle(item)
+                    except Exception as e:
+                        item = failed(item, name, e)
+                    metrics.busy[name] += time.perf_counter() - start
+                    metrics.items[name] += 1
+                await queues[next_name].put(item)
+        await asyncio.gather(*(worker() for _ in range(n_workers)))
+        for _ in range(n_next):
+            await queues[next_name].put(_DONE)
+
+    async def read(item):
+        item["text"] = await loop.run_in_executor(io_pool, Path(item.pop("path")).read_text, "utf-8")
+        return item
+
+    async def scan(item):
+        item["ml_lines"] = await loop.run_in_executor(cpu_pool, scan_ml_lines, item["text"])
+        return item
+
+    async def classify_batches():
+        # gathers whatever is queued (up to batch_lines) into one model call
+        done = False
+        while not done:
+            batch, n_lines = [], 0
+            while not batch or (n_lines < batch_lines and not queues["classify"].empty()):
+                item = await queues["classify"].get()
+                if item is _DONE:
+                    done = True
+                    break
+                if "error" in item:
+                    await queues["parse"].put(item)
+                    continue
+                batch.append(item)
+                n_lines += len(item["ml_lines"])
+            if not batch:
+                break
+            start = time.perf_counter()
+            lines = list(dict.fromkeys(line for item in batch for line in item["ml_lines"]))
+            try:
+                labels, error = await loop.run_in_executor(model_pool, classify_lines, lines), None
+            except Exception as e:
+                labels, error = None, e
+            metrics.busy["classify"] += time.perf_counter() - start
+            for item in batch:
+                if error is None:
+                    item["labels"] = {line: labels[line] for line in item.pop("ml_lines")}
+                else:
+                    item = failed(item, "classify", error)
+                metrics.items["classify"] += 1
+                await queues["parse"].put(item)
+        for _ in range(parse_workers):
+            await queues["parse"].put(_DONE)
+
+    async def parse(item):
+        df, reviews, exercise_reviews = await loop.run_in_executor(cpu_pool, parse_with_labels, item["text"],
+                                                                   item["file"], item["labels"], conf_threshold)
+        return {"index": item["index"], "file": item["file"], "df": df, "reviews": reviews,
+                "exercise_reviews": exercise_reviews, "lines": len(item["text"].splitlines())}
+
+    async def write_in_order():
+        # finished files wait here until every earlier file is written (or has failed)
+        pending, next_index = {}, 0
+        while True:
+            item = await queues["sink"].get()
+            if item is _DONE:
+                return
+            pending[item["index"]] = item
+            while next_index in pending:
+                item = pending.pop(next_index)
+                next_index += 1
+                if "error" in item:
+                    metrics.failed.append((item["file"], *item["error"]))
+                    continue
+                start = time.perf_counter()
+                try:
+                    await loop.run_in_executor(sink_pool, sink.write, item)
+                except Exception as e:
+                    metrics.failed.append((item["file"], "sink", f"{type(e).__name__}: {e}"))
+                else:
+                    metrics.files += 1
+                    metrics.lines += item["lines"]
+                metrics.busy["sink"] += time.perf_counter() - start
+                metrics.items["sink"] += 1
+
+    async def feed():
+        for i, p in enumerate(paths):
+            await queues["read"].put({"index": i, "file": source_name(p, raw_dir), "path": p})
+        for _ in range(read_workers):
+            await queues["read"].put(_DONE)
+
+    async def sample():
+        while True:
+            for n, q in queues.items():
+                metrics.fill[n].append(q.qsize() / queue_size)
+            await asyncio.sleep(SAMPLE_SECONDS)
+
+    sampler = asyncio.create_task(sample())
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            feed(),
+            run_workers("read", read_workers, read, "scan", scan_workers),
+            run_workers("scan", scan_workers, scan, "classify", 1),
+            classify_batches(),
+            run_workers("parse", parse_workers, parse, "sink", 1),
+            write_in_order(),
+        )
+        await loop.run_in_executor(sink_pool, sink.close)
+    finally:
+        sampler.cancel()
+        for pool in (io_pool, model_pool, sink_pool, cpu_pool):
+            pool.shutdown(wait=True, cancel_futures=True)
+    metrics.wall = time.perf_counter() - start
+    return metrics
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pipelined ingest of data_raw/ with bounded queues.")
+    ap.add_argument("--data-root", default=str(PROJECT_ROOT))
+    ap.add_argument("--raw-dir")
+    ap.add_argument("--out-dir")
+    ap.add_argument("--sink", choices=["csv", "db", "both"], default="csv")
+    ap.add_argument("--read-workers", type=int, default=2)
+    ap.add_argument("--scan-workers", type=int, default=1)
+    ap.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    ap.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    ap.add_argument("--batch-lines", type=int, default=CLASSIFY_BATCH_LINES,
+                    help="max pending lines per classifier call")
+    ap.add_argument("--conf-threshold", type=float, default=CONF_THRESHOLD)
+    args = ap.parse_args()
+
+    paths = pipeline_paths(args.data_root, args.raw_dir, args.out_dir)
+    files = list_logs(paths["raw_dir"])
+    sink = RawSetsSink(csv_path=paths["raw_sets"] if args.sink in ("csv", "both") else None,
+                       db_path=paths["db"] if args.sink in ("db", "both") else None)
+    metrics = asyncio.run(ingest(paths["raw_dir"], files, sink, args.read_workers, args.scan_workers, args.parse_workers,
+                                 args.queue_size, args.batch_lines, args.conf_threshold))
+    print(metrics.report())
@@ -0,0 +1,99 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from src.parsers.hybrid_parse_all import parse_text, save_review_fn, CONF_THRESHOLD
+from src.parsers.instrument import ParseStats
+from src.parsers.parse_cache import parse_cache_key, load_cached_parse, store_cached_parse
+from src.parsers.dedupe import DedupeIndex
+
+# Batch parsing of many logs: disk-cache lookup in the caller, cache misses parsed
+# in a process pool. Results are yielded as files finish (for progress reporting)
+# and carry their original index so callers can merge them in upload order. Workers
+# return their low-confidence lines and the parent writes them to the review file, so
+# processes never append to it concurrently.
+
+
+def parse_file_cached(text: str, source_file: str, conf_threshold: float = CONF_THRESHOLD,
+                      stats: Optional[ParseStats] = None, reviews: Optional[List] = None) -> pd.DataFrame:
+    # with reviews, a parse's low-confidence lines go there instead of to the review file
+    key = parse_cache_key(text)
+    cached = load_cached_parse(key)
+    if cached is not None:
+        return cached
+    df = pd.DataFrame(parse_text(text, source_file, conf_threshold, stats=stats,
+                                 reviews=reviews, save_reviews=reviews is None))
+    store_cached_parse(key, df)
+    return df
+
+
+def _parse_job(index: int, text: str, source_file: str, conf_threshold: float,
+               collect_stats: bool = False) -> Dict:
+    # stats are collected per job and returned, so they also work across processes
+    stats = ParseStats() if collect_stats else None
+    start = time.perf_counter()
+    reviews = []
+    df = parse_file_cached(text, source_file, conf_threshold, stats=stats, reviews=reviews)
+    return {"index": index, "df": df, "seconds": time.perf_counter() - start, "stats": stats,
+            "reviews": reviews}
+
+
+def _save_reviews(result: Dict) -> Dict:
+    # in the parent: the job's low-confidence lines go to the review file
+    for review in result.pop("reviews"):
+        save_review_fn(*review)
+    return result
+
+
+def iter_parse_files(texts: List[str], names: List[str], conf_threshold: float = CONF_THRESHOLD,
+                     executor: Optional[ProcessPoolExecutor] = None,
+                     collect_stats: bool = False) -> Iterator[Dict]:
+    # yields {"index", "file", "df", "seconds", "cached", "error", "stats"} per file, in completion
+    # order; "stats" is a ParseStats for parsed files when collect_stats is set, else None.
+    # With executor=None everything runs in-process, one file after another.
+    pending = []
+    for i, (text, name) in enumerate(zip(texts, names)):
+        start = time.perf_counter()
+        try:
+            cached = load_cached_parse(parse_cache_key(text))
+        except Exception as e:
+            yield {"index": i, "file": name, "df": None, "seconds": None,
+                   "cached": False, "error": f"{type(e).__name__}: {e}", "stats": None}
+            continue
+        if cached is not None:
+            yield {"index": i, "file": name, "df": cached, "seconds": time.perf_counter() - start,
+                   "cached": True, "error": None, "stats": None}
+        elif executor is None:
+            try:
+                result = _save_reviews(_parse_job(i, text, name, conf_threshold, collect_stats))
+                yield {**result, "file": name, "cached": False, "error": None}
+            except Exception as e:
+                yield {"index": i, "file": name, "df": None, "seconds": time.perf_counter() - start,
+                       "cached": False, "error": f"{type(e).__name__}: {e}", "stats": None}
+        else:
+            pending.append((i, name, text))
+
+    futures = {executor.submit(_parse_job, i, text, name, conf_threshold, collect_stats): (i, name)
+               for i, name, text in pending}
+    for future in as_completed(futures):
+        i, name = futures[future]
+        try:
+            result = _save_reviews(future.result())
+            yield {**result, "file": name, "cached": False, "error": None}
+        except Exception as e:
+            yield {"index": i, "file": name, "df": None, "seconds": None,
+                   "cached": False, "error": f"{type(e).__name__}: {e}", "stats": None}
+
+
+def merge_in_order(results: List[Dict], index: Optional[DedupeIndex] = None) -> pd.DataFrame:
+    # concatenate successful per-file frames in their original order; with an index, sets
+    # an earlier file (or an earlier batch) already had are dropped
+    frames = [r["df"] if index is None else index.claim_frame(r["df"], r["file"])
+              for r in sorted(results, key=lambda r: r["index"])
+              if r["df"] is not None and not r["df"].empty]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
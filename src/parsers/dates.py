@@ -0,0 +1,134 @@
+import argparse
+import re
+from collections import Counter
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from dateutil import parser as dateutil_parser
+
+# Date header normalization. Headers are "<d>/<m>/<y> <program>" with -, _ or / as
+# separators, so a strict pattern plus datetime.date covers them; dateutil is only the
+# fallback for anything the pattern rejects (3-digit years, impossible dates, ...).
+#
+# A log's day/month order is detected from its first headers: a header whose first
+# number is > 12 can only be DMY, one whose second number is > 12 only MDY. Headers
+# where both numbers are <= 12 are ambiguous and follow the file's detected order, or
+# DEFAULT_DATE_ORDER when the first headers don't decide it. Like dateutil, an
+# impossible month in the file's order is read the other way round (13/4/21 in an
+# MDY file is still 13 April). A log parsed in pieces (the watch daemon) keeps the votes
+# of its earlier headers, so the order is decided by the same headers as a full parse.
+#
+#   python -m src.parsers.dates data_raw/     # detected order and ambiguous headers per log
+
+DEFAULT_DATE_ORDER = "DMY"  # dateutil's dayfirst=True, the parser's historical reading
+DATE_ORDERS = ("DMY", "MDY")
+DETECT_HEADERS = 20         # headers looked at per file
+DATE_CACHE_SIZE = 8192
+
+_date_re = re.compile(r"^(\d{1,2})[-_/](\d{1,2})[-_/](\d{4}|\d{2})$")
+# the parser's date_pattern, for headers at the start of a (stripped) line
+_header_re = re.compile(r"^[ \t]*(\d{1,2}[-_/]\d{1,2}[-_/]\d{2,4})[ \t]+\S", re.MULTILINE)
+# two-digit years use dateutil's pivot (within 50 years of the current year)
+_parserinfo = dateutil_parser.parserinfo()
+
+
+def _day_month(first: int, second: int, order: str):
+    day, month = (first, second) if order == "DMY" else (second, first)
+    if month > 12 and day <= 12:
+        day, month = month, day
+    return day, month
+
+
+def _dateutil_date(datestr: str, order: str) -> Optional[str]:
+    try:
+        return dateutil_parser.parse(datestr, dayfirst=order == "DMY").date().isoformat()
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def normalize_date(datestr: str, order: str = DEFAULT_DATE_ORDER) -> Optional[str]:
+    # 'YYYY-MM-DD', or None when the string isn't a date
+    m = _date_re.match(datestr)
+    if m is None:
+        return _dateutil_date(datestr, order)
+    day, month = _day_month(int(m.group(1)), int(m.group(2)), order)
+    year = int(m.group(3))
+    if len(m.group(3)) == 2:
+        year = _parserinfo.convertyear(year)
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return _dateutil_date(datestr, order)
+
+
+def clear_date_cache() -> None:
+    normalize_date.cache_clear()
+
+
+def is_ambiguous(datestr: str) -> bool:
+    # both numbers could be the month, and they differ
+    m = _date_re.match(datestr)
+    if m is None:
+        return False
+    first, second = int(m.group(1)), int(m.group(2))
+    return first != second and 1 <= first <= 12 and 1 <= second <= 12
+
+
+def count_date_votes(text: str, max_headers: int = DETECT_HEADERS, votes: Optional[Dict] = None) -> Dict:
+    # {"DMY", "MDY": unambiguous headers for each order, "headers": headers looked at} over
+    # the first max_headers headers; with votes (of the text before), counting continues
+    votes = dict(votes) if votes else {"DMY": 0, "MDY": 0, "headers": 0}
+    for m in _header_re.finditer(text):
+        if votes["headers"] >= max_headers:
+            break
+        votes["headers"] += 1
+        parts = re.split(r"[-_/]", m.group(1))
+        first, second = int(parts[0]), int(parts[1])
+        if first > 12 and second <= 12:
+            votes["DMY"] += 1
+        elif second > 12 and first <= 12:
+            votes["MDY"] += 1
+    return votes
+
+
+def vote_order(votes: Dict) -> Optional[str]:
+    # majority order, None if undecided
+    if votes["DMY"] == votes["MDY"]:
+        return None
+    return "DMY" if votes["DMY"] > votes["MDY"] else "MDY"
+
+
+def detect_date_order(text: str, max_headers: int = DETECT_HEADERS) -> Optional[str]:
+    # majority order of the unambiguous headers among the first max_headers, None if undecided
+    return vote_order(count_date_votes(text, max_headers))
+
+
+def audit_dates(text: str) -> Dict:
+    # detected order and the ambiguous headers of one log, with how each was read
+    order = detect_date_order(text)
+    ambiguous = Counter(m.group(1) for m in _header_re.finditer(text) if is_ambiguous(m.group(1)))
+    return {
+        "order": order,
+        "basis": "detected" if order else "default",
+        "headers": sum(1 for _ in _header_re.finditer(text)),
+        "ambiguous": {d: normalize_date(d, order or DEFAULT_DATE_ORDER) for d in ambiguous},
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Report each log's date order and ambiguous date headers.")
+    ap.add_argument("paths", nargs="+", help="log files or folders")
+    args = ap.parse_args()
+
+    files = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(p.rglob("*.txt")) if p.is_dir() else [p])
+    for path in files:
+        audit = audit_dates(path.read_text(encoding="utf-8"))
+        order = audit["order"] or f"{DEFAULT_DATE_ORDER} (default)"
+        print(f"{path}: {audit['headers']} headers, order {order}, {len(audit['ambiguous'])} ambiguous")
+        for raw, iso in audit["ambiguous"].items():
+            print(f"  {raw} -> {iso}")
@@ -1,9 +1,13 @@
+import json
 import sqlite3
+import sys
 import pandas as pd
 from pathlib import Path
 
-DATA_PATH = Path(r"C:\Users\aakas\Documents\workout_project\data_processed")
-DB_PATH = DATA_PATH / "Workouts.db"
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+DATA_PATH = PROJECT_ROOT / "data_processed"
+DB_PATH = DATA_PATH / "workouts.db"
 
 def init_db():
     conn = sqlite3.connect(DB_PATH)
@@ -41,12 +45,328 @@ def load_csv_to_db():
     conn = sqlite3.connect(DB_PATH)
 
     raw = pd.read_csv(DATA_PATH / "workouts_raw_sets.csv")
-    raw.to_sql("sets_raw", conn, if_exists="replace", index=False)
-
     daily = pd.read_csv(DATA_PATH / "workouts_daily_exercise.csv")
+    load_frames_to_db(conn, raw, daily)
+    if "_source_file" in raw.columns:
+        from src.parsers import search  # imported here: this module also runs as a script
+        search.rebuild_index(conn, raw, search.read_review_lines(sources=raw["_source_file"].dropna().unique()))
+    conn.close()
+
+def load_frames_to_db(conn, raw, daily):
+    raw.to_sql("sets_raw", conn, if_exists="replace", index=False)
     daily.to_sql("daily_exercise", conn, if_exists="replace", index=False)
 
-    conn.close()
+    # to_sql(replace) drops the tables, so indexes are recreated after every load
+    create_indexes(conn)
+
+def create_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_exercise_ex_date ON daily_exercise(exercise, date);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sets_raw_ex_date ON sets_raw(exercise, date);")
+    conn.commit()
+
+# Dashboard queries (per exercise + date range, served by the indexes above)
+
+def connect_read_only(db_path=DB_PATH):
+    # shared by Streamlit sessions, so not tied to the creating thread
+    return sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True, check_same_thread=False)
+
+def _athlete_filter(conn, table, athlete):
+    # " AND athlete = ?" and its params; no filter without an athlete or an athlete column
+    if athlete is None or not has_column(conn, table, "athlete"):
+        return "", ()
+    return " AND athlete = ?", (athlete,)
+
+def fetch_athletes(conn):
+    # athletes of the daily summary ([] for databases loaded before the athlete column existed)
+    if not has_column(conn, "daily_exercise", "athlete"):
+        return []
+    rows = conn.execute("""
+                    SELECT DISTINCT athlete
+                      FROM daily_exercise
+                      WHERE athlete IS NOT NULL
+                      ORDER BY athlete;
+    """).fetchall()
+    return [r[0] for r in rows]
+
+def fetch_exercises(conn, athlete=None):
+    where, params = _athlete_filter(conn, "daily_exercise", athlete)
+    rows = conn.execute(f"""
+                    SELECT DISTINCT exercise
+                      FROM daily_exercise
+                      WHERE exercise IS NOT NULL{where}
+                      ORDER BY exercise;
+    """, params).fetchall()
+    return [r[0] for r in rows]
+
+def fetch_date_bounds(conn, exercise, athlete=None):
+    where, params = _athlete_filter(conn, "daily_exercise", athlete)
+    return conn.execute(f"""
+                    SELECT MIN(date), MAX(date)
+                      FROM daily_exercise
+                      WHERE exercise = ?{where};
+    """, (exercise, *params)).fetchone()
+
+def fetch_daily_summary(conn, exercise, start, end, athlete=None):
+    where, params = _athlete_filter(conn, "daily_exercise", athlete)
+    return pd.read_sql_query(f"""
+                    SELECT *
+                      FROM daily_exercise
+                      WHERE exercise = ? AND date BETWEEN ? AND ?{where}
+                      ORDER BY date;
+    """, conn, params=(exercise, str(start), f"{end} 23:59:59", *params))
+
+def fetch_sets(conn, exercise, start, end, athlete=None):
+    where, params = _athlete_filter(conn, "sets_raw", athlete)
+    return pd.read_sql_query(f"""
+                    SELECT *
+                      FROM sets_raw
+                      WHERE exercise = ? AND date BETWEEN ? AND ?{where}
+                      ORDER BY date, set_no;
+    """, conn, params=(exercise, str(start), f"{end} 23:59:59", *params))
+
+def has_column(conn, table, column):
+    return column in {r[1] for r in conn.execute(f"PRAGMA table_info({table});")}
+
+def fetch_load_rows(conn, athlete=None):
+    # per (athlete, date, exercise) volume and set totals: the input of analytics.load.LoadIndex
+    # (databases loaded before the athlete column existed have none)
+    has_athlete = has_column(conn, "daily_exercise", "athlete")
+    keys = "athlete, date, exercise" if has_athlete else "date, exercise"
+    where = "WHERE athlete = ?" if athlete is not None and has_athlete else ""
+    return pd.read_sql_query(f"""
+                    SELECT {keys},
+                      SUM(total_volume) AS total_volume,
+                      SUM(num_sets) AS num_sets
+                      FROM daily_exercise
+                      {where}
+                      GROUP BY {keys};
+    """, conn, params=(athlete,) if where else ())
+
+def fetch_training_load(conn, athlete=None):
+    # LoadIndex over the stored daily summary; date-range and window queries on it are O(log n).
+    # Imported here so `python src/parsers/db.py` keeps working without the package on sys.path.
+    from src.analytics.load import LoadIndex
+    return LoadIndex.from_daily(fetch_load_rows(conn, athlete))
+
+# API queries (src/api/server.py): optional filters, keyset pagination on (date, rowid)
+
+def _daily_filters(conn, exercise=None, athlete=None, start=None, end=None):
+    where, params = [], []
+    if exercise is not None:
+        where.append("exercise = ?")
+        params.append(exercise)
+    if athlete is not None and has_column(conn, "daily_exercise", "athlete"):
+        where.append("athlete = ?")
+        params.append(athlete)
+    if start is not None:
+        where.append("date >= ?")
+        params.append(str(start))
+    if end is not None:
+        where.append("date <= ?")
+        params.append(f"{end} 23:59:59")
+    return where, params
+
+def fetch_daily_page(conn, limit, after=None, exercise=None, athlete=None, start=None, end=None):
+    # up to `limit` daily rows ordered by (date, rowid), starting after the (date, rowid) cursor
+    where, params = _daily_filters(conn, exercise, athlete, start, end)
+    if after is not None:
+        where.append("(date > ? OR (date = ? AND rowid > ?))")
+        params.extend([after[0], after[0], after[1]])
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    return pd.read_sql_query(f"""
+                    SELECT rowid AS row_id, *
+                      FROM daily_exercise
+                      {clause}
+                      ORDER BY date, rowid
+                      LIMIT ?;
+    """, conn, params=params + [limit])
+
+def fetch_1rm_trend(conn, exercise, athlete=None, start=None, end=None):
+    where, params = _daily_filters(conn, exercise, athlete, start, end)
+    return pd.read_sql_query(f"""
+                    SELECT date, MAX(max_1rm) AS max_1rm, MAX(best_weight_kg) AS best_weight_kg
+                      FROM daily_exercise
+                      WHERE {' AND '.join(where)}
+                      GROUP BY date
+                      ORDER BY date;
+    """, conn, params=params)
+
+TOP_EXERCISE_METRICS = {
+    "volume": "SUM(total_volume)",
+    "sets": "SUM(num_sets)",
+    "sessions": "COUNT(DISTINCT date)",
+    "max_1rm": "MAX(max_1rm)",
+}
+
+def fetch_top_exercises(conn, metric="volume", limit=10, athlete=None, start=None, end=None):
+    where, params = _daily_filters(conn, None, athlete, start, end)
+    where.append("exercise IS NOT NULL")
+    return pd.read_sql_query(f"""
+                    SELECT exercise, {TOP_EXERCISE_METRICS[metric]} AS {metric}
+                      FROM daily_exercise
+                      WHERE {' AND '.join(where)}
+                      GROUP BY exercise
+                      ORDER BY {metric} DESC, exercise
+                      LIMIT ?;
+    """, conn, params=params + [limit])
+
+# Incremental updates (used by the watch daemon): sets are replaced per source file and
+# only the daily summary groups they touch are recomputed
+
+SETS_RAW_COLUMNS = {
+    "_source_file": "TEXT", "athlete": "TEXT", "date": "TEXT", "program": "TEXT", "exercise": "TEXT",
+    "set_no": "INTEGER", "weight_kg": "REAL", "reps": "INTEGER", "time_sec": "REAL",
+    "iso_load": "REAL", "volume": "REAL", "notes": "TEXT",
+}
+DAILY_COLUMNS = {
+    "athlete": "TEXT", "date": "TEXT", "program": "TEXT", "exercise": "TEXT", "num_sets": "INTEGER",
+    "max_1rm": "REAL", "best_weight_kg": "REAL", "best_reps": "REAL",
+    "total_volume": "REAL", "max_time_sec": "REAL",
+}
+GROUP_COLUMNS = ["athlete", "date", "program", "exercise"]
+
+def db_version(db_path=DB_PATH):
+    # changes on every write, including writes still sitting in the WAL file
+    paths = [Path(db_path), Path(f"{db_path}-wal")]
+    versions = [p.stat().st_mtime_ns for p in paths if p.exists()]
+    return max(versions) if versions else None
+
+def ensure_table(conn, table, columns):
+    # create the table, or add any missing columns to an older one
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table}(" + ", ".join(f"{c} {t}" for c, t in columns.items()) + ");")
+    existing = {r[1] for r in conn.execute(f"PRAGMA table_info({table});")}
+    for col, col_type in columns.items():
+        if col not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {col_type};")
+
+def insert_frame(conn, table, df):
+    # plain INSERTs (unlike to_sql) so the caller controls the transaction
+    if df.empty:
+        return
+    cols = list(df.columns)
+    values = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    conn.executemany(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))});", values)
+
+def delete_source_sets(conn, source_file):
+    # returns the (athlete, date, program, exercise) groups the deleted sets belonged to
+    keys = pd.read_sql_query(f"SELECT DISTINCT {', '.join(GROUP_COLUMNS)} FROM sets_raw WHERE _source_file = ?;",
+                             conn, params=(source_file,))
+    conn.execute("DELETE FROM sets_raw WHERE _source_file = ?;", (source_file,))
+    if has_table(conn, "search_docs"):  # the source's notes and review lines go with its sets
+        conn.execute("DELETE FROM search_docs WHERE source_file = ?;", (source_file,))
+    return keys
+
+def append_last_set_notes(conn, source_file, notes):
+    # notes that continue the source's last stored set (the watch daemon parses a file in
+    # pieces); joined like the parser joins them. Returns that set before and after, or None.
+    last = pd.read_sql_query("SELECT rowid AS row_id, * FROM sets_raw WHERE _source_file = ? "
+                             "ORDER BY rowid DESC LIMIT 1;", conn, params=(source_file,))
+    if last.empty:
+        return None
+    old = last.at[0, "notes"]
+    new = " ; ".join(([old] if isinstance(old, str) and old else []) + list(notes))
+    conn.execute("UPDATE sets_raw SET notes = ? WHERE rowid = ?;", (new, int(last.at[0, "row_id"])))
+    before = last.drop(columns="row_id")
+    return before, before.assign(notes=new)
+
+def _load_group_keys(conn, keys):
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS group_keys({', '.join(c + ' TEXT' for c in GROUP_COLUMNS)});")
+    conn.execute("DELETE FROM group_keys;")
+    insert_frame(conn, "group_keys", keys[GROUP_COLUMNS].drop_duplicates())
+
+def _group_match(table):
+    # IS rather than = so groups without a program (NULL) still match
+    return " AND ".join(f"{table}.{c} IS k.{c}" for c in GROUP_COLUMNS)
+
+def fetch_group_sets(conn, keys):
+    _load_group_keys(conn, keys)
+    return pd.read_sql_query(f"""
+                    SELECT sets_raw.*
+                      FROM sets_raw
+                      JOIN group_keys k ON {_group_match("sets_raw")};
+    """, conn)
+
+def delete_daily_groups(conn, keys):
+    _load_group_keys(conn, keys)
+    conn.execute(f"DELETE FROM daily_exercise WHERE EXISTS "
+                 f"(SELECT 1 FROM group_keys k WHERE {_group_match('daily_exercise')});")
+
+def ensure_ingest_state(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_state(
+              source_file TEXT PRIMARY KEY,
+              state TEXT
+            );
+    """)
+
+def load_ingest_state(conn):
+    # {source_file: state dict} as saved by save_ingest_state
+    return {f: json.loads(s) for f, s in conn.execute("SELECT source_file, state FROM ingest_state;")}
+
+def save_ingest_state(conn, source_file, state):
+    if state is None:
+        conn.execute("DELETE FROM ingest_state WHERE source_file = ?;", (source_file,))
+    else:
+        conn.execute("INSERT OR REPLACE INTO ingest_state VALUES (?, ?);", (source_file, json.dumps(state)))
+
+def has_table(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (table,)).fetchone() is not None
+
+def ensure_dedupe_tables(conn):
+    # cross-file duplicate index (src/parsers/dedupe.py): the source that keeps each set
+    # fingerprint, and the other sources whose copy was dropped
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS set_fingerprints(
+              fingerprint INTEGER PRIMARY KEY,
+              source_file TEXT
+            );
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS duplicate_sets(
+              fingerprint INTEGER,
+              source_file TEXT,
+              PRIMARY KEY (fingerprint, source_file)
+            );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_set_fingerprints_source ON set_fingerprints(source_file);")
+
+def ensure_search_tables(conn):
+    # full-text index over set notes and low-confidence lines (src/parsers/search.py):
+    # search_docs holds each text with its context, search_fts indexes it (external
+    # content) and the triggers keep the two in sync
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_docs(
+              id INTEGER PRIMARY KEY,
+              kind TEXT,
+              source_file TEXT,
+              athlete TEXT,
+              date TEXT,
+              program TEXT,
+              exercise TEXT,
+              set_no INTEGER,
+              weight_kg REAL,
+              reps INTEGER,
+              line_no INTEGER,
+              confidence REAL,
+              text TEXT
+            );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_search_docs_source ON search_docs(source_file);")
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+              text, content='search_docs', content_rowid='id', tokenize='porter unicode61'
+            );
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_docs_ai AFTER INSERT ON search_docs BEGIN
+              INSERT INTO search_fts(rowid, text) VALUES (new.id, new.text);
+            END;
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_docs_ad AFTER DELETE ON search_docs BEGIN
+              INSERT INTO search_fts(search_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+    """)
 
 def example_queries():
     conn = sqlite3.connect(DB_PATH)
@@ -77,6 +397,8 @@ def example_queries():
 
 
 if __name__ == '__main__':
+    # `python src/parsers/db.py`: the search index rebuild in load_csv_to_db imports from src
+    sys.path.append(str(PROJECT_ROOT))
     init_db()
     load_csv_to_db()
     # example_queries()
\ No newline at end of file
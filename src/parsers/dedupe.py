@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import sqlite3
+from typing import Dict, Iterable, List, Mapping, Set
+
+import pandas as pd
+
+from src.parsers import db
+
+# Cross-file duplicate sets. Overlapping exports (a monthly file next to a full backup)
+# parse to the same sets twice; without this they are counted twice in volume and set
+# totals. Every set gets a fingerprint of (athlete, date, normalized exercise, set_no,
+# weight, reps, time), and the first source to produce a fingerprint owns it: the same
+# set from any other source is dropped and recorded as a duplicate of the owner.
+# Repeats inside one file are kept, as before (that is the parser's business).
+#
+# Lookups are dict hits, so rows are checked as they stream in. The index can be saved
+# in the workouts DB (set_fingerprints / duplicate_sets) so the watch daemon keeps
+# deduplicating across runs.
+#
+#   python -m src.parsers.dedupe              # which files overlap, from the DB
+
+FINGERPRINT_COLUMNS = ["athlete", "date", "exercise", "set_no", "weight_kg", "reps", "time_sec"]
+
+
+def _canonical(value) -> str:
+    # 80, 80.0 and "80" fingerprint alike; None, NaN and NA alike
+    if value is None or value is pd.NA:
+        return ""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return "" if number != number else repr(number)
+
+
+def set_fingerprint(row: Mapping) -> int:
+    # signed 64-bit, so it fits an SQLite INTEGER
+    key = "\x1f".join(_canonical(row.get(c)) for c in FINGERPRINT_COLUMNS)
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class DedupeIndex:
+
+    def __init__(self):
+        self.owner: Dict[int, str] = {}           # fingerprint -> source whose set is kept
+        self.owned: Dict[str, Set[int]] = {}      # source -> fingerprints it owns
+        self.dropped: Dict[int, Set[str]] = {}    # fingerprint -> other sources that had it
+        self.released: Set[int] = set()           # fingerprints whose owner was forgotten
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "DedupeIndex":
+        index = cls()
+        if not db.has_table(conn, "set_fingerprints"):
+            return index
+        for fp, source in conn.execute("SELECT fingerprint, source_file FROM set_fingerprints;"):
+            index.owner[fp] = source
+            index.owned.setdefault(source, set()).add(fp)
+        for fp, source in conn.execute("SELECT fingerprint, source_file FROM duplicate_sets;"):
+            index.dropped.setdefault(fp, set()).add(source)
+        return index
+
+    @classmethod
+    def from_sets(cls, df_raw: pd.DataFrame) -> "DedupeIndex":
+        # ownership of already deduplicated sets (raw sets CSV, sets_raw), per _source_file
+        index = cls()
+        if "_source_file" in df_raw.columns:
+            for source, sets in df_raw.groupby("_source_file", sort=False):
+                index.claim_frame(sets, source)
+        return index
+
+    def claim_mask(self, rows: Iterable[Mapping], source: str, conn: sqlite3.Connection = None) -> List[bool]:
+        # True for the rows of `source` to keep: those no other source owns. With conn, the
+        # index changes are written to the DB in the caller's transaction.
+        keep, new_owned, new_dropped = [], [], []
+        owned = self.owned.setdefault(source, set())
+        for r in rows:
+            fp = set_fingerprint(r)
+            owner = self.owner.get(fp)
+            if owner is None:
+                self.owner[fp] = source
+                owned.add(fp)
+                new_owned.append((fp, source))
+            elif owner != source:
+                sources = self.dropped.setdefault(fp, set())
+                if source not in sources:
+                    sources.add(source)
+                    new_dropped.append((fp, source))
+            keep.append(owner is None or owner == source)
+        if conn is not None:
+            conn.executemany("INSERT OR REPLACE INTO set_fingerprints VALUES (?, ?);", new_owned)
+            conn.executemany("INSERT OR IGNORE INTO duplicate_sets VALUES (?, ?);", new_dropped)
+        return keep
+
+    def claim(self, rows: List[Dict], source: str, conn: sqlite3.Connection = None) -> List[Dict]:
+        return [r for r, keep in zip(rows, self.claim_mask(rows, source, conn)) if keep]
+
+    def claim_frame(self, df: pd.DataFrame, source: str, conn: sqlite3.Connection = None) -> pd.DataFrame:
+        keep = self.claim_mask(df.to_dict("records"), source, conn)
+        return df if all(keep) else df[keep].reset_index(drop=True)
+
+    def forget(self, source: str, conn: sqlite3.Connection = None) -> None:
+        # drop everything `source` owns or duplicated (before it is removed or re-parsed)
+        for fp in self.owned.pop(source, set()):
+            del self.owner[fp]
+            self.released.add(fp)
+        for fp in [fp for fp, sources in self.dropped.items() if source in sources]:
+            self.dropped[fp].discard(source)
+            if not self.dropped[fp]:
+                del self.dropped[fp]
+        if conn is not None:
+            conn.execute("DELETE FROM set_fingerprints WHERE source_file = ?;", (source,))
+            conn.execute("DELETE FROM duplicate_sets WHERE source_file = ?;", (source,))
+
+    def orphaned_sources(self) -> Set[str]:
+        # sources that dropped a set whose owner has since gone: they must be parsed again
+        # to get it back. Clears the released fingerprints.
+        orphaned = set()
+        for fp in self.released:
+            if fp not in self.owner:
+                orphaned.update(self.dropped.get(fp, ()))
+        self.released.clear()
+        return orphaned
+
+    def reload(self, conn: sqlite3.Connection) -> None:
+        # back to the saved index, e.g. after the transaction holding this index's changes rolled back
+        saved = DedupeIndex.load(conn)
+        self.owner, self.owned, self.dropped, self.released = saved.owner, saved.owned, saved.dropped, saved.released
+
+    def save(self, conn: sqlite3.Connection) -> None:
+        # replaces the saved index (after a full rebuild)
+        db.ensure_dedupe_tables(conn)
+        conn.execute("DELETE FROM set_fingerprints;")
+        conn.execute("DELETE FROM duplicate_sets;")
+        conn.executemany("INSERT INTO set_fingerprints VALUES (?, ?);", self.owner.items())
+        conn.executemany("INSERT INTO duplicate_sets VALUES (?, ?);",
+                         ((fp, s) for fp, sources in self.dropped.items() for s in sources))
+
+    def duplicate_count(self) -> int:
+        return sum(len(sources) for sources in self.dropped.values())
+
+    def overlap_report(self) -> pd.DataFrame:
+        # one row per (source, owner) pair: how many of the source's sets were already in owner
+        pairs = pd.DataFrame([(s, self.owner.get(fp)) for fp, sources in self.dropped.items() for s in sources],
+                             columns=["source_file", "overlaps_with"])
+        if pairs.empty:
+            return pd.DataFrame(columns=["source_file", "overlaps_with", "duplicate_sets", "share"])
+        report = pairs.groupby(["source_file", "overlaps_with"], dropna=False).size().rename("duplicate_sets")
+        report = report.reset_index()
+        dropped = report.groupby("source_file")["duplicate_sets"].transform("sum")
+        kept = report["source_file"].map(lambda s: len(self.owned.get(s, ())))
+        report["share"] = (report["duplicate_sets"] / (kept + dropped)).round(3)
+        return report.sort_values(["duplicate_sets", "source_file"], ascending=[False, True]).reset_index(drop=True)
+
+
+def load_index(conn: sqlite3.Connection) -> DedupeIndex:
+    # the saved index; a database written before it existed gets one built from sets_raw
+    index = DedupeIndex.load(conn)
+    if not index.owner and db.has_table(conn, "sets_raw"):
+        index = DedupeIndex.from_sets(pd.read_sql_query("SELECT * FROM sets_raw;", conn))
+        with conn:
+            index.save(conn)
+    return index
+
+
+def print_overlaps(index: DedupeIndex) -> None:
+    report = index.overlap_report()
+    if report.empty:
+        print("No duplicate sets across files.")
+        return
+    print(f"Dropped {index.duplicate_count()} duplicate set(s) found in more than one file:")
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Report log files whose sets overlap.")
+    ap.add_argument("--db-path", default=str(db.DB_PATH))
+    args = ap.parse_args()
+
+    conn = db.connect_read_only(args.db_path)
+    try:
+        print_overlaps(DedupeIndex.load(conn))
+    finally:
+        conn.close()
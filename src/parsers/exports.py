@@ -0,0 +1,84 @@
+import io
+import gzip
+import zipfile
+from typing import Dict
+
+import pandas as pd
+
+# Export encoders for the dashboard's Downloads tab. Frames are encoded in row
+# chunks straight into the (compressed) output buffer, so a large export never
+# holds a full CSV string next to its encoded copy.
+
+EXPORT_CHUNK_ROWS = 50_000
+
+# format -> (file extension, mime type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "ZIP bundle (raw sets + daily summary)": ("zip", "application/zip"),
+}
+
+
+def _write_csv_chunks(df: pd.DataFrame, text_stream, chunk_rows: int) -> None:
+    if df.empty:
+        df.to_csv(text_stream, index=False)
+        return
+    for start in range(0, len(df), chunk_rows):
+        df.iloc[start:start + chunk_rows].to_csv(text_stream, index=False, header=(start == 0))
+
+
+def csv_bytes(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS) -> bytes:
+    buf = io.BytesIO()
+    with io.TextIOWrapper(buf, encoding="utf-8", newline="", write_through=True) as text:
+        _write_csv_chunks(df, text, chunk_rows)
+        text.flush()
+        return buf.getvalue()
+
+
+def csv_gzip_bytes(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS) -> bytes:
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+        with io.TextIOWrapper(gz, encoding="utf-8", newline="") as text:
+            _write_csv_chunks(df, text, chunk_rows)
+    return buf.getvalue()
+
+
+def parquet_bytes(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS) -> bytes:
+    # one row group per chunk; the schema comes from the whole frame so chunks
+    # with an all-null column still match
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    buf = io.BytesIO()
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(buf, schema) as writer:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return buf.getvalue()
+
+
+def zip_bundle_bytes(frames: Dict[str, pd.DataFrame], chunk_rows: int = EXPORT_CHUNK_ROWS) -> bytes:
+    # {file name inside the zip: frame}, each written as CSV
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, df in frames.items():
+            with zf.open(name, "w") as member:
+                with io.TextIOWrapper(member, encoding="utf-8", newline="") as text:
+                    _write_csv_chunks(df, text, chunk_rows)
+    return buf.getvalue()
+
+
+def build_export(fmt: str, name: str, df: pd.DataFrame, bundle: Dict[str, pd.DataFrame] = None):
+    # returns (data, file name, mime) for one of EXPORT_FORMATS
+    ext, mime = EXPORT_FORMATS[fmt]
+    if ext == "csv":
+        data = csv_bytes(df)
+    elif ext == "csv.gz":
+        data = csv_gzip_bytes(df)
+    elif ext == "parquet":
+        data = parquet_bytes(df)
+    else:
+        data = zip_bundle_bytes(bundle)
+    return data, f"{name}.{ext}", mime
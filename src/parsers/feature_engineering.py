@@ -1,9 +1,16 @@
+import argparse
+import tempfile
 import pandas as pd
+import pyarrow.parquet as pq
 import numpy as np
 import os
-from typing import Optional
+from typing import Iterable, Iterator, List, Optional
 from pathlib import Path
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+RAW_SETS_PATH = PROJECT_ROOT / 'data_processed' / 'workouts_raw_sets.csv'
+DAILY_SUMMARY_PATH = PROJECT_ROOT / 'data_processed' / 'workouts_daily_exercise.csv'
+
 
 def calculate_epley_1rm(weight: Optional[float], reps: Optional[int]) -> Optional[float]:
 
@@ -36,18 +43,12 @@ def get_best_reps_for_max_weight(df: pd.DataFrame) -> Optional[int]:
     
     return reps_numeric.max()
 
-def run_feature_engineering():
+def build_daily_summary(df: pd.DataFrame) -> pd.DataFrame:
 
-    PROJECT_ROOT = Path(r"C:\Users\aakas\Documents\workout_project")
-    RAW_SETS_PATH = PROJECT_ROOT / 'data_processed' / 'workouts_raw_sets.csv'
-    DAILY_SUMMARY_PATH = PROJECT_ROOT / 'data_processed' /'workouts_daily_exercise.csv'
+    # raw sets -> one row per (date, program, exercise), per athlete when the sets carry one
+    df = df.copy()
+    keys = (['athlete'] if 'athlete' in df.columns else []) + ['date', 'program', 'exercise']
 
-    try:
-        df = pd.read_csv(RAW_SETS_PATH)
-    except FileNotFoundError:
-        print(f"Error: Input file not found at {RAW_SETS_PATH}")
-        return
-    
     df['date'] = pd.to_datetime(df['date'], errors='coerce')
 
     df['reps'] = pd.to_numeric(df['reps'], errors = 'coerce')
@@ -59,7 +60,7 @@ def run_feature_engineering():
 
     # Grouping and Aggregation
 
-    grouped = df.groupby(['date', 'program', 'exercise'])
+    grouped = df.groupby(keys)
 
     daily_summary = grouped.agg(
 
@@ -81,15 +82,195 @@ def run_feature_engineering():
 
     daily_summary = pd.merge( daily_summary,
                               best_reps_df,
-                              on=['date', 'program', 'exercise'],
+                              on=keys,
                               how='left'
                              )
 
     daily_summary.rename(columns={'max_weight_kg': 'best_weight_kg'}, inplace=True)
 
-    daily_summary = daily_summary[['date', 'program', 'exercise', 'num_sets', 'max_1rm', 
+    daily_summary = daily_summary[keys + ['num_sets', 'max_1rm',
                                    'best_weight_kg', 'best_reps', 'total_volume', 'max_time_sec']]
+
+    return daily_summary
+
+# Chunked (out-of-core) mode: raw sets are streamed in chunks of chunk_rows and reduced to
+# mergeable partials per group (max 1RM, best weight + the best reps at that weight,
+# volume sum, set count, max time). Partials merge with the same aggregation.
+# With sorted_by_date, a date's groups are written out as soon as a later date shows up,
+# so only the open date is held. Otherwise, whenever more than max_partial_rows partials
+# are held they are merged, sorted and spilled to a run file; the runs are then k-way
+# merged in key order. Either way memory is bounded by the chunk size, not the input.
+
+CHUNK_ROWS = 200_000
+DAILY_COLUMNS = ['num_sets', 'max_1rm', 'best_weight_kg', 'best_reps', 'total_volume', 'max_time_sec']
+# only the columns the summary needs are read
+FEATURE_DTYPES = {'athlete': 'string', 'date': 'string', 'program': 'string', 'exercise': 'string',
+                  'set_no': 'float64', 'weight_kg': 'float64', 'reps': 'float64',
+                  'volume': 'float64', 'time_sec': 'float64'}
+
+
+def _merge_partials(part: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    # partial rows -> one partial row per group (rows with a missing key are dropped, like groupby)
+    grouped = part.groupby(keys, sort=False)
+    top_weight = grouped['best_weight_kg'].transform('max')
+    part = part.assign(reps_at_top=part['best_reps'].where(part['best_weight_kg'] == top_weight))
+    return part.groupby(keys, sort=False).agg(
+        num_sets=('num_sets', 'sum'),
+        max_1rm=('max_1rm', 'max'),
+        best_weight_kg=('best_weight_kg', 'max'),
+        best_reps=('reps_at_top', 'max'),
+        total_volume=('total_volume', 'sum'),
+        max_time_sec=('max_time_sec', 'max'),
+    ).reset_index()
+
+
+def partial_daily_summary(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    # raw sets chunk -> partials; each set is a one-set partial, then merged per group
+    weight = pd.to_numeric(df['weight_kg'], errors='coerce')
+    reps = pd.to_numeric(df['reps'], errors='coerce')
+    # calculate_epley_1rm, vectorised
+    valid = weight.notna() & reps.notna() & (reps != 0)
+    estimated_1rm = np.round(weight * (1 + reps / 30.0)).where(valid)
+    sets = pd.DataFrame({k: df[k] for k in keys})
+    sets['date'] = pd.to_datetime(df['date'], errors='coerce')
+    sets = sets.assign(
+        num_sets=df['set_no'].notna().astype('int64'),
+        max_1rm=estimated_1rm,
+        best_weight_kg=weight,
+        best_reps=reps,
+        total_volume=pd.to_numeric(df['volume'], errors='coerce'),
+        max_time_sec=pd.to_numeric(df['time_sec'], errors='coerce'),
+    )
+    return _merge_partials(sets, keys)
+
+
+def _finish(part: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    return part.sort_values(keys, kind='stable')[keys + DAILY_COLUMNS].reset_index(drop=True)
+
+
+def _sort_key(df: pd.DataFrame, keys: List[str]) -> pd.Series:
+    # one string per row that orders like the key tuple ('\0' sorts before any character)
+    parts = [df[k].dt.strftime('%Y-%m-%d') if k == 'date' else df[k].astype(str) for k in keys]
+    key = parts[0]
+    for part in parts[1:]:
+        key = key + '\0' + part
+    return key
+
+
+def _merge_runs(paths: List[Path], keys: List[str], batch_rows: int) -> Iterator[pd.DataFrame]:
+    # k-way merge of sorted partial runs; holds one batch per run
+    readers = [pq.ParquetFile(p).iter_batches(batch_size=batch_rows) for p in paths]
+    buffers: List[Optional[pd.DataFrame]] = [None] * len(paths)
+
+    def refill(i):
+        batch = next(readers[i], None)
+        buffers[i] = None if batch is None else batch.to_pandas().assign(
+            sort_key=lambda b: _sort_key(b, keys))
+
+    for i in range(len(paths)):
+        refill(i)
+    while any(b is not None for b in buffers):
+        # every row up to the smallest buffered last key is in memory now
+        bound = min(b['sort_key'].iloc[-1] for b in buffers if b is not None)
+        taken = []
+        for i, b in enumerate(buffers):
+            if b is None:
+                continue
+            n = int(b['sort_key'].searchsorted(bound, side='right'))
+            taken.append(b.iloc[:n])
+            if n == len(b):
+                refill(i)
+            else:
+                buffers[i] = b.iloc[n:]
+        merged = pd.concat(taken, ignore_index=True).drop(columns='sort_key')
+        yield _finish(_merge_partials(merged, keys), keys)
+
+
+def iter_daily_summary(chunks: Iterable[pd.DataFrame], sorted_by_date: bool = False,
+                       max_partial_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    # same rows as build_daily_summary on the concatenated chunks, yielded in pieces
+    # (in key order, except that sorted_by_date output is ordered by date first)
+    keys = None
+    pending: List[pd.DataFrame] = []
+    pending_rows = 0
+    open_from = None  # sorted mode: earliest date not yet written
+    spill_dir = None
+    runs: List[Path] = []
+
+    def spill(state):
+        nonlocal spill_dir
+        if spill_dir is None:
+            spill_dir = tempfile.TemporaryDirectory(prefix='daily_partials_')
+        path = Path(spill_dir.name) / f'run_{len(runs):04d}.parquet'
+        _finish(state, keys).to_parquet(path, index=False)
+        runs.append(path)
+
+    for chunk in chunks:
+        if keys is None:
+            keys = (['athlete'] if 'athlete' in chunk.columns else []) + ['date', 'program', 'exercise']
+        part = partial_daily_summary(chunk, keys)
+        if part.empty:
+            continue
+        if sorted_by_date and open_from is not None and part['date'].min() < open_from:
+            raise ValueError(f"raw sets are not sorted by date ({part['date'].min():%Y-%m-%d} after "
+                             f"{open_from:%Y-%m-%d} was started); run without sorted_by_date")
+        pending.append(part)
+        pending_rows += len(part)
+
+        if sorted_by_date:
+            state = _merge_partials(pd.concat(pending, ignore_index=True), keys)
+            open_from = state['date'].max()
+            closed = state['date'] < open_from
+            if closed.any():
+                yield _finish(state[closed], keys)
+            pending, pending_rows = [state[~closed]], int((~closed).sum())
+        elif pending_rows > max_partial_rows:
+            spill(_merge_partials(pd.concat(pending, ignore_index=True), keys))
+            pending, pending_rows = [], 0
+
+    try:
+        if not runs:
+            if pending:
+                yield _finish(_merge_partials(pd.concat(pending, ignore_index=True), keys), keys)
+            return
+        if pending:
+            spill(_merge_partials(pd.concat(pending, ignore_index=True), keys))
+        yield from _merge_runs(runs, keys, max(max_partial_rows // len(runs), 1_000))
+    finally:
+        if spill_dir is not None:
+            spill_dir.cleanup()
+
+
+def write_daily_summary_chunked(raw_path, out_path, chunk_rows: int = CHUNK_ROWS,
+                                sorted_by_date: bool = False) -> int:
+    # streams raw_path into out_path; returns the number of daily rows written
+    chunks = pd.read_csv(raw_path, chunksize=chunk_rows, dtype=FEATURE_DTYPES,
+                         usecols=lambda c: c in FEATURE_DTYPES)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    written = 0
+    for daily in iter_daily_summary(chunks, sorted_by_date, max_partial_rows=chunk_rows):
+        daily.to_csv(out_path, mode='a' if written else 'w', header=not written, index=False)
+        written += len(daily)
+    if not written:
+        pd.DataFrame(columns=['date', 'program', 'exercise'] + DAILY_COLUMNS).to_csv(out_path, index=False)
+    return written
+
+
+def run_feature_engineering(chunk_rows: Optional[int] = None, sorted_by_date: bool = False):
+
+    if not RAW_SETS_PATH.exists():
+        print(f"Error: Input file not found at {RAW_SETS_PATH}")
+        return
+
+    if chunk_rows:
+        n_rows = write_daily_summary_chunked(RAW_SETS_PATH, DAILY_SUMMARY_PATH, chunk_rows, sorted_by_date)
+        print(f"Successfully created daily summary table: {n_rows} rows (chunks of {chunk_rows} sets).")
+        return
+
+    df = pd.read_csv(RAW_SETS_PATH)
     
+    daily_summary = build_daily_summary(df)
+
     print(f"Successfully created daily summary table: {len(daily_summary)} rows.")
 
 
@@ -98,5 +279,11 @@ def run_feature_engineering():
 
 
 if __name__ == '__main__':
-    run_feature_engineering()
+    ap = argparse.ArgumentParser(description="Build the daily summary from the raw sets CSV.")
+    ap.add_argument("--chunk-rows", type=int,
+                    help="stream the raw sets in chunks of this many rows (bounds memory)")
+    ap.add_argument("--sorted-by-date", action="store_true",
+                    help="with --chunk-rows: input is in date order, write each date once it is complete")
+    args = ap.parse_args()
+    run_feature_engineering(args.chunk_rows, args.sorted_by_date)
 
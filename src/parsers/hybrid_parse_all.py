@@ -1,6 +1,10 @@
+import argparse
+import cProfile
 import glob
+import time
+from functools import lru_cache
 from pathlib import Path
-import joblib
+from typing import Dict, List, Optional
 import csv
 import json
 import pandas as pd
@@ -8,6 +12,9 @@ from pathlib import Path
 
 from src.parsers.v1_parser import parse_log_content
 from src.parsers.normalize import normalize_exercise
+from src.parsers.instrument import ParseStats
+from src.parsers.dedupe import DedupeIndex, print_overlaps
+from src.ml.fast_model import load_line_classifier
 
 
 CURRENT_DIR = Path(__file__).resolve().parent
@@ -17,17 +24,22 @@ OUT_RAW_SETS = PROJECT_ROOT / "data_processed" / "workouts_raw_sets.csv"
 TO_REVIEW = PROJECT_ROOT / "data_labels" / "to_review.csv"
 MODEL_PATH = PROJECT_ROOT / "models" / "line_clf.joblib"
 
-# load classifier 
+# classifier (compiled fast model when it is up to date), loaded on the first line that
+# needs it so importing this module stays cheap
+
+@lru_cache(maxsize=1)
+def get_classifier():
+    return load_line_classifier(MODEL_PATH)
 
-clf = joblib.load(MODEL_PATH)
 CONF_THRESHOLD = 0.60
 
 def ml_label_fn(line: str):
 
+    clf = get_classifier()
     try:
-        pred = clf.predict([line])[0]
-        prob = float(clf.predict_proba([line])[0].max())
-        return (str(pred), prob)
+        probs = clf.predict_proba([line])[0]
+        best = int(probs.argmax())
+        return (str(clf.classes_[best]), float(probs[best]))
     except Exception:
 
         try:
@@ -48,40 +60,88 @@ def save_review_fn(line: str, conf: float, src_file: str, lineno: int):
             writer.writerow(["raw_line", "confidence", "source_file", "line_no"])
         writer.writerow([line, conf, src_file, lineno])
 
-all_rows = []
-for path in sorted(glob.glob(str(RAW_GLOB))):
-    src = Path(path)
-    raw = src.read_text(encoding="utf-8")
-    rows = parse_log_content(raw, source_file=str(src.name), ml_label_fn=ml_label_fn,
-                             save_review_fn=save_review_fn, conf_threshold=CONF_THRESHOLD)
-    
+def parse_text(raw: str, source_file: str, conf_threshold: float = CONF_THRESHOLD,
+               stats: Optional[ParseStats] = None, state: Optional[Dict] = None,
+               reviews: Optional[List] = None, save_reviews: bool = True):
+    # hybrid parse of one log + exercise normalization (state: see parse_log_content).
+    # With reviews, the low-confidence lines are also appended to it (save_review_fn args).
+    # save_reviews=False leaves writing them to TO_REVIEW to the caller: pool workers hand
+    # them back, so only the parent process appends to the file.
+    review_fn = save_review_fn if save_reviews else None
+    if reviews is not None:
+        def review_fn(*args):
+            if save_reviews:
+                save_review_fn(*args)
+            reviews.append(args)
+    rows = parse_log_content(raw, source_file=source_file, ml_label_fn=ml_label_fn,
+                             save_review_fn=review_fn, conf_threshold=conf_threshold,
+                             stats=stats, state=state)
+    if stats is not None:
+        start = time.perf_counter()
     for r in rows:
-        r["_source_file"] = src.name
         if 'exercise' in r and r['exercise']:
             r['exercise'] = normalize_exercise(r['exercise'])
-    all_rows.extend(rows)
-    
-    
-
-
-# save combined CSV
-OUT_RAW_SETS.parent.mkdir(parents=True, exist_ok=True)
-if all_rows:
-    df = pd.DataFrame(all_rows)
-
-    cols = ["_source_file","date","program","exercise","set_no","weight_kg","reps","time_sec","iso_load","volume","notes"]
-    cols = [c for c in cols if c in df.columns] + [c for c in df.columns if c not in cols]
-    df.to_csv(OUT_RAW_SETS, index=False,columns=cols)
-    print(f"Wrote {len(df)} rows to {OUT_RAW_SETS}")
-else:
-    print("No rows parsed.")
-
-# Save a small summary about to_review file
-if TO_REVIEW.exists():
-    try:
-        df_review = pd.read_csv(TO_REVIEW)
-        print(f"Low-confidence lines saved: {len(df_review)} to ({TO_REVIEW})")
-    except:
-        print(f"Review file created → {TO_REVIEW}")
-
-
+    if stats is not None:
+        stats.add_time("normalize", time.perf_counter() - start, len(rows))
+    return rows
+
+
+def run_hybrid_parse(stats: Optional[ParseStats] = None):
+
+    all_rows = []
+    index = DedupeIndex()  # overlapping exports: a set already parsed from an earlier file is dropped
+    for path in sorted(glob.glob(str(RAW_GLOB))):
+        src = Path(path)
+        raw = src.read_text(encoding="utf-8")
+        rows = parse_text(raw, src.name, stats=stats)
+        for r in rows:
+            r["_source_file"] = src.name
+        all_rows.extend(index.claim(rows, src.name))
+    if index.dropped:
+        print_overlaps(index)
+
+    # save combined CSV
+    OUT_RAW_SETS.parent.mkdir(parents=True, exist_ok=True)
+    if all_rows:
+        df = pd.DataFrame(all_rows)
+
+        cols = ["_source_file","date","program","exercise","set_no","weight_kg","reps","time_sec","iso_load","volume","notes"]
+        cols = [c for c in cols if c in df.columns] + [c for c in df.columns if c not in cols]
+        if stats is not None:
+            start = time.perf_counter()
+        df.to_csv(OUT_RAW_SETS, index=False,columns=cols)
+        if stats is not None:
+            stats.add_time("csv_write", time.perf_counter() - start)
+        print(f"Wrote {len(df)} rows to {OUT_RAW_SETS}")
+    else:
+        print("No rows parsed.")
+
+    # Save a small summary about to_review file
+    if TO_REVIEW.exists():
+        try:
+            df_review = pd.read_csv(TO_REVIEW)
+            print(f"Low-confidence lines saved: {len(df_review)} to ({TO_REVIEW})")
+        except:
+            print(f"Review file created → {TO_REVIEW}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Parse all logs in data_raw/ (regex + ML).")
+    ap.add_argument("--profile", action="store_true", help="print branch counts and per-stage timings")
+    ap.add_argument("--profile-out", help="also write cProfile stats to this file (snakeviz / flameprof)")
+    args = ap.parse_args()
+
+    if not (args.profile or args.profile_out):
+        run_hybrid_parse()
+    else:
+        stats = ParseStats()
+        profiler = cProfile.Profile() if args.profile_out else None
+        if profiler is not None:
+            profiler.enable()
+        run_hybrid_parse(stats)
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_out)
+        print(stats.report())
+        if profiler is not None:
+            print(f"cProfile stats written to {args.profile_out}")
@@ -0,0 +1,118 @@
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+# Opt-in instrumentation for parse_log_content and the ingest drivers. Nothing here
+# runs unless a ParseStats is passed in; the wrapped callables replace the plain
+# ones only for that call, so the disabled path is unchanged apart from one
+# `is not None` check per line.
+
+
+class ParseStats:
+
+    def __init__(self):
+        self.branches = Counter()    # DATE / SECTION / SET / EXERCISE / OTHER per line
+        self.ml_labels = Counter()   # classifier labels for OTHER lines
+        self.timers: Dict[str, List[float]] = {}  # name -> [calls, seconds]
+        self.files: List[Dict[str, Any]] = []
+        self.ambiguous_dates = Counter()  # (file, header date, read as, order basis) -> headers
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        timer = self.timers.setdefault(name, [0, 0.0])
+        timer[0] += calls
+        timer[1] += seconds
+
+    def timed(self, name: str, fn: Optional[Callable]) -> Optional[Callable]:
+        if fn is None:
+            return None
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add_time(name, time.perf_counter() - start)
+        return wrapper
+
+    def timed_ml(self, fn: Optional[Callable]) -> Optional[Callable]:
+        # like timed("ml_classify", fn), also counting the returned labels
+        if fn is None:
+            return None
+
+        def wrapper(line):
+            start = time.perf_counter()
+            label, conf = fn(line)
+            self.add_time("ml_classify", time.perf_counter() - start)
+            self.ml_labels[label] += 1
+            return label, conf
+        return wrapper
+
+    def record_file(self, source_file: Optional[str], lines: int, rows: int, seconds: float) -> None:
+        self.files.append({
+            "file": source_file or "<unknown>",
+            "lines": lines,
+            "rows": rows,
+            "seconds": seconds,
+            "lines_per_sec": lines / seconds if seconds else None,
+        })
+
+    def record_ambiguous_date(self, source_file: Optional[str], raw: str, resolved: str, basis: str) -> None:
+        # a header like 03/04/21 that is a valid date in both day/month orders
+        self.ambiguous_dates[(source_file or "<unknown>", raw, resolved, basis)] += 1
+
+    def merge(self, other: "ParseStats") -> None:
+        # fold in stats collected elsewhere (e.g. returned from a worker process)
+        self.branches.update(other.branches)
+        self.ml_labels.update(other.ml_labels)
+        for name, (calls, seconds) in other.timers.items():
+            self.add_time(name, seconds, calls)
+        self.files.extend(other.files)
+        self.ambiguous_dates.update(other.ambiguous_dates)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "branches": dict(self.branches),
+            "ml_labels": dict(self.ml_labels),
+            "timers": {name: {"calls": c, "seconds": s} for name, (c, s) in self.timers.items()},
+            "files": list(self.files),
+            "ambiguous_dates": [{"file": f, "date": raw, "read_as": iso, "basis": basis, "count": n}
+                                for (f, raw, iso, basis), n in self.ambiguous_dates.items()],
+        }
+
+    def report(self) -> str:
+        lines = sum(f["lines"] for f in self.files)
+        rows = sum(f["rows"] for f in self.files)
+        parse_seconds = sum(f["seconds"] for f in self.files)
+        out = [f"Parsed {len(self.files)} file(s): {lines} lines -> {rows} rows in {parse_seconds:.3f}s"
+               + (f" ({lines / parse_seconds:,.0f} lines/s)" if parse_seconds else "")]
+
+        out.append("Branches: " + ", ".join(f"{k}={v}" for k, v in self.branches.most_common()))
+        if self.ml_labels:
+            out.append("ML labels: " + ", ".join(f"{k}={v}" for k, v in self.ml_labels.most_common()))
+
+        # time inside parse_log_content not spent in a timed call is the regex cascade + row building
+        inside_parse = ("ml_classify", "date_parse", "review_write")
+        other = parse_seconds - sum(s for name, (_, s) in self.timers.items() if name in inside_parse)
+        timers = sorted(self.timers.items(), key=lambda kv: -kv[1][1])
+        out.append("Time:")
+        for name, (calls, seconds) in timers:
+            per_call = seconds / calls * 1e6 if calls else 0.0
+            out.append(f"  {name:<14} {seconds:>9.3f}s  {calls:>9} calls  {per_call:>9.1f} us/call")
+        out.append(f"  {'regex/other':<14} {max(other, 0.0):>9.3f}s")
+
+        slowest = sorted(self.files, key=lambda f: f["lines_per_sec"] or 0)[:5]
+        if len(self.files) > 1:
+            out.append("Slowest files:")
+            for f in slowest:
+                out.append(f"  {f['file']}: {f['lines']} lines, {f['rows']} rows, "
+                           f"{f['seconds']:.3f}s ({f['lines_per_sec'] or 0:,.0f} lines/s)")
+
+        if self.ambiguous_dates:
+            by_basis = Counter()
+            for (_, _, _, basis), n in self.ambiguous_dates.items():
+                by_basis[basis] += n
+            out.append(f"Ambiguous day/month dates: {sum(by_basis.values())} header(s) "
+                       f"({', '.join(f'{n} by {basis} order' for basis, n in by_basis.items())})")
+            for (f, raw, iso, basis), n in self.ambiguous_dates.most_common(5):
+                out.append(f"  {f}: {raw} -> {iso} ({basis} order, {n}x)")
+        return "\n".join(out)
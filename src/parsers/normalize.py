@@ -1,14 +1,52 @@
+import argparse
+import csv
 import re
-import pandas as pd
-def normalize_exercise(name: str) -> str:
-
-    if not name or pd.isna(name):
-        return name 
-    
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
-    cleaned = re.sub(r'\s+', " ", name.strip().lower())
+import pandas as pd
 
-    mapping = {
+# Exercise name normalization. Names are looked up in EXERCISE_MAPPING (lowercased,
+# whitespace collapsed); a name it doesn't know ("incline db prss", "bb row") is matched
+# against the canonical names and the aliases with a character trigram index:
+#   score >= AUTO_ACCEPT (and AUTO_MARGIN ahead of the next exercise) -> canonical name
+#   score >= REVIEW_THRESHOLD                                        -> kept, queued in EXERCISE_REVIEW
+#   below                                                            -> kept (a new exercise)
+# Resolutions are cached per unique name, so a log's thousands of sets cost one lookup
+# per distinct spelling. Accept a queued name by adding it to EXERCISE_MAPPING.
+#
+#   python -m src.parsers.normalize "incline db prss" "bb row"   # candidate, score, decision
+#   python -m src.parsers.normalize --pending                    # the review queue
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+EXERCISE_REVIEW = PROJECT_ROOT / "data_labels" / "exercise_review.csv"
+REVIEW_COLUMNS = ["name", "candidate", "score"]
+
+AUTO_ACCEPT = 0.85
+AUTO_MARGIN = 0.05
+REVIEW_THRESHOLD = 0.5
+NGRAM = 3
+EXERCISE_CACHE_SIZE = 8192
+
+# whole-word shorthands expanded before matching ("db" and "dumbbell" are the same gram
+# source); plural "s" is dropped from longer words, so "rows" matches "row"
+ABBREVIATIONS = {
+    "db": "dumbbell",
+    "dbs": "dumbbell",
+    "bb": "barbell",
+    "kb": "kettlebell",
+    "ohp": "overhead press",
+    "dl": "deadlift",
+    "tri": "tricep",
+    "triceps": "tricep",
+    "bi": "bicep",
+    "biceps": "bicep",
+}
+
+EXERCISE_MAPPING = {
     # Normalised Squats
     "barbell back squats": "Barbell Back Squats",
     "barbell squats"     : "Barbell Back Squats",
@@ -243,7 +281,161 @@ def normalize_exercise(name: str) -> str:
 
     # Lunges
     "lunges": "Lunges",
-    }
-
-    return mapping.get(cleaned, name)
-    
+}
+
+_word_re = re.compile(r"[a-z0-9]+")
+_review_queued = set()
+
+
+def clean_name(name: str) -> str:
+    # the mapping's key form: lowercase, single spaces
+    return re.sub(r"\s+", " ", name.strip().lower())
+
+
+def match_key(name: str) -> str:
+    # what the fuzzy index compares: lowercase words, shorthands expanded, no plural s
+    words = []
+    for word in _word_re.findall(name.lower()):
+        for w in ABBREVIATIONS.get(word, word).split():
+            words.append(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w)
+    return " ".join(words)
+
+
+def ngrams(key: str, n: int = NGRAM) -> set:
+    padded = f" {key} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+@lru_cache(maxsize=1)
+def _ngram_index() -> Tuple[List[Tuple[str, int]], Dict[str, List[int]]]:
+    # entries (canonical name, gram count) for every distinct key of the canonical names
+    # and aliases, and the inverted index gram -> entries containing it
+    keys = {}
+    for alias, canonical in EXERCISE_MAPPING.items():
+        keys.setdefault(match_key(alias), canonical)
+    for canonical in EXERCISE_MAPPING.values():
+        keys.setdefault(match_key(canonical), canonical)
+    entries, index = [], {}
+    for key, canonical in keys.items():
+        grams = ngrams(key)
+        for gram in grams:
+            index.setdefault(gram, []).append(len(entries))
+        entries.append((canonical, len(grams)))
+    return entries, index
+
+
+def candidates(name: str, top: int = 3) -> List[Tuple[str, float]]:
+    # best canonical names for a name, by Dice similarity of their trigram sets
+    entries, index = _ngram_index()
+    grams = ngrams(match_key(name))
+    shared = Counter()
+    for gram in grams:
+        shared.update(index.get(gram, ()))
+    best = {}
+    for entry, count in shared.items():
+        canonical, size = entries[entry]
+        score = 2 * count / (len(grams) + size)
+        if score > best.get(canonical, 0.0):
+            best[canonical] = score
+    return sorted(best.items(), key=lambda kv: -kv[1])[:top]
+
+
+@lru_cache(maxsize=EXERCISE_CACHE_SIZE)
+def resolve_exercise(cleaned: str) -> Tuple[Optional[str], float, str]:
+    # lowercased name -> (best canonical name or None, score, "exact" | "accept" | "review" | "none")
+    if cleaned in EXERCISE_MAPPING:
+        return EXERCISE_MAPPING[cleaned], 1.0, "exact"
+    found = candidates(cleaned, top=2)
+    if not found:
+        return None, 0.0, "none"
+    (best, score), runner_up = found[0], (found[1][1] if len(found) > 1 else 0.0)
+    if score >= AUTO_ACCEPT and score - runner_up >= AUTO_MARGIN:
+        return best, score, "accept"
+    if score >= REVIEW_THRESHOLD:
+        return best, score, "review"
+    return best, score, "none"
+
+
+def save_exercise_review(name: str, candidate: str, score: float) -> None:
+    EXERCISE_REVIEW.parent.mkdir(parents=True, exist_ok=True)
+    write_header = not EXERCISE_REVIEW.exists()
+    with open(EXERCISE_REVIEW, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(REVIEW_COLUMNS)
+        writer.writerow([name, candidate, round(score, 3)])
+
+
+def normalize_exercise(name: str,
+                       review_fn: Optional[Callable[[str, str, float], None]] = save_exercise_review) -> str:
+    # canonical name, or the name itself when it isn't (confidently) a known exercise;
+    # review_fn gets each unsure name once per process (None: no review queue)
+    if not name or pd.isna(name):
+        return name
+
+    canonical, score, decision = resolve_exercise(clean_name(name))
+    if decision in ("exact", "accept"):
+        return canonical
+    if decision == "review" and review_fn is not None:
+        queue_review(name, canonical, score, review_fn)
+    return name
+
+
+def queue_review(name: str, candidate: str, score: float,
+                 review_fn: Callable[[str, str, float], None] = save_exercise_review) -> None:
+    # once per name and process; also for names resolved in worker processes
+    cleaned = clean_name(name)
+    if cleaned in _review_queued:
+        return
+    _review_queued.add(cleaned)
+    review_fn(name.strip(), candidate, score)
+
+
+def clear_exercise_cache() -> None:
+    resolve_exercise.cache_clear()
+    _review_queued.clear()
+
+
+def pending_reviews(path=EXERCISE_REVIEW) -> pd.DataFrame:
+    # the review queue, one row per name (it is appended to by every run), names that
+    # EXERCISE_MAPPING has since learned left out
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame(columns=REVIEW_COLUMNS)
+    # writers append concurrently (dashboard worker processes), so the header may not come first
+    queue = pd.read_csv(path, names=REVIEW_COLUMNS, header=None, dtype="string")
+    queue = queue[queue["name"] != "name"].drop_duplicates("name", keep="last")
+    queue["score"] = pd.to_numeric(queue["score"], errors="coerce")
+    known = queue["name"].map(clean_name).isin(EXERCISE_MAPPING.keys())
+    return queue[~known].sort_values("score", ascending=False).reset_index(drop=True)
+
+
+def unique_exercises(df: pd.DataFrame, column: str = "exercise") -> pd.Series:
+    # sorted distinct exercise names, e.g. to review what the mapping above still misses
+    return (
+        df[column]
+        .astype(str)
+        .str.strip()
+        .drop_duplicates()
+        .sort_values()
+        .reset_index(drop=True)
+    )
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Resolve exercise names against the known exercises.")
+    ap.add_argument("names", nargs="*", help="exercise names as written in a log")
+    ap.add_argument("--pending", action="store_true", help="list the review queue")
+    args = ap.parse_args()
+
+    for raw in args.names:
+        canonical, score, decision = resolve_exercise(clean_name(raw))
+        print(f"{raw!r} -> {canonical!r} score {score:.3f} ({decision})")
+        if decision != "exact":
+            for candidate, cand_score in candidates(raw):
+                print(f"    {cand_score:.3f}  {candidate}")
+    if args.pending:
+        queue = pending_reviews()
+        print(f"{len(queue)} name(s) waiting for review in {EXERCISE_REVIEW}")
+        if not queue.empty:
+            print(queue.to_string(index=False))
@@ -0,0 +1,66 @@
+import os
+import hashlib
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from src.parsers.v1_parser import PARSER_VERSION
+from src.ml.fast_model import MODEL_PATH, FAST_MODEL_PATH
+
+# On-disk parse cache: parsed + normalized sets for one log file, stored as Parquet
+# under a key built from the file content, the parser version and the model file.
+# Survives restarts/redeploys; a new parser version or retrained model misses cleanly.
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+PARSE_CACHE_DIR = PROJECT_ROOT / "data_processed" / "parse_cache"
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:16]
+
+
+def model_version() -> str:
+    # digest of the classifier files in use (hashed once per file change)
+    parts = []
+    for path in (MODEL_PATH, FAST_MODEL_PATH):
+        if path.exists():
+            st = path.stat()
+            parts.append(_file_digest(str(path), st.st_mtime_ns, st.st_size))
+    return "-".join(parts) or "nomodel"
+
+
+def parse_cache_key(text: str) -> str:
+    content = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{content}-p{PARSER_VERSION}-m{model_version()}"
+
+
+def load_cached_parse(key: str, cache_dir: Path = PARSE_CACHE_DIR) -> Optional[pd.DataFrame]:
+    path = Path(cache_dir) / f"{key}.parquet"
+    if not path.exists():
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        # corrupt / partial entry: treat as a miss, it gets rewritten
+        return None
+
+
+def store_cached_parse(key: str, df: pd.DataFrame, cache_dir: Path = PARSE_CACHE_DIR) -> None:
+    cache_dir = Path(cache_dir)
+    tmp = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # write to a temp file and rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        os.close(fd)
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, cache_dir / f"{key}.parquet")
+    except Exception as e:
+        print(f"Parse cache write skipped: {e}")
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
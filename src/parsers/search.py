@@ -0,0 +1,218 @@
+import argparse
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+
+from src.parsers import db
+
+# Full-text search over set notes ("felt pain", "paused", "belt") and over the lines the
+# classifier was unsure about (the review file), instead of LIKE scans of sets_raw.
+# Every note / line is a row of search_docs with its context (athlete, date, exercise,
+# set or source line), indexed by the FTS5 table search_fts (porter stemming, so
+# "pause" finds "paused"). Writers add the docs of the sets they insert; deleting a
+# source's sets (db.delete_source_sets) deletes its docs, so the index is kept up to date
+# incrementally. A full load rebuilds it.
+#
+# Results come newest first. A doc's id is its date (days since 1970) shifted left by
+# ID_DAY_SHIFT plus a counter, so that order is the FTS index's own rowid order: a page
+# is read straight off the index and stops at LIMIT, instead of ranking every match
+# (which takes a second for a word in half a million notes). Lines have no date: they
+# count up from UNDATED_ID, below every dated id, so they sort last (newest first).
+#
+#   python -m src.parsers.search "felt pain"
+#   python -m src.parsers.search 'belt*' --kind note --exercise "Barbell Squat"
+
+PROJECT_ROOT = db.PROJECT_ROOT
+TO_REVIEW = PROJECT_ROOT / "data_labels" / "to_review.csv"  # hybrid_parse_all.TO_REVIEW
+
+KINDS = ["note", "line"]  # a set's notes, a low-confidence line
+DOC_COLUMNS = ["kind", "source_file", "athlete", "date", "program", "exercise", "set_no", "weight_kg",
+               "reps", "line_no", "confidence", "text"]
+RESULT_COLUMNS = DOC_COLUMNS + ["highlight"]
+REVIEW_COLUMNS = ["raw_line", "confidence", "source_file", "line_no"]
+SEARCH_LIMIT = 50
+ID_DAY_SHIFT = 20  # up to ~1M docs per day
+UNDATED_ID = -(1 << 62)  # first id of the docs without a date (negative, no cap in practice)
+EPOCH = pd.Timestamp("1970-01-01")
+HIGHLIGHT = ("[", "]")
+
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def note_docs(sets: pd.DataFrame) -> pd.DataFrame:
+    # sets_raw rows -> one doc per set with notes
+    if "notes" not in sets.columns:
+        return pd.DataFrame(columns=DOC_COLUMNS)
+    noted = sets[sets["notes"].notna() & (sets["notes"].astype(str).str.strip() != "")]
+    docs = pd.DataFrame({c: noted[c] if c in noted.columns else None for c in DOC_COLUMNS[1:-1]},
+                        index=noted.index)
+    docs["source_file"] = noted["_source_file"] if "_source_file" in noted.columns else None
+    docs["date"] = pd.to_datetime(docs["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    docs["line_no"] = None
+    docs["confidence"] = None
+    docs.insert(0, "kind", "note")
+    docs["text"] = noted["notes"].astype(str)
+    return docs.reset_index(drop=True)
+
+
+def line_docs(reviews: Iterable[Sequence], line_offset: int = 0, athlete: Optional[str] = None) -> pd.DataFrame:
+    # (raw_line, confidence, source_file, line_no) as passed to save_review_fn -> one doc per line;
+    # without athlete it follows from the source name, as for data_raw/ logs
+    from src.pipeline import athlete_for  # pipeline imports this module
+
+    lines = pd.DataFrame(list(reviews), columns=REVIEW_COLUMNS)
+    docs = pd.DataFrame({c: None for c in DOC_COLUMNS}, index=lines.index)
+    docs["kind"] = "line"
+    docs["source_file"] = lines["source_file"]
+    docs["athlete"] = athlete if athlete is not None else lines["source_file"].map(athlete_for)
+    docs["line_no"] = pd.to_numeric(lines["line_no"], errors="coerce") + line_offset
+    docs["confidence"] = pd.to_numeric(lines["confidence"], errors="coerce")
+    docs["text"] = lines["raw_line"].astype(str)
+    return docs
+
+
+def _with_ids(conn: sqlite3.Connection, docs: pd.DataFrame) -> pd.DataFrame:
+    # date-ordered ids, after the ids already used for each date
+    days = (pd.to_datetime(docs["date"], errors="coerce") - EPOCH).dt.days
+    base = days.where(days > 0, 0).fillna(0).astype("int64") * (1 << ID_DAY_SHIFT)
+    base = base.where(base > 0, UNDATED_ID)
+    counts = base.value_counts()
+    start = {}
+    for b, count in counts.items():
+        end = 0 if b == UNDATED_ID else int(b) + (1 << ID_DAY_SHIFT)
+        last = conn.execute("SELECT MAX(id) FROM search_docs WHERE id >= ? AND id < ?;",
+                            (int(b), end)).fetchone()[0]
+        start[b] = int(b) if last is None else last + 1
+        if start[b] + count > end:
+            day = (EPOCH + pd.Timedelta(days=int(b) >> ID_DAY_SHIFT)).strftime("%Y-%m-%d")
+            raise ValueError(f"search index: more than {1 << ID_DAY_SHIFT} docs dated {day} "
+                             f"(raise ID_DAY_SHIFT and rebuild the index)")
+    docs = docs.assign(id=base.map(start) + docs.groupby(base).cumcount())
+    return docs.sort_values("id")  # inserted in key order: appends, not page splits
+
+
+def index_sets(conn: sqlite3.Connection, sets: pd.DataFrame) -> None:
+    db.insert_frame(conn, "search_docs", _with_ids(conn, note_docs(sets)))
+
+
+def index_lines(conn: sqlite3.Connection, reviews: Iterable[Sequence], line_offset: int = 0,
+                athlete: Optional[str] = None) -> None:
+    db.insert_frame(conn, "search_docs", _with_ids(conn, line_docs(reviews, line_offset, athlete)))
+
+
+def replace_notes(conn: sqlite3.Connection, before: pd.DataFrame, after: pd.DataFrame) -> None:
+    # one set's notes changed (db.append_last_set_notes): its doc is replaced
+    old = before["notes"].iloc[0]
+    if isinstance(old, str) and old.strip():
+        conn.execute("DELETE FROM search_docs WHERE id = (SELECT MAX(id) FROM search_docs "
+                     "WHERE source_file = ? AND kind = 'note' AND text = ?);",
+                     (before["_source_file"].iloc[0], old))
+    index_sets(conn, after)
+
+
+def read_review_lines(path=TO_REVIEW, sources: Optional[Iterable[str]] = None) -> list:
+    # the review file's lines, for a full rebuild from the CSVs. It is appended to on every
+    # parse, so the last entry per (source, line) wins; with sources, other files are left out
+    path = Path(path)
+    if not path.exists():
+        return []
+    lines = pd.read_csv(path, dtype={"raw_line": "string", "source_file": "string"}, float_precision="round_trip")
+    lines = lines.dropna(subset=["raw_line"]).drop_duplicates(["source_file", "line_no"], keep="last")
+    if sources is not None:
+        lines = lines[lines["source_file"].isin(set(sources))]
+    return list(lines[REVIEW_COLUMNS].itertuples(index=False, name=None))
+
+
+def rebuild_index(conn: sqlite3.Connection, sets: pd.DataFrame, reviews: Iterable[Sequence]) -> None:
+    # replaces the whole index (after a full load of sets_raw); the FTS index and the source
+    # index are built in one pass each after the docs are in, much faster than row by row
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS search_fts;")
+        conn.execute("DROP TABLE IF EXISTS search_docs;")
+        db.ensure_search_tables(conn)
+        conn.execute("DROP TRIGGER search_docs_ai;")
+        conn.execute("DROP INDEX idx_search_docs_source;")
+        index_sets(conn, sets)
+        index_lines(conn, reviews)
+        conn.execute("INSERT INTO search_fts(search_fts) VALUES ('rebuild');")
+        db.ensure_search_tables(conn)
+
+
+def has_index(conn: sqlite3.Connection) -> bool:
+    return db.has_table(conn, "search_fts")
+
+
+def ensure_index(conn: sqlite3.Connection) -> None:
+    # creates the index; a database written before it existed gets the notes already in
+    # sets_raw (and the review file's lines of its sources) indexed once
+    if has_index(conn):
+        return
+    if not db.has_table(conn, "sets_raw") or not db.has_column(conn, "sets_raw", "_source_file"):
+        with conn:
+            db.ensure_search_tables(conn)
+        return
+    sets = pd.read_sql_query("SELECT * FROM sets_raw WHERE notes IS NOT NULL;", conn)
+    sources = [s for (s,) in conn.execute("SELECT DISTINCT _source_file FROM sets_raw;")]
+    rebuild_index(conn, sets, read_review_lines(TO_REVIEW, sources))
+
+
+def fts_query(text: str) -> str:
+    # user text -> FTS5 query: every word or "quoted phrase" must match, a trailing *
+    # matches by prefix. Anything else (AND, -, :, ...) is taken as text, not syntax.
+    terms = []
+    for phrase, word in _TERM.findall(text):
+        prefix = bool(word) and word.endswith("*")
+        term = (phrase or word.rstrip("*")).replace('"', '""').strip()
+        if re.search(r"\w", term):
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def search(conn: sqlite3.Connection, query: str, limit: int = SEARCH_LIMIT, offset: int = 0,
+           kind: Optional[str] = None, athlete: Optional[str] = None,
+           exercise: Optional[str] = None) -> pd.DataFrame:
+    # newest first (see ID_DAY_SHIFT); highlight marks the matched words
+    match = fts_query(query)
+    if not match or not has_index(conn):
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    where, params = ["search_fts MATCH ?"], [match]
+    for col, value in (("kind", kind), ("athlete", athlete), ("exercise", exercise)):
+        if value is not None:
+            where.append(f"d.{col} = ?")
+            params.append(value)
+    columns = ", ".join(f"d.{c}" for c in DOC_COLUMNS)
+    return pd.read_sql_query(f"""
+                    SELECT {columns}, highlight(search_fts, 0, ?, ?) AS highlight
+                      FROM search_fts
+                      JOIN search_docs d ON d.id = search_fts.rowid
+                     WHERE {' AND '.join(where)}
+                     ORDER BY search_fts.rowid DESC
+                     LIMIT ? OFFSET ?;
+    """, conn, params=[*HIGHLIGHT, *params, limit, offset])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Search set notes and low-confidence lines.")
+    ap.add_argument("query", help='words must all match; "quoted phrase", prefix*')
+    ap.add_argument("--db-path", default=str(db.DB_PATH))
+    ap.add_argument("--kind", choices=KINDS)
+    ap.add_argument("--athlete")
+    ap.add_argument("--exercise")
+    ap.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    args = ap.parse_args()
+
+    conn = db.connect_read_only(args.db_path)
+    try:
+        if not has_index(conn):
+            print("No search index in this database; run the pipeline's db stage or the watch daemon.")
+        else:
+            hits = search(conn, args.query, args.limit, kind=args.kind, athlete=args.athlete,
+                          exercise=args.exercise)
+            print(f"{len(hits)} match(es)")
+            if not hits.empty:
+                print(hits[["kind", "date", "exercise", "source_file", "line_no", "highlight"]].to_string(index=False))
+    finally:
+        conn.close()
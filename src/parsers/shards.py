@@ -0,0 +1,214 @@
+import argparse
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+from src.parsers.feature_engineering import build_daily_summary
+from src.parsers import db
+from src.analytics.weekly import period_start, PERIODS
+
+# Gym-scale storage: athletes are spread over SHARD_COUNT SQLite files by a stable hash
+# of their name, each shard holding the usual sets_raw / daily_exercise tables with an
+# athlete column. A per-athlete query opens one shard and uses its (athlete, exercise,
+# date) index, so its cost doesn't grow with the number of athletes; cross-athlete
+# queries run on every shard in parallel and merge the partial results.
+#
+#   python -m src.parsers.shards load                    # parse data_raw/<athlete>/*.txt into shards
+#   python -m src.parsers.shards leaderboard --exercise "Barbell Bench Press"
+#   python -m src.parsers.shards cohort --freq W
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+SHARD_DIR = PROJECT_ROOT / "data_processed" / "shards"
+SHARD_COUNT = 8
+
+
+def shard_index(athlete: str, n_shards: int = SHARD_COUNT) -> int:
+    # stable across processes and runs (unlike hash())
+    digest = hashlib.blake2b(str(athlete).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % n_shards
+
+
+def shard_path(index: int, shard_dir=SHARD_DIR) -> Path:
+    return Path(shard_dir) / f"shard_{index:03d}.db"
+
+
+def list_shards(shard_dir=SHARD_DIR) -> List[Path]:
+    return sorted(Path(shard_dir).glob("shard_*.db"))
+
+
+def open_shard(path) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    with conn:
+        db.ensure_table(conn, "sets_raw", db.SETS_RAW_COLUMNS)
+        db.ensure_table(conn, "daily_exercise", db.DAILY_COLUMNS)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sets_raw_athlete ON sets_raw(athlete, exercise, date);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_athlete ON daily_exercise(athlete, exercise, date);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_exercise_ex_date ON daily_exercise(exercise, date);")
+    return conn
+
+
+# Writes
+
+def write_sets(df_raw: pd.DataFrame, shard_dir=SHARD_DIR, n_shards: int = SHARD_COUNT) -> List[Path]:
+    # replaces the sets of every athlete in df_raw; returns the shards written
+    written = []
+    shard_ids = df_raw["athlete"].map(lambda a: shard_index(a, n_shards))
+    for index, part in df_raw.groupby(shard_ids):
+        path = shard_path(index, shard_dir)
+        conn = open_shard(path)
+        try:
+            with conn:
+                athletes = part["athlete"].unique().tolist()
+                conn.executemany("DELETE FROM sets_raw WHERE athlete = ?;", [(a,) for a in athletes])
+                db.insert_frame(conn, "sets_raw", part.reindex(columns=list(db.SETS_RAW_COLUMNS)))
+        finally:
+            conn.close()
+        written.append(path)
+    return written
+
+
+def build_shard_daily(path) -> int:
+    # feature engineering for one shard (all its athletes); runs in a worker process
+    conn = open_shard(path)
+    try:
+        raw = pd.read_sql_query("SELECT * FROM sets_raw;", conn)
+        daily = build_daily_summary(raw) if not raw.empty else pd.DataFrame(columns=list(db.DAILY_COLUMNS))
+        daily["date"] = pd.to_datetime(daily["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+        with conn:
+            conn.execute("DELETE FROM daily_exercise;")
+            db.insert_frame(conn, "daily_exercise", daily.reindex(columns=list(db.DAILY_COLUMNS)))
+        return len(daily)
+    finally:
+        conn.close()
+
+
+def build_daily_all(shard_paths: List[Path], workers: Optional[int] = None) -> int:
+    if not shard_paths:
+        return 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(build_shard_daily, shard_paths))
+
+
+# Reads
+
+def fan_out(query: Callable[[sqlite3.Connection], pd.DataFrame], shard_dir=SHARD_DIR,
+            workers: Optional[int] = None) -> pd.DataFrame:
+    # runs query(conn) on every shard in parallel and concatenates the results
+    def run(path):
+        conn = db.connect_read_only(path)
+        try:
+            return query(conn)
+        finally:
+            conn.close()
+
+    paths = list_shards(shard_dir)
+    with ThreadPoolExecutor(max_workers=workers or max(len(paths), 1)) as pool:
+        parts = [p for p in pool.map(run, paths) if not p.empty]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def athlete_daily(athlete: str, exercise: Optional[str] = None, start=None, end=None,
+                  shard_dir=SHARD_DIR, n_shards: int = SHARD_COUNT) -> pd.DataFrame:
+    path = shard_path(shard_index(athlete, n_shards), shard_dir)
+    if not path.exists():
+        return pd.DataFrame(columns=list(db.DAILY_COLUMNS))
+    where, params = ["athlete = ?"], [athlete]
+    if exercise is not None:
+        where.append("exercise = ?")
+        params.append(exercise)
+    if start is not None:
+        where.append("date >= ?")
+        params.append(str(start))
+    if end is not None:
+        where.append("date <= ?")
+        params.append(f"{end} 23:59:59")
+    conn = db.connect_read_only(path)
+    try:
+        return pd.read_sql_query(f"SELECT * FROM daily_exercise WHERE {' AND '.join(where)} ORDER BY date;",
+                                 conn, params=params)
+    finally:
+        conn.close()
+
+
+def leaderboard(exercise: str, metric: str = "max_1rm", top: int = 10, shard_dir=SHARD_DIR) -> pd.DataFrame:
+    # best value of `metric` per athlete for one exercise, highest first
+    if metric not in ("max_1rm", "best_weight_kg", "total_volume"):
+        raise ValueError(f"Unsupported metric: {metric}")
+
+    def query(conn):
+        return pd.read_sql_query(f"""
+                    SELECT athlete, MAX({metric}) AS {metric}, COUNT(*) AS sessions
+                      FROM daily_exercise
+                      WHERE exercise = ?
+                      GROUP BY athlete;
+        """, conn, params=(exercise,))
+
+    board = fan_out(query, shard_dir)
+    if board.empty:
+        return board
+    # an athlete lives in exactly one shard, so the partial rows need no re-aggregation
+    return board.sort_values(metric, ascending=False, kind="stable").head(top).reset_index(drop=True)
+
+
+def cohort_volume(freq: str = "W", start=None, end=None, shard_dir=SHARD_DIR) -> pd.DataFrame:
+    # total volume per period across all athletes, with active athletes and volume per athlete
+    def query(conn):
+        where, params = [], []
+        if start is not None:
+            where.append("date >= ?")
+            params.append(str(start))
+        if end is not None:
+            where.append("date <= ?")
+            params.append(f"{end} 23:59:59")
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        return pd.read_sql_query(f"""
+                    SELECT date, athlete, SUM(total_volume) AS total_volume
+                      FROM daily_exercise
+                      {clause}
+                      GROUP BY date, athlete;
+        """, conn, params=params)
+
+    per_day = fan_out(query, shard_dir)
+    if per_day.empty:
+        return pd.DataFrame(columns=[PERIODS[freq].lower(), "total_volume", "athletes", "volume_per_athlete"])
+    per_day["period"] = period_start(per_day["date"], freq)
+    out = per_day.groupby("period").agg(total_volume=("total_volume", "sum"),
+                                        athletes=("athlete", "nunique")).reset_index()
+    out["volume_per_athlete"] = out["total_volume"] / out["athletes"]
+    return out.rename(columns={"period": PERIODS[freq].lower()})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Per-athlete sharded storage.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="parse logs and (re)build the shards")
+    load.add_argument("--raw-dir", default=str(PROJECT_ROOT / "data_raw"))
+    load.add_argument("--workers", type=int, help="feature engineering processes (default: CPU count)")
+    board = sub.add_parser("leaderboard")
+    board.add_argument("--exercise", required=True)
+    board.add_argument("--metric", default="max_1rm")
+    board.add_argument("--top", type=int, default=10)
+    cohort = sub.add_parser("cohort")
+    cohort.add_argument("--freq", choices=list(PERIODS), default="W")
+    for p in (load, board, cohort):
+        p.add_argument("--shard-dir", default=str(SHARD_DIR))
+    args = ap.parse_args()
+
+    if args.command == "load":
+        from src.pipeline import parse_stage
+        df_raw = parse_stage(args.raw_dir)
+        paths = write_sets(df_raw, args.shard_dir)
+        n_daily = build_daily_all(paths, args.workers)
+        print(f"{len(df_raw)} sets from {df_raw['athlete'].nunique()} athlete(s) -> "
+              f"{len(paths)} shard(s), {n_daily} daily rows")
+    elif args.command == "leaderboard":
+        print(leaderboard(args.exercise, args.metric, args.top, args.shard_dir).to_string(index=False))
+    else:
+        print(cohort_volume(args.freq, shard_dir=args.shard_dir).to_string(index=False))
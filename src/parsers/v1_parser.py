@@ -1,28 +1,34 @@
 from __future__ import annotations
 import re
+import time
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Callable, Tuple
-from dateutil import parser as dateutil_parser
 import sqlite3
 import pandas as pd 
 
+from src.parsers.dates import normalize_date, count_date_votes, vote_order, is_ambiguous, DEFAULT_DATE_ORDER
+
+# bump when parse_log_content / normalize_exercise output changes (invalidates parse caches)
+PARSER_VERSION = "4"
+
 date_pattern = re.compile(r"^(\d{1,2}[\-_/]\d{1,2}[\-_/]\d{2,4})\s+(.+)$")
 
 section_pattern = re.compile(r"^\s*([A-Za-z][A-Za-z0-9\s\-\&\(\)]+):?\s*$")
 
+set_prefix = r"^S(?P<setno>\d+):\s*"
+
+set_alternatives = {
+    "weight": r"(?:(?P<weight>\d+(?:\.\d+)?)\s*(?:kg|kgs)?\s*[\u00D7xX\*]\s*(?P<reps>\d+(?:\.\d+)?(?:\s*\d+(?:\.\d+)?)?)\s*reps?)", # weight x reps
+    "weight_sec": r"(?:(?P<weight_sec>\d+(?:\.\d+)?)\s*(?:kg|kgs)?\s*[\u00D7xX\*]\s*(?P<time_with_weight>\d+(?:\.\d+)?)\s*sec\b)", # weight + sec
+    "sec_only": r"(?:(?P<sec_only>\d+(?:\.\d+)?)\s*sec\b)", # time only
+    "reps_only": r"(?:(?P<reps_only>\d+(?:\.\d+)?(?:\s*[\+\-]\s*\d+(?:\.\d+)?)?))\s*reps?\b", # reps only
+    "catch": r"(?P<catch>.+?)", # catch-all
+}
+
+set_suffix = r"(?:\s*\((?P<notes>.*?)\))?$"
+
 set_pattern = re.compile(
-    r"^S(?P<setno>\d+):\s*"
-    r"(?:"
-        r"(?:(?P<weight>\d+(?:\.\d+)?)\s*(?:kg|kgs)?\s*[\u00D7xX\*]\s*(?P<reps>\d+(?:\.\d+)?(?:\s*\d+(?:\.\d+)?)?)\s*reps?)" # weight x reps
-        r"|"
-        r"(?:(?P<weight_sec>\d+(?:\.\d+)?)\s*(?:kg|kgs)?\s*[\u00D7xX\*]\s*(?P<time_with_weight>\d+(?:\.\d+)?)\s*sec\b)" # weight + sec
-        r"|"
-        r"(?:(?P<sec_only>\d+(?:\.\d+)?)\s*sec\b)" # time only
-        r"|"
-        r"(?:(?P<reps_only>\d+(?:\.\d+)?(?:\s*[\+\-]\s*\d+(?:\.\d+)?)?))\s*reps?\b" # reps only
-        r"|"
-        r"(?P<catch>.+?)" # catch-all
-    r")?"
-    r"(?:\s*\((?P<notes>.*?)\))?$",
+    set_prefix + "(?:" + "|".join(set_alternatives.values()) + ")?" + set_suffix,
     re.IGNORECASE
 )
 
@@ -48,13 +54,6 @@ exclude_phrases = {p.lower() for p in [
 
 
 
-def normalize_date(datestr: str) -> Optional[str]:
-    try:
-        dt = dateutil_parser.parse(datestr, dayfirst=True)
-        return dt.date().isoformat()
-    except Exception:
-        return None
-
 def parse_reps_field(raw: str) -> Optional[int]:  # for things like '8', '8+2', '8-10'
 
     raw = raw.strip()
@@ -92,43 +91,209 @@ def compute_volume(weight: Optional[float], reps: Optional[int]) -> Optional[flo
         return None
     return weight * reps
 
+# Line-shape cache
+# Most log lines share a handful of shapes ("S<n>: <w>kg x <r> reps"), so the
+# date/section/set/exercise cascade is decided once per shape and reused.
+# The cascade regexes only test digit/whitespace classes, so a shape with
+# canonical digits and spaces always takes the same branch as every line that
+# produced it.
+
+SHAPE_CACHE_SIZE = 4096
+
+# set_pattern alternatives, in the order the field extraction checks them
+SET_TEMPLATES = tuple(set_alternatives)
+
+# one pattern per alternative (plus None for "S<n>:" with notes only). Matching
+# only the alternative cached for a shape gives the same groups as set_pattern,
+# since set_pattern picked that alternative as its first successful path.
+set_template_patterns = {
+    key: re.compile(set_prefix + "(?:" + alt + ")" + set_suffix, re.IGNORECASE)
+    for key, alt in set_alternatives.items()
+}
+set_template_patterns[None] = re.compile(set_prefix + set_suffix, re.IGNORECASE)
+
+# ASCII digits -> '0' (digit counts are kept, the date pattern depends on them).
+# Done on the UTF-8 bytes since bytes.translate is far cheaper than str.translate;
+# multi-byte characters never contain ASCII digit or space bytes.
+_shape_digits = bytes.maketrans(b"0123456789", b"0000000000")
+
+
+def line_shape(line: str) -> bytes:
+    return b" ".join(line.encode("utf-8").translate(_shape_digits).split())
+
+
+def _classify_line(line: str) -> Tuple[str, Optional[str]]:
+    # returns (branch, set template); branch is DATE, SECTION, SET, EXERCISE or OTHER
+    if date_pattern.match(line):
+        return ("DATE", None)
+
+    if section_pattern.match(line) or line.startswith('---'):
+        return ("SECTION", None)
+
+    m = set_pattern.match(line)
+    if m:
+        for key in SET_TEMPLATES:
+            if m.group(key):
+                return ("SET", key)
+        return ("SET", None)
+
+    if exercise_pattern.match(line):
+        return ("EXERCISE", None)
+
+    return ("OTHER", None)
+
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def classify_line_shape(shape: bytes) -> Tuple[str, Optional[str]]:
+    return _classify_line(shape.decode("utf-8"))
+
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def clean_exercise_name(cleaned: str) -> Optional[str]:
+    # returns the cleaned exercise name, or None when the line should not change
+    # the current exercise (notes, bare sets, rep counts)
+    cleaned_name = re.sub(r"\s{2,}", " ", cleaned)
+    if not cleaned_name or cleaned_name.endswith(':'):
+        return None
+
+    if cleaned_name.startswith('(') and cleaned_name.endswith(')'):
+        return None
+    if re.match(r"^\d+(\s*kg)?\s*[×xX]\s*\d+", cleaned_name):
+        return None
+    if re.match(r"^\d+(\s*reps?)?$", cleaned_name, re.IGNORECASE):
+        return None
+    final_name = cleaned_name
+
+    # Remove rep ranges and notes from exercise names
+    final_name = re.sub(
+        r"\s*\(\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})?\s*(?:reps?|rep)?\s*\)\s*$",
+        "",
+        final_name,
+        flags=re.IGNORECASE
+    )
+    # Remove trailing unparenthesized ranges like "5-8 reps" or "8-10"
+    final_name = re.sub(
+        r"\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})\s*(?:reps?|rep)?\s*$",
+        "",
+        final_name,
+        flags=re.IGNORECASE
+    )
+    # Remove notes in exersise name
+    final_name = re.sub(r"[\(\[\{][^\)\]\}]*[\)\]\}]", "", final_name)
+
+    # remove any leftover rep ranges like "5-8 reps" at end
+    final_name = re.sub(
+        r"\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})\s*(?:reps?|rep)?\s*$",
+        "",
+        final_name,
+        flags=re.IGNORECASE
+    )
+
+    # final cleanup
+    final_name = re.sub(r"\s{2,}", " ", final_name.strip())
+    return final_name or None
+
+
+def shape_cache_info() -> Dict[str, Any]:
+    # hit/miss counters for the shape and exercise-name caches
+    out = {}
+    for name, fn in (("shape", classify_line_shape), ("exercise_name", clean_exercise_name)):
+        info = fn.cache_info()
+        lookups = info.hits + info.misses
+        out[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
+    return out
+
+
+def clear_shape_cache() -> None:
+    classify_line_shape.cache_clear()
+    clean_exercise_name.cache_clear()
+
+
+def content_lines(raw_log_content: str) -> List[str]:
+    # the lines parse_log_content reads (no blank lines or # comments); review line numbers count these
+    lines = [ln.rstrip() for ln in raw_log_content.splitlines()]
+    return [ln for ln in lines if ln and not ln.strip().startswith('#')]
+
+
 def parse_log_content(raw_log_content: str, *, source_file: Optional[str] = None,
                       ml_label_fn: Optional[Callable[[str], Tuple[str, float]]] = None,
                       save_review_fn: Optional[Callable[[str, float, str, int], None]] = None,
-                      conf_threshold: float = 0.60
+                      conf_threshold: float = 0.60,
+                      use_shape_cache: bool = True,
+                      stats: Optional[Any] = None,
+                      state: Optional[Dict[str, Optional[str]]] = None
                       ) -> List[Dict[str, Any]]:
+    # stats: optional src.parsers.instrument.ParseStats collecting branch counts and timings
+    # state: optional {"date", "program", "exercise"} to resume from (e.g. when parsing only
+    # the bytes appended to a log); updated in place with the context at the end of the text.
+    # NOTE lines that come before the first set of the text belong to the last set of the
+    # earlier text, which is not in `rows`: they are left in state["notes"] for the caller.
+
+    # day/month order of the date headers, voted on by the first headers of the log: the
+    # votes of earlier chunks (state["date_votes"]) are counted on with this text's headers
+    if state and state.get("date_votes") is None and state.get("date_order"):
+        date_votes, date_order = None, state["date_order"]  # state saved before votes were kept
+    else:
+        date_votes = count_date_votes(raw_log_content, votes=state.get("date_votes") if state else None)
+        date_order = vote_order(date_votes)
+    read_order = date_order or DEFAULT_DATE_ORDER
+
+    if stats is not None:
+        parse_start = time.perf_counter()
+        ml_label_fn = stats.timed_ml(ml_label_fn)
+        save_review_fn = stats.timed("review_write", save_review_fn)
+        date_fn = stats.timed("date_parse", normalize_date)
+        branch_counts = stats.branches
+    else:
+        date_fn = normalize_date
+
     rows: List[Dict[str, Any]] = []
-    lines = [ln.rstrip() for ln in raw_log_content.splitlines()]
-    lines = [ln for ln in lines if ln and not ln.strip().startswith('#')]
+    lines = content_lines(raw_log_content)
 
-    current_date: Optional[str] = None
-    current_program: Optional[str] = None
-    current_exercise: Optional[str] = None
+    current_date: Optional[str] = state.get("date") if state else None
+    current_program: Optional[str] = state.get("program") if state else None
+    current_exercise: Optional[str] = state.get("exercise") if state else None
 
     for i, raw_line in enumerate(lines, start=1):
         line = raw_line.strip()
 
+        if use_shape_cache:
+            branch, template = classify_line_shape(line_shape(line))
+        else:
+            branch, template = _classify_line(line)
+
+        if stats is not None:
+            branch_counts[branch] += 1
+
         # date line
 
-        m = date_pattern.match(line)
-        if m:
+        if branch == "DATE":
+            m = date_pattern.match(line)
             raw_date = m.group(1)
-            current_date = normalize_date(raw_date) or raw_date
+            current_date = date_fn(raw_date, read_order) or raw_date
+            if stats is not None and is_ambiguous(raw_date):
+                stats.record_ambiguous_date(source_file, raw_date, current_date,
+                                            "detected" if date_order else "default")
             current_program = m.group(2).strip()
             current_exercise = None
             continue
 
         # section/header
 
-        if section_pattern.match(line) or line.strip().startswith('---'):
+        if branch == "SECTION":
             current_exercise = None
             continue
         
         # set pattern
 
-        m = set_pattern.match(line)
-        if m:
-            gd = m.groupdict()
+        if branch == "SET":
+            gd = set_template_patterns[template].match(line).groupdict()
             set_no = int(gd.get('setno'))
             weight = None
             reps = None
@@ -137,13 +302,13 @@ def parse_log_content(raw_log_content: str, *, source_file: Optional[str] = None
             note = gd.get('notes').strip() if gd.get('notes') else None
 
             # weight x reps
-            if gd.get('weight') and gd.get('reps'):
+            if template == "weight":
                 weight = parse_weight_field(gd.get('weight'))
                 reps = parse_reps_field(gd.get('reps'))
             
             # weight x sec
 
-            elif gd.get('weight_sec') and gd.get('time_with_weight'):
+            elif template == "weight_sec":
                 weight = parse_weight_field(gd.get('weight_sec'))
                 try:
                     time_sec = float(gd.get('time_with_weight'))
@@ -155,18 +320,18 @@ def parse_log_content(raw_log_content: str, *, source_file: Optional[str] = None
                     iso_load = weight * time_sec
             
             # sec only
-            elif gd.get('sec_only'):
+            elif template == "sec_only":
                 try:
                     time_sec = float(gd.get('sec_only'))
                 except:
                     time_sec = None
             
             # reps only
-            elif gd.get('reps_only'):
+            elif template == "reps_only":
                 reps = parse_reps_field(gd.get('reps_only'))
 
             #catch-all 
-            elif gd.get('catch'):
+            elif template == "catch":
                 catch = gd.get('catch').strip()
                 num_match = re.search(r"(\d+)", catch)
                 if num_match:
@@ -179,8 +344,6 @@ def parse_log_content(raw_log_content: str, *, source_file: Optional[str] = None
 
             volume = compute_volume(weight, reps) if (weight is not None and reps is not None) else None
 
-            has_numeric = (reps is not None or weight is not None or time_sec is not None or iso_load is not None)
-
             if current_exercise and current_date and (reps is not None or weight is not None or time_sec is not None or iso_load is not None or note):
                 rows.append({
                     "date": current_date,
@@ -198,55 +361,14 @@ def parse_log_content(raw_log_content: str, *, source_file: Optional[str] = None
             
         # exercise name detection 
 
-        m = exercise_pattern.match(line)
-        if m:
-            raw_name = m.group(1).strip()
-            cleaned = clean_prefix.sub("",raw_name).strip()
-            # normalize spacing and capitalization
-            cleaned_name = re.sub(r"\s{2,}", " ", cleaned)
-            if cleaned_name and not cleaned_name.endswith(':'):
-
-                if cleaned_name.startswith('(') and cleaned_name.endswith(')'):
-                    continue
-                if re.match(r"^\d+(\s*kg)?\s*[×xX]\s*\d+", cleaned_name):
-                    continue
-                if re.match(r"^\d+(\s*reps?)?$", cleaned_name, re.IGNORECASE):
-                    continue
-                final_name = cleaned_name
-
-                # Remove rep ranges and notes from exercise names
-                final_name = re.sub(
-                    r"\s*\(\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})?\s*(?:reps?|rep)?\s*\)\s*$",
-                    "",
-                    final_name,
-                    flags=re.IGNORECASE
-                )
-                # Remove trailing unparenthesized ranges like "5-8 reps" or "8-10"
-                final_name = re.sub(
-                    r"\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})\s*(?:reps?|rep)?\s*$",
-                    "",
-                    final_name,
-                    flags=re.IGNORECASE
-                )
-                # Remove notes in exersise name
-                final_name = re.sub(r"[\(\[\{][^\)\]\}]*[\)\]\}]", "", final_name)
-
-                # remove any leftover rep ranges like "5-8 reps" at end
-                final_name = re.sub(
-                    r"\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})\s*(?:reps?|rep)?\s*$",
-                    "",
-                    final_name,
-                    flags=re.IGNORECASE
-                )
-
-                # final cleanup
-                final_name = re.sub(r"\s{2,}", " ", final_name.strip())
-
-                if final_name:
-                    if final_name.lower() in exclude_phrases:
-                        current_exercise = None
-                    else:
-                        current_exercise = final_name
+        if branch == "EXERCISE":
+            raw_name = exercise_pattern.match(line).group(1).strip()
+            final_name = clean_exercise_name(clean_prefix.sub("", raw_name).strip())
+            if final_name:
+                if final_name.lower() in exclude_phrases:
+                    current_exercise = None
+                else:
+                    current_exercise = final_name
             continue
 
 
@@ -282,53 +404,12 @@ def parse_log_content(raw_log_content: str, *, source_file: Optional[str] = None
             # if ML says its and exercise
 
             if label == "EXERCISE":
-                cleaned = clean_prefix.sub("", line).strip()
-                cleaned_name = re.sub(r"\s{2,}"," ", cleaned)
-                if cleaned_name and not cleaned_name.endswith(':'):
-
-                    if cleaned_name.startswith('(') and cleaned_name.endswith(')'):
-                        continue
-                    if re.match(r"^\d+(\s*kg)?\s*[×xX]\s*\d+", cleaned_name):
-                        continue
-                    if re.match(r"^\d+(\s*reps?)?$", cleaned_name, re.IGNORECASE):
-                        continue
-                    
-                    final_name = cleaned_name
-
-                    # Remove rep ranges and notes from exercise names
-                    final_name = re.sub(
-                        r"\s*\(\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})?\s*(?:reps?|rep)?\s*\)\s*$",
-                        "",
-                        final_name,
-                        flags=re.IGNORECASE
-                        )
-                    # Remove trailing unparenthesized ranges like "5-8 reps" or "8-10"
-                    final_name = re.sub(
-                        r"\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})\s*(?:reps?|rep)?\s*$",
-                        "",
-                        final_name,
-                        flags=re.IGNORECASE
-                        )
-                    # Remove notes in exersise name
-                    final_name = re.sub(r"[\(\[\{][^\)\]\}]*[\)\]\}]", "", final_name)
-
-                    # remove any leftover rep ranges (rare) like "5-8 reps" at end
-                    final_name = re.sub(
-                        r"\s*\d{1,3}\s*(?:[-–—]\s*\d{1,3})\s*(?:reps?|rep)?\s*$",
-                        "",
-                        final_name,
-                        flags=re.IGNORECASE
-                        )
-
-                    # final cleanup
-                    final_name = re.sub(r"\s{2,}", " ", final_name.strip())
-
-                    if final_name:
-                        if final_name.lower() in exclude_phrases:
-                            current_exercise = None
-                        else:
-                            current_exercise = final_name
-                
+                final_name = clean_exercise_name(clean_prefix.sub("", line).strip())
+                if final_name:
+                    if final_name.lower() in exclude_phrases:
+                        current_exercise = None
+                    else:
+                        current_exercise = final_name
                 continue
 
             # if ML says it's NOTE / SECTION / OTHER
@@ -338,10 +419,16 @@ def parse_log_content(raw_log_content: str, *, source_file: Optional[str] = None
                 if rows:
                     prev = rows[-1]
                     prev["notes"] = (prev.get("notes") or "") + ((" ; " + line) if prev.get("notes") else line)
+                elif state is not None:
+                    state.setdefault("notes", []).append(line)
                 continue
 
 
             continue
 
+    if state is not None:
+        state.update(date=current_date, program=current_program, exercise=current_exercise,
+                     date_order=date_order, date_votes=date_votes)
+    if stats is not None:
+        stats.record_file(source_file, len(lines), len(rows), time.perf_counter() - parse_start)
     return rows
-
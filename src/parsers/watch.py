@@ -0,0 +1,267 @@
+import argparse
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from src.parsers.hybrid_parse_all import parse_text, CONF_THRESHOLD
+from src.parsers.v1_parser import content_lines
+from src.parsers.dates import DEFAULT_DATE_ORDER
+from src.parsers.feature_engineering import build_daily_summary
+from src.parsers import db, search
+from src.parsers.dedupe import DedupeIndex, load_index
+from src.pipeline import RAW_COLUMNS, list_logs, source_name, athlete_for
+
+# Watch-folder ingestion: keeps workouts.db in sync with data_raw/ while logs are edited.
+# Only the bytes appended since the last ingest are parsed, starting from the stored
+# parser context (date / program / exercise), and only the daily summary groups those
+# sets touch are recomputed. A file that was rewritten rather than appended to (any
+# byte before the stored offset changed, or it shrank) is re-ingested from scratch; a
+# deleted file's sets are removed. The per-file state lives in the DB (ingest_state) and is written in the
+# same transaction as the sets, so a restart resumes exactly where it stopped.
+#
+#   python -m src.parsers.watch               # catch up, then watch until Ctrl+C
+#   python -m src.parsers.watch --once        # catch up and exit
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+RAW_DIR = PROJECT_ROOT / "data_raw"
+
+DEBOUNCE_SECONDS = 0.3  # quiet time after the last event before a file is ingested
+POLL_SECONDS = 0.05
+
+
+def open_db(db_path=db.DB_PATH) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL;")  # dashboard readers are not blocked by ingest writes
+    with conn:
+        db.ensure_table(conn, "sets_raw", db.SETS_RAW_COLUMNS)
+        db.ensure_table(conn, "daily_exercise", db.DAILY_COLUMNS)
+        db.ensure_ingest_state(conn)
+        db.ensure_dedupe_tables(conn)
+        db.create_indexes(conn)
+    search.ensure_index(conn)
+    return conn
+
+
+def read_new_lines(path: Path, entry: Optional[Dict]):
+    # returns (text after the stored offset, new offset, rewritten?, ends without a newline?,
+    # sha256 of the bytes up to the new offset). Everything before the stored offset must
+    # hash to the stored prefix_sha, so an edit anywhere in the ingested part is a rewrite
+    # (state saved before prefix hashing has no prefix_sha and is ingested again once).
+    # Files are only read once they have been quiet (debounce, catch-up), so a last line
+    # without a newline is complete and read too. If that line grows later instead of a
+    # new line starting after it, the file is read again from the start.
+    with open(path, "rb") as f:
+        data = f.read()
+    view = memoryview(data)
+    offset = 0
+    prefix = hashlib.sha256()
+    if entry is not None and len(data) >= entry["offset"]:
+        prefix.update(view[:entry["offset"]])
+        continues = not (entry.get("partial") and len(data) > entry["offset"]
+                         and data[entry["offset"]] not in b"\r\n")
+        if continues and prefix.hexdigest() == entry.get("prefix_sha"):
+            offset = entry["offset"]
+        else:
+            prefix = hashlib.sha256()
+    rewritten = entry is not None and offset != entry["offset"]
+    prefix.update(view[offset:])
+    new = data[offset:]
+    partial = bool(new) and not new.endswith(b"\n")
+    return new.decode("utf-8", errors="replace"), len(data), rewritten, partial, prefix.hexdigest()
+
+
+def refresh_daily(conn: sqlite3.Connection, keys: pd.DataFrame) -> None:
+    # recompute the daily summary rows of the given (athlete, date, program, exercise) groups
+    if keys.empty:
+        return
+    raw = db.fetch_group_sets(conn, keys)
+    daily_keys = keys[db.GROUP_COLUMNS].copy()
+    daily_keys["date"] = pd.to_datetime(daily_keys["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    db.delete_daily_groups(conn, daily_keys.dropna(subset=["date"]))
+    if raw.empty:
+        return
+    daily = build_daily_summary(raw)
+    daily["date"] = daily["date"].dt.strftime("%Y-%m-%d")
+    db.insert_frame(conn, "daily_exercise", daily)
+
+
+def ingest_file(conn: sqlite3.Connection, path: Path, name: str, entry: Optional[Dict],
+                conf_threshold: float = CONF_THRESHOLD, index: Optional[DedupeIndex] = None) -> Optional[Dict]:
+    # parses what is new in `path` (source `name`), updates the DB and returns the file's new state.
+    # With an index, sets another file already holds are left out.
+    text, offset, rewritten, partial, prefix_sha = read_new_lines(path, entry)
+    if entry is not None and not rewritten and offset == entry["offset"]:
+        return entry
+
+    athlete = athlete_for(name)
+    touched = []
+    from_start = entry is None or rewritten
+    if from_start:
+        # also drops sets a batch load (pipeline db stage, async ingest, db.py) stored without ingest state
+        touched.append(db.delete_source_sets(conn, name))
+        if index is not None:
+            index.forget(name, conn)
+    parser_state = {} if from_start else dict(entry["parser"])
+    lines_before = 0 if from_start else entry.get("lines", 0)
+
+    reviews = []
+    rows = parse_text(text, name, conf_threshold, state=parser_state, reviews=reviews) if text else []
+    if not from_start and (parser_state.get("date_order") or DEFAULT_DATE_ORDER) != \
+            (entry["parser"].get("date_order") or DEFAULT_DATE_ORDER):
+        # the new headers decided the day/month order: the earlier part was read the other way
+        return ingest_file(conn, path, name, None, conf_threshold, index)
+    carried = parser_state.pop("notes", None)  # notes of the last set ingested before
+    if carried:
+        changed = db.append_last_set_notes(conn, name, carried)
+        if changed is not None:
+            search.replace_notes(conn, *changed)
+    for r in rows:
+        r["_source_file"] = name
+        r["athlete"] = athlete
+    if index is not None:
+        rows = index.claim(rows, name, conn)
+    new_sets = pd.DataFrame(rows, columns=RAW_COLUMNS)
+    db.insert_frame(conn, "sets_raw", new_sets)
+    touched.append(new_sets[db.GROUP_COLUMNS])
+    search.index_sets(conn, new_sets)
+    search.index_lines(conn, reviews, line_offset=lines_before, athlete=athlete)  # numbered from the file start
+
+    refresh_daily(conn, pd.concat(touched, ignore_index=True).drop_duplicates())
+
+    new_entry = {"offset": offset, "prefix_sha": prefix_sha, "parser": parser_state,
+                 "lines": lines_before + len(content_lines(text)), "partial": partial}
+    db.save_ingest_state(conn, name, new_entry)
+    print(f"{name}: +{len(new_sets)} sets" + (" (file rewritten, re-ingested)" if rewritten else ""))
+    return new_entry
+
+
+def remove_file(conn: sqlite3.Connection, name: str, index: Optional[DedupeIndex] = None) -> None:
+    refresh_daily(conn, db.delete_source_sets(conn, name))
+    db.save_ingest_state(conn, name, None)
+    if index is not None:
+        index.forget(name, conn)
+    print(f"{name}: removed")
+
+
+def reingest_file(conn: sqlite3.Connection, path: Path, name: str, index: DedupeIndex,
+                  conf_threshold: float = CONF_THRESHOLD) -> Optional[Dict]:
+    # parses the whole file again, e.g. to get back duplicates whose owning file has gone
+    return ingest_file(conn, path, name, None, conf_threshold, index)
+
+
+def sync_path(conn: sqlite3.Connection, raw_dir: Path, path: Path, states: Dict[str, Dict],
+              conf_threshold: float = CONF_THRESHOLD, index: Optional[DedupeIndex] = None) -> None:
+    # one transaction per file: sets, daily rows and ingest state change together. If it
+    # fails, the file is skipped and `states` and `index` are read back from the DB, so
+    # they match what was rolled back; the next event or run ingests the file again.
+    name = source_name(path, raw_dir)
+    if name.count("/") > 1:  # only data_raw/*.txt and data_raw/<athlete>/*.txt are logs
+        return
+    try:
+        with conn:
+            if path.exists():
+                states[name] = ingest_file(conn, path, name, states.get(name), conf_threshold, index)
+            elif name in states:
+                remove_file(conn, name, index)
+                del states[name]
+            # files that dropped sets this file no longer has must be parsed again
+            done = {name}
+            while index is not None:
+                orphaned = sorted(s for s in index.orphaned_sources() - done if s in states)
+                if not orphaned:
+                    break
+                for other in orphaned:
+                    done.add(other)
+                    if (raw_dir / other).exists():
+                        states[other] = reingest_file(conn, raw_dir / other, other, index, conf_threshold)
+    except Exception as e:  # e.g. the file vanished between the check and the read
+        print(f"{name}: skipped ({type(e).__name__}: {e})")
+        states.clear()
+        states.update(db.load_ingest_state(conn))
+        if index is not None:
+            index.reload(conn)
+
+
+def catch_up(conn: sqlite3.Connection, raw_dir: Path, states: Dict[str, Dict],
+             conf_threshold: float = CONF_THRESHOLD, index: Optional[DedupeIndex] = None) -> None:
+    present = {source_name(p, raw_dir): p for p in list_logs(raw_dir)}
+    for name in list(states):
+        if name not in present:
+            sync_path(conn, raw_dir, raw_dir / name, states, conf_threshold, index)
+    for path in present.values():
+        sync_path(conn, raw_dir, path, states, conf_threshold, index)
+
+
+class _DebouncedHandler(FileSystemEventHandler):
+    # records the time of the last event per .txt path; the main loop ingests paths
+    # once they have been quiet for the debounce interval
+
+    def __init__(self):
+        self.pending: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for p in (event.src_path, getattr(event, "dest_path", None)):
+            if p and str(p).endswith(".txt"):
+                with self.lock:
+                    self.pending[str(p)] = time.monotonic()
+
+    def due(self, debounce: float):
+        now = time.monotonic()
+        with self.lock:
+            ready = [p for p, t in self.pending.items() if now - t >= debounce]
+            for p in ready:
+                del self.pending[p]
+        return ready
+
+
+def watch(raw_dir=RAW_DIR, db_path=db.DB_PATH, debounce: float = DEBOUNCE_SECONDS,
+          conf_threshold: float = CONF_THRESHOLD, once: bool = False) -> None:
+    raw_dir = Path(raw_dir).resolve()  # event paths are absolute
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    conn = open_db(db_path)
+    states = db.load_ingest_state(conn)
+    index = load_index(conn)
+    catch_up(conn, raw_dir, states, conf_threshold, index)
+    if once:
+        conn.close()
+        return
+
+    handler = _DebouncedHandler()
+    observer = Observer()
+    observer.schedule(handler, str(raw_dir), recursive=True)  # athlete subfolders
+    observer.start()
+    print(f"Watching {raw_dir} -> {db_path} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(POLL_SECONDS)
+            for p in handler.due(debounce):
+                sync_path(conn, raw_dir, Path(p), states, conf_threshold, index)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
+        conn.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Watch data_raw/ and ingest new log lines into the DB.")
+    ap.add_argument("--raw-dir", default=str(RAW_DIR))
+    ap.add_argument("--db-path", default=str(db.DB_PATH))
+    ap.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, help="seconds of quiet before ingesting")
+    ap.add_argument("--conf-threshold", type=float, default=CONF_THRESHOLD)
+    ap.add_argument("--once", action="store_true", help="ingest pending changes and exit")
+    args = ap.parse_args()
+    watch(args.raw_dir, args.db_path, args.debounce, args.conf_threshold, args.once)
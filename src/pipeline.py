@@ -0,0 +1,226 @@
+import argparse
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.parsers.hybrid_parse_all import parse_text, CONF_THRESHOLD
+from src.parsers.feature_engineering import build_daily_summary, write_daily_summary_chunked
+from src.parsers.normalize import unique_exercises
+from src.parsers.instrument import ParseStats
+from src.parsers.dedupe import DedupeIndex, print_overlaps
+from src.parsers import db, search
+
+# Single entry point for the ETL stages (parse -> features -> exercises -> db).
+# `all` hands DataFrames from stage to stage in memory and only writes the final
+# artifacts; the single-stage commands read their input from the previous stage's
+# CSV, like the old per-script workflow.
+#
+#   python -m src.pipeline all
+#   python -m src.pipeline all --data-root /data/workouts --no-csv
+#   python -m src.pipeline features --out-dir /tmp/processed
+#   python -m src.pipeline features --chunk-rows 100000     # stream the raw sets CSV
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CURRENT_DIR.parent
+
+RAW_COLUMNS = ["_source_file", "athlete", "date", "program", "exercise", "set_no", "weight_kg", "reps",
+               "time_sec", "iso_load", "volume", "notes"]
+
+# dtypes used when a stage reads the previous stage's CSV
+RAW_DTYPES = {"_source_file": "string", "athlete": "string", "date": "string", "program": "string",
+              "exercise": "string", "set_no": "float64", "weight_kg": "float64", "reps": "float64", "time_sec": "float64",
+              "iso_load": "float64", "volume": "float64", "notes": "string"}
+
+
+# Logs directly in data_raw/ belong to DEFAULT_ATHLETE; data_raw/<athlete>/*.txt to <athlete>.
+# Sources are named by their path relative to data_raw/ ("alice/week1.txt").
+DEFAULT_ATHLETE = "default"
+
+
+def list_logs(raw_dir) -> List[Path]:
+    raw_dir = Path(raw_dir)
+    return sorted(raw_dir.glob("*.txt")) + sorted(raw_dir.glob("*/*.txt"))
+
+
+def source_name(path, raw_dir) -> str:
+    return Path(path).relative_to(raw_dir).as_posix()
+
+
+def athlete_for(source: str) -> str:
+    return source.split("/", 1)[0] if "/" in source else DEFAULT_ATHLETE
+
+
+def pipeline_paths(data_root=PROJECT_ROOT, raw_dir=None, out_dir=None, db_path=None) -> Dict[str, Path]:
+    data_root = Path(data_root)
+    out_dir = Path(out_dir) if out_dir else data_root / "data_processed"
+    return {
+        "raw_dir": Path(raw_dir) if raw_dir else data_root / "data_raw",
+        "raw_sets": out_dir / "workouts_raw_sets.csv",
+        "daily": out_dir / "workouts_daily_exercise.csv",
+        "exercises": out_dir / "unique_exercises.csv",
+        "db": Path(db_path) if db_path else out_dir / "workouts.db",
+    }
+
+
+@contextmanager
+def timed_stage(name: str, timings: List[Dict]):
+    start = time.perf_counter()
+    entry = {"stage": name, "rows": None}
+    yield entry
+    entry["seconds"] = time.perf_counter() - start
+    timings.append(entry)
+    rows = f", {entry['rows']} rows" if entry["rows"] is not None else ""
+    print(f"[{name}] {entry['seconds']:.2f}s{rows}")
+
+
+# Stages
+
+def parse_stage(raw_dir, conf_threshold: float = CONF_THRESHOLD,
+                stats: Optional[ParseStats] = None, index: Optional[DedupeIndex] = None,
+                reviews: Optional[List] = None) -> pd.DataFrame:
+    # sets already parsed from an earlier file (see dedupe.py) are dropped; low-confidence
+    # lines are collected in reviews (for the search index) when it is given
+    index = index if index is not None else DedupeIndex()
+    all_rows = []
+    for path in list_logs(raw_dir):
+        source = source_name(path, raw_dir)
+        athlete = athlete_for(source)
+        rows = parse_text(path.read_text(encoding="utf-8"), source, conf_threshold, stats=stats, reviews=reviews)
+        for r in rows:
+            r["_source_file"] = source
+            r["athlete"] = athlete
+        all_rows.extend(index.claim(rows, source))
+    return pd.DataFrame(all_rows, columns=RAW_COLUMNS) if all_rows else pd.DataFrame(columns=RAW_COLUMNS)
+
+
+def features_stage(df_raw: pd.DataFrame) -> pd.DataFrame:
+    return build_daily_summary(df_raw)
+
+
+def exercises_stage(df_raw: pd.DataFrame) -> pd.Series:
+    return unique_exercises(df_raw)
+
+
+def db_stage(df_raw: pd.DataFrame, daily: pd.DataFrame, db_path, index: Optional[DedupeIndex] = None,
+             reviews: Optional[List] = None) -> None:
+    # dates are stored as 'YYYY-MM-DD' text, as they are when loaded from the CSVs
+    daily = daily.assign(date=pd.to_datetime(daily["date"], errors="coerce").dt.strftime("%Y-%m-%d"))
+    if index is None:
+        index = DedupeIndex.from_sets(df_raw)  # loaded from the CSVs, already deduplicated
+    if reviews is None:
+        reviews = search.read_review_lines(sources=df_raw["_source_file"].dropna().unique())
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        db.load_frames_to_db(conn, df_raw, daily)
+        with conn:
+            index.save(conn)
+        search.rebuild_index(conn, df_raw, reviews)
+    finally:
+        conn.close()
+
+
+# Persistence
+
+def write_csv(df, path, **kwargs) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False, **kwargs)
+
+
+def read_raw_sets(path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=RAW_DTYPES)
+
+
+def read_daily(path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype={"athlete": "string", "program": "string", "exercise": "string"})
+
+
+# Commands
+
+def run(command: str, paths: Dict[str, Path], conf_threshold: float = CONF_THRESHOLD,
+        write_csvs: bool = True, stats: Optional[ParseStats] = None,
+        chunk_rows: Optional[int] = None, sorted_by_date: bool = False) -> List[Dict]:
+    timings: List[Dict] = []
+    index = None
+    reviews = None
+
+    if command == "features" and chunk_rows:
+        # out-of-core: raw sets CSV -> daily summary CSV without loading either
+        with timed_stage("features (chunked)", timings) as t:
+            t["rows"] = write_daily_summary_chunked(paths["raw_sets"], paths["daily"], chunk_rows, sorted_by_date)
+        print(f"Done in {t['seconds']:.2f}s")
+        return timings
+
+    if command in ("parse", "all"):
+        with timed_stage("parse", timings) as t:
+            index = DedupeIndex()
+            reviews = []
+            df_raw = parse_stage(paths["raw_dir"], conf_threshold, stats, index, reviews)
+            t["rows"] = len(df_raw)
+        if index.dropped:
+            print_overlaps(index)
+        if command == "parse" or write_csvs:
+            with timed_stage("write raw sets", timings):
+                write_csv(df_raw, paths["raw_sets"])
+    elif command in ("features", "exercises", "db"):
+        with timed_stage("read raw sets", timings) as t:
+            df_raw = read_raw_sets(paths["raw_sets"])
+            t["rows"] = len(df_raw)
+
+    if command in ("features", "all"):
+        with timed_stage("features", timings) as t:
+            daily = features_stage(df_raw)
+            t["rows"] = len(daily)
+        if command == "features" or write_csvs:
+            with timed_stage("write daily summary", timings):
+                write_csv(daily, paths["daily"])
+    elif command == "db":
+        with timed_stage("read daily summary", timings) as t:
+            daily = read_daily(paths["daily"])
+            t["rows"] = len(daily)
+
+    if command in ("exercises", "all"):
+        with timed_stage("exercises", timings) as t:
+            exercises = exercises_stage(df_raw)
+            t["rows"] = len(exercises)
+        if command == "exercises" or write_csvs:
+            write_csv(exercises, paths["exercises"], header=["exercise"])
+
+    if command in ("db", "all"):
+        with timed_stage("db", timings) as t:
+            db_stage(df_raw, daily, paths["db"], index, reviews)
+            t["rows"] = len(df_raw) + len(daily)
+
+    total = sum(t["seconds"] for t in timings)
+    print(f"Done in {total:.2f}s: " + ", ".join(f"{t['stage']} {t['seconds']:.2f}s" for t in timings))
+    return timings
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Workout log ETL pipeline.")
+    ap.add_argument("command", choices=["parse", "features", "exercises", "db", "all"])
+    ap.add_argument("--data-root", default=str(PROJECT_ROOT),
+                    help="folder holding data_raw/ and data_processed/ (default: the project root)")
+    ap.add_argument("--raw-dir", help="log folder (default: <data-root>/data_raw)")
+    ap.add_argument("--out-dir", help="output folder (default: <data-root>/data_processed)")
+    ap.add_argument("--db-path", help="SQLite file (default: <out-dir>/workouts.db)")
+    ap.add_argument("--conf-threshold", type=float, default=CONF_THRESHOLD,
+                    help="classifier confidence below which lines go to the review file")
+    ap.add_argument("--no-csv", action="store_true", help="with `all`, only write the database")
+    ap.add_argument("--profile", action="store_true", help="print parser branch counts and timings")
+    ap.add_argument("--chunk-rows", type=int,
+                    help="with `features`: stream the raw sets CSV in chunks of this many rows (bounds memory)")
+    ap.add_argument("--sorted-by-date", action="store_true",
+                    help="with --chunk-rows: raw sets are in date order, so each date is written once complete")
+    args = ap.parse_args()
+
+    stats = ParseStats() if args.profile else None
+    run(args.command, pipeline_paths(args.data_root, args.raw_dir, args.out_dir, args.db_path),
+        args.conf_threshold, write_csvs=not args.no_csv, stats=stats,
+        chunk_rows=args.chunk_rows, sorted_by_date=args.sorted_by_date)
+    if stats is not None and stats.files:
+        print(stats.report())
@@ -1,28 +1,19 @@
 import pandas as pd
 from pathlib import Path
 
-DATA_PATH = Path(r"C:\Users\aakas\Documents\workout_project\data_processed")
+from src.parsers.normalize import unique_exercises
+
+DATA_PATH = Path(__file__).resolve().parent / "data_processed"
 RAW_CSV = DATA_PATH / "workouts_raw_sets.csv"
 OUTPUT_CSV = DATA_PATH / "unique_exercises.csv"
 
-# Read the raw file
-df = pd.read_csv(RAW_CSV)
-
-
-exercise_column = 'exercise'  
-
-# Get unique values, sort them nicely, and save as one column
-unique_exercises = (
-    df[exercise_column]
-    .astype(str)
-    .str.strip()
-    .drop_duplicates()
-    .sort_values()
-    .reset_index(drop=True)
-)
+if __name__ == "__main__":
+    # Read the raw file
+    df = pd.read_csv(RAW_CSV)
 
-# Save to CSV — one exercise per row
-unique_exercises.to_csv(OUTPUT_CSV, index=False, header=['exercise'])
+    # Get unique values, sorted, and save as one column (one exercise per row)
+    exercises = unique_exercises(df)
+    exercises.to_csv(OUTPUT_CSV, index=False, header=['exercise'])
 
-print(f"Done! {len(unique_exercises)} unique exercises saved to:")
-print(OUTPUT_CSV)
+    print(f"Done! {len(exercises)} unique exercises saved to:")
+    print(OUTPUT_CSV)